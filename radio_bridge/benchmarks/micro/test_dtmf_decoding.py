@@ -17,9 +17,18 @@ import os
 
 import pytest
 
+from scipy.io import wavfile
+
+from radio_bridge.dtmf import DTMFDecoder
 from radio_bridge.dtmf import FFTDTMFDecoderImplementation
+from radio_bridge.dtmf import GoertzelDTMFDecoderImplementation
 
-__all__ = ["test_benchmark_dtmf_decode_fft_algorithm"]
+__all__ = [
+    "test_benchmark_dtmf_decode_fft_algorithm",
+    "test_benchmark_dtmf_decode_goertzel_algorithm",
+    "test_benchmark_dtmf_decode_fft_algorithm_long_recording",
+    "test_benchmark_dtmf_decode_decimation",
+]
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FIXTURES_DIR = os.path.abspath(os.path.join(BASE_DIR, "../../tests/fixtures/dtmf"))
@@ -69,3 +78,100 @@ def test_benchmark_dtmf_decode_fft_algorithm(benchmark, data):
     result = benchmark.pedantic(run_benchmark, iterations=10, rounds=10)
 
     assert result == expected_sequence
+
+
+@pytest.mark.benchmark(group="dtmf_decode")
+@pytest.mark.parametrize(
+    "data",
+    [
+        ("anytone_578/1.wav", "1"),
+        ("anytone_578/2.wav", "2"),
+        ("anytone_578/3.wav", "3"),
+        ("anytone_578/4.wav", "4"),
+        ("anytone_578/5.wav", "5"),
+        ("anytone_578/6.wav", "6"),
+        ("anytone_578/7.wav", "7"),
+        ("anytone_578/8.wav", "8"),
+        ("anytone_578/9.wav", "9"),
+        ("anytone_578/*.wav", "*"),
+        ("anytone_578/0.wav", "0"),
+        ("anytone_578/#.wav", "#"),
+    ],
+    ids=[
+        "anytone_578_digit_1",
+        "anytone_578_digit_2",
+        "anytone_578_digit_3",
+        "anytone_578_digit_4",
+        "anytone_578_digit_5",
+        "anytone_578_digit_6",
+        "anytone_578_digit_7",
+        "anytone_578_digit_8",
+        "anytone_578_digit_9",
+        "anytone_578_digit_*",
+        "anytone_578_digit_0",
+        "anytone_578_digit_#",
+    ],
+)
+def test_benchmark_dtmf_decode_goertzel_algorithm(benchmark, data):
+    file_name, expected_sequence = data
+
+    file_path = os.path.join(FIXTURES_DIR, file_name)
+    decoder = GoertzelDTMFDecoderImplementation(file_path=file_path)
+
+    def run_benchmark():
+        return decoder.decode(return_on_first_char=True)
+
+    result = benchmark.pedantic(run_benchmark, iterations=10, rounds=10)
+
+    assert result == expected_sequence
+
+
+@pytest.mark.benchmark(group="dtmf_decode_long_recording")
+@pytest.mark.parametrize(
+    "batch_mode",
+    [False, True],
+    ids=["window_mode", "batch_mode"],
+)
+def test_benchmark_dtmf_decode_fft_algorithm_long_recording(benchmark, batch_mode):
+    file_path = os.path.join(FIXTURES_DIR, "anytone_578/dtmf_codes_1-#_anytone_578.wav")
+    decoder = FFTDTMFDecoderImplementation(file_path=file_path, batch_mode=batch_mode)
+
+    def run_benchmark():
+        return decoder.decode(return_on_first_char=False)
+
+    result = benchmark.pedantic(run_benchmark, iterations=5, rounds=5)
+
+    # NOTE: FFT decoder is not fully accurate on this recording, but both modes need to return the
+    # same result
+    assert result == "123445678897*0#"
+
+
+@pytest.mark.benchmark(group="dtmf_decode_decimation")
+@pytest.mark.parametrize(
+    "data",
+    [
+        ("fft", False, "123445678897*0#"),
+        ("goertzel", False, "123456789*0#"),
+        ("goertzel", True, "123456789*0#"),
+    ],
+    ids=["fft_48khz", "goertzel_48khz", "goertzel_decimated_8khz"],
+)
+def test_benchmark_dtmf_decode_decimation(benchmark, data):
+    implementation, decimate, expected_sequence = data
+
+    file_path = os.path.join(FIXTURES_DIR, "anytone_578/dtmf_codes_1-#_anytone_578.wav")
+    sample_rate, samples = wavfile.read(file_path)
+    decoder = DTMFDecoder(implementation=implementation, decimate=decimate)
+
+    def run_benchmark():
+        return decoder.decode_buffer(
+            samples=samples, sample_rate=sample_rate, return_on_first_char=False
+        )
+
+    result = benchmark.pedantic(run_benchmark, iterations=5, rounds=5)
+
+    # Time includes decimation. Accuracy is recorded in the benchmark results so it can be compared
+    # between runs (correct sequence is "123456789*0#")
+    benchmark.extra_info["result"] = result
+    benchmark.extra_info["accurate"] = result == "123456789*0#"
+    assert result == expected_sequence
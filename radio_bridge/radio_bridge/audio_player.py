@@ -20,79 +20,686 @@ This class assumes the system has been correctly configured that the USB sound c
 default line out.
 """
 
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
 import os
 import os.path
+import time
+import wave
 import shutil
 import shlex
+import tempfile
+import functools
+import threading
 import subprocess
+import multiprocessing
+from collections import OrderedDict
 
+import numpy as np
 import structlog
 
 from mutagen.mp3 import MP3
 from mutagen.wave import WAVE
 
+from radio_bridge.configuration import get_config_option
 from radio_bridge.utils.subprocess import on_parent_exit
 
 LOG = structlog.getLogger(__name__)
 
-__all__ = ["AudioPlayer", "get_audio_file_duration"]
+__all__ = [
+    "AudioPlayer",
+    "PreparedAudio",
+    "DecodedAudioCache",
+    "get_audio_file_duration",
+    "get_decoded_audio_cache",
+    "decode_audio_file",
+]
 
+SUPPORTED_EXTENSIONS = [".mp3", ".wav"]
 
-class AudioPlayer(object):
-    def play_file(self, file_path: str, delete_after_play=False) -> None:
-        _, ext = os.path.splitext(file_path)
+# Sample rate used by the in-process player output stream. All the clips are decoded and resampled
+# to this rate
+DEFAULT_OUTPUT_SAMPLE_RATE = 48000
 
-        if ext not in [".mp3", ".wav"]:
-            raise ValueError("Unsupported file format: %s (%s)" % (ext, file_path))
+# Maps (backend name, pid) to a backend instance. In-process backend keeps the output stream open
+# so there should be only one instance per process
+BACKEND_INSTANCES: Dict[tuple, "BaseAudioPlayerBackend"] = {}
+BACKEND_INSTANCES_LOCK = threading.Lock()
 
-        if ext == ".mp3":
-            self._play_mp3(file_path=file_path)
-        elif ext == ".wav":
-            self._play_wav(file_path=file_path)
+# Default byte budget for the decoded audio cache
+DEFAULT_DECODED_CACHE_SIZE_MB = 16
 
-        if delete_after_play:
-            LOG.debug("Removing audio file %s" % (file_path))
+# Number of bytes we account for each cached duration entry
+DURATION_ENTRY_SIZE = 64
+
+# Reference to the process wide decoded audio cache
+DECODED_AUDIO_CACHE: Optional["DecodedAudioCache"] = None
+
+
+class DecodedAudioCache(object):
+    """
+    LRU cache for decoded PCM samples and durations of audio files.
+
+    Entries are keyed by file path, modification time and size so a file which has been modified
+    is decoded again. Entries for the previous version of a modified file are evicted right away so
+    they don't take up the space until they are evicted as least recently used. Cache is bounded by
+    the total size of the cached samples.
+    """
+
+    def __init__(self, max_size_bytes: int) -> None:
+        self._max_size_bytes = max_size_bytes
+        self._size_bytes = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+        # Maps file path to the last seen (modification time, size) and the keys of all the cached
+        # entries for that file
+        self._file_versions: Dict[str, Tuple[int, int]] = {}
+        self._file_keys: Dict[str, Set[tuple]] = {}
+
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get_samples(
+        self, file_path: str, sample_rate: int, decode_func: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Return decoded samples for the provided file and call decode_func() on cache miss.
+        """
+        file_path, version = self._get_file_version(file_path=file_path)
+        key = ("samples", sample_rate, file_path) + version
+        return self._get_or_set(
+            key=key, file_path=file_path, version=version, value_func=decode_func
+        )
+
+    def get_duration(self, file_path: str, duration_func: Callable[[], float]) -> float:
+        """
+        Return duration (in seconds) for the provided file and call duration_func() on cache
+        miss.
+        """
+        file_path, version = self._get_file_version(file_path=file_path)
+        key = ("duration", file_path) + version
+        return self._get_or_set(
+            key=key, file_path=file_path, version=version, value_func=duration_func
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._file_versions.clear()
+            self._file_keys.clear()
+            self._size_bytes = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        result = dict(self._stats)
+        result["entries"] = len(self._entries)
+        result["size_bytes"] = self._size_bytes
+        result["max_size_bytes"] = self._max_size_bytes
+        return result
+
+    def _get_file_version(self, file_path: str) -> Tuple[str, Tuple[int, int]]:
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), (stat.st_mtime_ns, stat.st_size))
+
+    def _get_or_set(
+        self,
+        key: tuple,
+        file_path: str,
+        version: Tuple[int, int],
+        value_func: Callable[[], Any],
+    ) -> Any:
+        with self._lock:
+            if self._file_versions.get(file_path, version) != version:
+                # File has been modified, entries for the previous version will never be used again
+                self._invalidate_file(file_path=file_path)
+
+            self._file_versions[file_path] = version
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+
+            self._stats["misses"] += 1
+
+        # NOTE: We don't hold the lock while decoding since it can take a while
+        value = value_func()
+        size = self._get_value_size(value)
+
+        if isinstance(value, np.ndarray):
+            # Cached samples are shared so we make sure they can't be modified
+            value.flags.writeable = False
+
+        if size > self._max_size_bytes:
+            return value
+
+        with self._lock:
+            # File could have been modified while we were decoding it
+            if key not in self._entries and self._file_versions.get(file_path, version) == version:
+                self._file_versions[file_path] = version
+                self._entries[key] = value
+                self._file_keys.setdefault(file_path, set()).add(key)
+                self._size_bytes += size
+
+            while self._size_bytes > self._max_size_bytes:
+                # NOTE: All the keys end with (file path, modification time, size)
+                evicted_key = next(iter(self._entries))
+                self._remove_entry(key=evicted_key, file_path=evicted_key[-3])
+                self._stats["evictions"] += 1
+
+        return value
+
+    def _invalidate_file(self, file_path: str) -> None:
+        for key in list(self._file_keys.get(file_path, [])):
+            self._remove_entry(key=key, file_path=file_path)
+            self._stats["invalidations"] += 1
+
+    def _remove_entry(self, key: tuple, file_path: str) -> None:
+        value = self._entries.pop(key)
+        self._size_bytes -= self._get_value_size(value)
+
+        keys = self._file_keys[file_path]
+        keys.discard(key)
+
+        if not keys:
+            del self._file_keys[file_path]
+            self._file_versions.pop(file_path, None)
+
+    def _get_value_size(self, value: Any) -> int:
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+
+        return DURATION_ENTRY_SIZE
+
+
+class PreparedAudio(object):
+    """
+    Audio clips which have been prepared for playback (e.g. decoded) and can be played right away.
+    """
+
+    def __init__(self, file_paths: List[str], samples: Optional[np.ndarray] = None) -> None:
+        self.file_paths = file_paths
+
+        # Decoded and concatenated samples for all the clips (if backend works with PCM)
+        self.samples = samples
+
+    def __repr__(self):
+        return "<PreparedAudio file_paths=%s,decoded=%s>" % (
+            ", ".join(self.file_paths),
+            self.samples is not None,
+        )
+
+
+class BaseAudioPlayerBackend(object):
+    # True if backend can measure time until the first audio sample is passed to the output device
+    MEASURES_START_LATENCY = True
+
+    def __init__(self) -> None:
+        self._stats: Dict[str, Any] = {
+            "plays": 0,
+            "clips": 0,
+        }
+
+        if self.MEASURES_START_LATENCY:
+            self._stats["last_start_latency_ms"] = 0
+            self._stats["total_start_latency_ms"] = 0
+
+    def prepare(self, file_paths: List[str]) -> PreparedAudio:
+        """
+        Prepare provided audio files for playback.
+        """
+        return PreparedAudio(file_paths=file_paths)
+
+    def play_prepared(self, prepared_audio: PreparedAudio) -> None:
+        """
+        Play prepared audio files back to back.
+        """
+        raise NotImplementedError("play_prepared() not implemented")
+
+    def play_files(self, file_paths: List[str]) -> None:
+        """
+        Play provided audio files back to back.
+        """
+        self.play_prepared(prepared_audio=self.prepare(file_paths=file_paths))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return playback stats. Start latency is the time between the play request and the time
+        first audio sample has been passed to the output device (only reported by backends which
+        can measure it).
+        """
+        result = dict(self._stats)
+
+        if self.MEASURES_START_LATENCY and result["plays"]:
+            result["avg_start_latency_ms"] = result["total_start_latency_ms"] // result["plays"]
+
+        return result
+
+    def _decode_files(self, file_paths: List[str], sample_rate: int) -> np.ndarray:
+        """
+        Decode provided audio files (using decoded audio cache) and concatenate them into a single
+        buffer.
+        """
+        cache = get_decoded_audio_cache()
+        return np.concatenate(
+            [
+                cache.get_samples(
+                    file_path=file_path,
+                    sample_rate=sample_rate,
+                    decode_func=functools.partial(
+                        decode_audio_file, file_path=file_path, sample_rate=sample_rate
+                    ),
+                )
+                for file_path in file_paths
+            ]
+        )
+
+    def _record_start_latency(self, start_time: float) -> None:
+        latency_ms = int((time.monotonic() - start_time) * 1000)
+
+        self._stats["last_start_latency_ms"] = latency_ms
+        self._stats["total_start_latency_ms"] += latency_ms
+
+        LOG.debug("Audio playback started", start_latency_ms=latency_ms)
+
+
+class ExternalAudioPlayerBackend(BaseAudioPlayerBackend):
+    """
+    Backend which plays files using external mpg123 or aplay binary.
+
+    Single file is played directly. Multiple clips are decoded in prepare() and concatenated into
+    a temporary WAV file which is played using a single aplay process so there are no gaps between
+    the clips caused by starting a new process for each clip.
+    """
+
+    # subprocess.run() blocks until the whole clip has been played so we can't tell when the
+    # playback has started
+    MEASURES_START_LATENCY = False
+
+    def __init__(self, sample_rate: int = DEFAULT_OUTPUT_SAMPLE_RATE) -> None:
+        """
+        :param sample_rate: Sample rate clips are decoded to when concatenating multiple clips.
+        """
+        super(ExternalAudioPlayerBackend, self).__init__()
+
+        self._sample_rate = sample_rate
+
+    def prepare(self, file_paths: List[str]) -> PreparedAudio:
+        if len(file_paths) > 1:
+            samples = self._decode_files(file_paths=file_paths, sample_rate=self._sample_rate)
+            return PreparedAudio(file_paths=file_paths, samples=samples)
+
+        # NOTE: Durations are cached so this only parses the files on the first play. It also
+        # means missing files are detected before TX is enabled.
+        for file_path in file_paths:
+            get_audio_file_duration(file_path=file_path)
+
+        return PreparedAudio(file_paths=file_paths)
+
+    def play_prepared(self, prepared_audio: PreparedAudio) -> None:
+        if prepared_audio.samples is None and len(prepared_audio.file_paths) > 1:
+            prepared_audio = self.prepare(file_paths=prepared_audio.file_paths)
+
+        self._stats["plays"] += 1
+
+        if prepared_audio.samples is not None:
+            self._play_samples(samples=prepared_audio.samples, file_paths=prepared_audio.file_paths)
+            self._stats["clips"] += len(prepared_audio.file_paths)
+            return
+
+        for file_path in prepared_audio.file_paths:
+            _, ext = os.path.splitext(file_path)
+
+            if ext == ".mp3":
+                self._play_mp3(file_path=file_path)
+            elif ext == ".wav":
+                self._play_wav(file_path=file_path)
+
+            self._stats["clips"] += 1
+
+    def _play_samples(self, samples: np.ndarray, file_paths: List[str]) -> None:
+        """
+        Write concatenated samples to a temporary WAV file and play it.
+        """
+        fd, file_path = tempfile.mkstemp(prefix="radio-bridge-", suffix=".wav")
+        os.close(fd)
+
+        try:
+            with wave.open(file_path, "wb") as fp:
+                fp.setnchannels(1)
+                fp.setsampwidth(2)
+                fp.setframerate(self._sample_rate)
+                fp.writeframes(samples.tobytes())
+
+            LOG.trace(
+                "Playing audio files %s" % (", ".join(file_paths)),
+                duration=len(samples) / self._sample_rate,
+            )
+            self._run_player(binary="aplay", file_path=file_path)
+        finally:
             os.unlink(file_path)
 
     def _play_mp3(self, file_path: str) -> None:
-        if not shutil.which("mpg123"):
-            raise Exception(
-                'Unable to find "mpg123" binary. Make sure it\'s installed on the ' "system."
-            )
+        duration = get_audio_file_duration(file_path=file_path)
 
-        mp3 = MP3(file_path)
-        duration = mp3.info.length
+        LOG.trace('Playing audio file "%s"' % (file_path), duration=duration)
+
+        self._run_player(binary="mpg123", file_path=file_path)
+
+    def _play_wav(self, file_path: str) -> None:
+        duration = get_audio_file_duration(file_path=file_path)
 
         LOG.trace('Playing audio file "%s"' % (file_path), duration=duration)
 
-        args = "mpg123 -q %s" % (shlex.quote(file_path))
+        self._run_player(binary="aplay", file_path=file_path)
+
+    def _run_player(self, binary: str, file_path: str) -> None:
+        if not shutil.which(binary):
+            raise Exception(
+                'Unable to find "%s" binary. Make sure it\'s installed on the system.' % (binary)
+            )
+
+        args = "%s -q %s" % (binary, shlex.quote(file_path))
         # NOTE: We set preexec_fn since we want child process to also be killed if the parent is
         # killed
         subprocess.run(args, shell=True, check=True, preexec_fn=on_parent_exit("SIGTERM"))
 
-    def _play_wav(self, file_path: str) -> None:
-        if not shutil.which("aplay"):
-            raise Exception(
-                'Unable to find "aplay" binary. Make sure it\'s installed on the ' "system."
+
+class PyAudioPlayerBackend(BaseAudioPlayerBackend):
+    """
+    Backend which decodes audio files to PCM and plays them using a single PyAudio output stream.
+
+    Output stream is opened on first use and kept open. All the clips are decoded and concatenated
+    in prepare() and written to the stream as a single buffer so there are no gaps between them.
+
+    In plugin executor worker processes the stream is closed after each playback. Otherwise each
+    warm worker would hold the output device open and other processes wouldn't be able to open a
+    device which doesn't support sharing (e.g. "hw:" ALSA devices without dmix).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = DEFAULT_OUTPUT_SAMPLE_RATE,
+        output_device_index: Optional[int] = None,
+        keep_stream_open: bool = True,
+    ) -> None:
+        """
+        :param keep_stream_open: False to close the output stream after each playback.
+        """
+        super(PyAudioPlayerBackend, self).__init__()
+
+        self._sample_rate = sample_rate
+        self._output_device_index = output_device_index
+        self._keep_stream_open = keep_stream_open
+
+        self._lock = threading.Lock()
+        self._audio = None
+        self._stream = None
+
+    def prepare(self, file_paths: List[str]) -> PreparedAudio:
+        samples = self._decode_files(file_paths=file_paths, sample_rate=self._sample_rate)
+        return PreparedAudio(file_paths=file_paths, samples=samples)
+
+    def play_prepared(self, prepared_audio: PreparedAudio) -> None:
+        start_time = time.monotonic()
+
+        if prepared_audio.samples is None:
+            prepared_audio = self.prepare(file_paths=prepared_audio.file_paths)
+
+        samples = prepared_audio.samples
+        assert samples is not None
+
+        LOG.trace(
+            "Playing audio files %s" % (", ".join(prepared_audio.file_paths)),
+            duration=len(samples) / self._sample_rate,
+        )
+
+        with self._lock:
+            stream = self._get_stream()
+
+            self._stats["plays"] += 1
+            self._stats["clips"] += len(prepared_audio.file_paths)
+            self._record_start_latency(start_time=start_time)
+
+            stream.write(samples.tobytes())
+
+            # Write() returns once the data has been buffered so we pad the output with silence
+            # which makes sure the whole clip has been played before the caller disables TX
+            padding = int(stream.get_output_latency() * self._sample_rate)
+
+            if padding > 0:
+                stream.write(np.zeros(padding, dtype=np.int16).tobytes())
+
+            if not self._keep_stream_open:
+                self._close_stream()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_stream()
+
+    def _close_stream(self) -> None:
+        if self._stream:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+        if self._audio:
+            self._audio.terminate()
+            self._audio = None
+
+    def _get_stream(self):
+        if self._stream is None:
+            self._stream = self._open_stream()
+
+        return self._stream
+
+    def _open_stream(self):
+        import pyaudio
+
+        LOG.debug(
+            "Opening audio output stream",
+            sample_rate=self._sample_rate,
+            output_device_index=self._output_device_index,
+        )
+
+        self._audio = pyaudio.PyAudio()
+        return self._audio.open(  # type: ignore
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self._sample_rate,
+            output=True,
+            output_device_index=self._output_device_index,
+        )
+
+
+class AudioPlayer(object):
+    backends = {"external": ExternalAudioPlayerBackend, "pyaudio": PyAudioPlayerBackend}
+
+    def __init__(self, backend: Optional[str] = None) -> None:
+        self._backend_name = backend
+
+    @property
+    def backend(self) -> BaseAudioPlayerBackend:
+        # NOTE: Backend is retrieved lazily so config changes are reflected here
+        backend_name = self._backend_name or get_config_option(
+            "audio", "player", fallback="external"
+        )
+        return get_audio_player_backend(name=backend_name)
+
+    def play_file(self, file_path: str, delete_after_play=False) -> None:
+        self.play_files(file_paths=[file_path], delete_after_play=delete_after_play)
+
+    def play_files(self, file_paths: List[str], delete_after_play=False) -> None:
+        """
+        Play provided audio files back to back.
+        """
+        prepared_audio = self.prepare_files(file_paths=file_paths)
+        self.play_prepared(prepared_audio=prepared_audio, delete_after_play=delete_after_play)
+
+    def prepare_files(self, file_paths: List[str]) -> PreparedAudio:
+        """
+        Prepare provided audio files for playback (e.g. decode them) so they can be played back to
+        back without any delay using play_prepared().
+        """
+        for file_path in file_paths:
+            _, ext = os.path.splitext(file_path)
+
+            if ext not in SUPPORTED_EXTENSIONS:
+                raise ValueError("Unsupported file format: %s (%s)" % (ext, file_path))
+
+        return self.backend.prepare(file_paths=file_paths)
+
+    def play_prepared(self, prepared_audio: PreparedAudio, delete_after_play=False) -> None:
+        self.backend.play_prepared(prepared_audio=prepared_audio)
+
+        if delete_after_play:
+            for file_path in prepared_audio.file_paths:
+                LOG.debug("Removing audio file %s" % (file_path))
+                os.unlink(file_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        result = self.backend.get_stats()
+        result["decoded_audio_cache"] = get_decoded_audio_cache().get_stats()
+        return result
+
+
+def get_audio_player_backend(name: str) -> BaseAudioPlayerBackend:
+    """
+    Return audio player backend instance for the provided name.
+
+    If in-process backend can't be used (e.g. PyAudio is not installed), we fall back to the
+    external backend.
+    """
+    key = (name, os.getpid())
+
+    with BACKEND_INSTANCES_LOCK:
+        if key in BACKEND_INSTANCES:
+            return BACKEND_INSTANCES[key]
+
+        if name == "pyaudio":
+            try:
+                import pyaudio  # NOQA
+
+                backend: BaseAudioPlayerBackend = PyAudioPlayerBackend(
+                    sample_rate=get_config_option(
+                        "audio", "output_sample_rate", "int", fallback=DEFAULT_OUTPUT_SAMPLE_RATE
+                    ),
+                    output_device_index=get_config_option(
+                        "audio", "output_device_index", "int", fallback=None
+                    ),
+                    # Plugin executor workers shouldn't hold the output device open between runs
+                    keep_stream_open=multiprocessing.current_process().name == "MainProcess",
+                )
+            except ImportError as e:
+                LOG.warning(
+                    "Unable to use pyaudio audio player, falling back to external: %s" % (str(e))
+                )
+                backend = ExternalAudioPlayerBackend()
+        elif name == "external":
+            backend = ExternalAudioPlayerBackend(
+                sample_rate=get_config_option(
+                    "audio", "output_sample_rate", "int", fallback=DEFAULT_OUTPUT_SAMPLE_RATE
+                )
             )
+        else:
+            raise ValueError("Unsupported audio player backend: %s" % (name))
 
-        wav = WAVE(file_path)
-        duration = wav.info.length
+        BACKEND_INSTANCES[key] = backend
 
-        LOG.trace('Playing audio file "%s"' % (file_path), duration=duration)
+    return backend
 
-        args = "aplay -q %s" % (shlex.quote(file_path))
-        # NOTE: We set preexec_fn since we want child process to also be killed if the parent is
-        # killed
-        subprocess.run(args, shell=True, check=True, preexec_fn=on_parent_exit("SIGTERM"))
+
+def decode_audio_file(file_path: str, sample_rate: int) -> np.ndarray:
+    """
+    Decode provided audio file to mono signed 16 bit PCM samples with the provided sample rate.
+    """
+    _, ext = os.path.splitext(file_path)
+
+    if ext == ".mp3":
+        return _decode_mp3(file_path=file_path, sample_rate=sample_rate)
+    elif ext == ".wav":
+        return _decode_wav(file_path=file_path, sample_rate=sample_rate)
+
+    raise ValueError("Unsupported file format: %s (%s)" % (ext, file_path))
+
+
+def _decode_mp3(file_path: str, sample_rate: int) -> np.ndarray:
+    if not shutil.which("mpg123"):
+        raise Exception(
+            'Unable to find "mpg123" binary. Make sure it\'s installed on the ' "system."
+        )
+
+    # mpg123 takes care of down mixing and resampling and writes raw PCM to stdout
+    args = ["mpg123", "-q", "-s", "-m", "-e", "s16", "-r", str(sample_rate), file_path]
+    result = subprocess.run(
+        args, stdout=subprocess.PIPE, check=True, preexec_fn=on_parent_exit("SIGTERM")
+    )
+
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def _decode_wav(file_path: str, sample_rate: int) -> np.ndarray:
+    with wave.open(file_path, "rb") as fp:
+        channels = fp.getnchannels()
+        sample_width = fp.getsampwidth()
+        file_sample_rate = fp.getframerate()
+        data = fp.readframes(fp.getnframes())
+
+    if sample_width == 2:
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    elif sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) * 256
+    else:
+        raise ValueError("Unsupported WAV sample width: %s (%s)" % (sample_width, file_path))
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    if file_sample_rate != sample_rate:
+        from math import gcd
+        from scipy.signal import resample_poly
+
+        divisor = gcd(file_sample_rate, sample_rate)
+        samples = resample_poly(samples, sample_rate // divisor, file_sample_rate // divisor)
+
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+def get_decoded_audio_cache() -> DecodedAudioCache:
+    """
+    Return process wide decoded audio cache instance.
+    """
+    global DECODED_AUDIO_CACHE
+
+    if DECODED_AUDIO_CACHE is None:
+        max_size_mb = get_config_option(
+            "audio", "decoded_cache_size_mb", "int", fallback=DEFAULT_DECODED_CACHE_SIZE_MB
+        )
+        DECODED_AUDIO_CACHE = DecodedAudioCache(max_size_bytes=max_size_mb * 1024 * 1024)
+
+    return DECODED_AUDIO_CACHE
 
 
 def get_audio_file_duration(file_path: str) -> float:
     _, ext = os.path.splitext(file_path)
 
-    if ext not in [".mp3", ".wav"]:
+    if ext not in SUPPORTED_EXTENSIONS:
         raise ValueError("Unsupported file format: %s (%s)" % (ext, file_path))
 
+    return get_decoded_audio_cache().get_duration(
+        file_path=file_path, duration_func=functools.partial(_parse_audio_file_duration, file_path)
+    )
+
+
+def _parse_audio_file_duration(file_path: str) -> float:
+    _, ext = os.path.splitext(file_path)
+
     if ext == ".mp3":
         mp3 = MP3(file_path)
         duration = mp3.info.length
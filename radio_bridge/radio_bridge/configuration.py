@@ -14,17 +14,26 @@
 # limitations under the License.
 
 from typing import Any
+from typing import Dict
 from typing import Optional
 from typing import List
+from typing import Tuple
 
 import os
 import time
+import threading
+from types import MappingProxyType
 
 import configparser
 from configobj import ConfigObj
 import structlog
 
 __all__ = [
+    "ConfigSnapshot",
+    "get_config_snapshot",
+    "get_config_stats",
+    "start_config_watcher",
+    "stop_config_watcher",
     "get_config_option",
     "get_plugin_config",
     "get_plugin_config_option",
@@ -50,10 +59,36 @@ CONFIG = None
 # Stores unix timestamp of when the config has been loaded and parsed
 CONFIG_LOAD_TIME: int = 0
 
+# Stores read-only snapshot of the currently active config which is used for option lookups
+CONFIG_SNAPSHOT: Optional["ConfigSnapshot"] = None
+
+# Monotonically increasing version of the active config. It's incremented each time config is
+# (re-)loaded from disk or updated using set_config_option()
+CONFIG_VERSION: int = 0
+
+# How often (in seconds) we check if the config file on disk has been modified. When the config
+# watcher thread is running, this check is performed by the watcher and not inline in
+# _get_config()
+CONFIG_CHECK_INTERVAL = 1.0
+
+# Stores time.monotonic() value of when we last checked config file on disk for changes
+CONFIG_LAST_CHECK_TIME: float = 0.0
+
+# Reference to the background config watcher thread (if running)
+CONFIG_WATCHER: Optional["ConfigWatcher"] = None
+
+CONFIG_STATS = {"reloads": 0, "mtime_checks": 0}
+
 # Special value used so we can differentiate between fallback not being provided and fallback
 # being Nont
 FALLBACK_NOT_SET_VALUE = "|~*~notset*~|"
 
+# Special values used to memoize lookups for missing sections and options
+MISSING_SECTION_VALUE = object()
+MISSING_OPTION_VALUE = object()
+
+VALID_OPTION_TYPES = ["str", "int", "float", "bool"]
+
 LOG = structlog.get_logger()
 
 
@@ -78,8 +113,193 @@ class ConfigParserConfigObj(ConfigObj):
         return get_config_option(section, option, "bool", fallback=fallback)
 
 
+class ConfigSnapshot(object):
+    """
+    Read-only snapshot of the parsed config with memoized typed option lookups.
+
+    Snapshot is never modified. When config is re-loaded or updated, a new snapshot with a new
+    version is published and the old one is discarded, together with all the memoized values.
+    """
+
+    def __init__(self, config: ConfigObj, version: int) -> None:
+        # NOTE: Values are retrieved using __getitem__ so any interpolation is performed by
+        # ConfigObj
+        self._sections = MappingProxyType(
+            {
+                section: MappingProxyType({key: config[section][key] for key in config[section]})
+                for section in config.sections  # type: ignore
+            }
+        )
+        self._config = config
+        self._cache: Dict[Tuple[str, str, str], Any] = {}
+
+        self.version = version
+        self.stats = {"lookups": 0, "cache_hits": 0, "cache_misses": 0}
+
+    @property
+    def config(self) -> ConfigObj:
+        """
+        Return ConfigObj instance this snapshot has been created from.
+        """
+        return self._config
+
+    def get(
+        self,
+        section: str,
+        option: str,
+        option_type: str = "str",
+        fallback: Any = FALLBACK_NOT_SET_VALUE,
+    ) -> Any:
+        """
+        Return value for the provided config section and option.
+        """
+        if option_type not in VALID_OPTION_TYPES:
+            raise ValueError("Unsupported option_type: %s" % (option_type))
+
+        self.stats["lookups"] += 1
+
+        key = (section, option, option_type)
+
+        try:
+            value = self._cache[key]
+            self.stats["cache_hits"] += 1
+        except KeyError:
+            value = self._lookup(section=section, option=option, option_type=option_type)
+            self._cache[key] = value
+            self.stats["cache_misses"] += 1
+
+        if value is MISSING_SECTION_VALUE:
+            if fallback != FALLBACK_NOT_SET_VALUE:
+                return fallback
+
+            raise ValueError("Section %s is empty or missing" % (section))
+
+        if value is MISSING_OPTION_VALUE:
+            if fallback != FALLBACK_NOT_SET_VALUE:
+                return fallback
+
+            raise KeyError(option)
+
+        if value is None and fallback != FALLBACK_NOT_SET_VALUE:
+            return fallback
+
+        return value
+
+    def get_section(self, section: str) -> dict:
+        """
+        Return a copy of all the options for the provided section.
+
+        :raises KeyError: If section doesn't exist.
+        """
+        return dict(self._sections[section])
+
+    def _lookup(self, section: str, option: str, option_type: str) -> Any:
+        section_value = self._sections.get(section, None)
+
+        if section_value is None:
+            return MISSING_SECTION_VALUE
+
+        if option not in section_value:
+            # NOTE: To stay compatible with ConfigObj, missing "str" options resolve to None
+            return None if option_type == "str" else MISSING_OPTION_VALUE
+
+        value = section_value[option]
+
+        if option_type == "int":
+            return int(value)
+        elif option_type == "float":
+            return float(value)
+        elif option_type == "bool":
+            return _as_bool(value)
+
+        return value
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Background thread which periodically checks if the config file on disk has been modified and
+    re-loads it if it has been.
+    """
+
+    def __init__(self, interval: float = CONFIG_CHECK_INTERVAL) -> None:
+        super(ConfigWatcher, self).__init__(name="config-watcher")
+        self.daemon = True
+
+        self.pid = os.getpid()
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                _reload_config_if_modified()
+            except Exception as e:
+                LOG.exception("Failed to re-load modified config: %s" % (str(e)))
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def _as_bool(value: Any) -> bool:
+    """
+    Convert config value to boolean the same way ConfigObj Section.as_bool() does.
+    """
+    if value is True or value is False:
+        return value
+
+    try:
+        return ConfigObj._bools[str(value).lower()]  # type: ignore
+    except KeyError:
+        raise ValueError('Value "%s" is neither True nor False' % (value))
+
+
+def _publish_config_snapshot(config: ConfigObj) -> None:
+    """
+    Create a new snapshot for the provided config and make it the active one.
+    """
+    global CONFIG_SNAPSHOT, CONFIG_VERSION
+
+    CONFIG_VERSION += 1
+    CONFIG_SNAPSHOT = ConfigSnapshot(config=config, version=CONFIG_VERSION)
+
+
+def _is_config_watcher_running() -> bool:
+    # NOTE: Threads don't survive fork so watcher started in the parent doesn't run in the plugin
+    # executor sub processes
+    return (
+        CONFIG_WATCHER is not None
+        and CONFIG_WATCHER.pid == os.getpid()
+        and CONFIG_WATCHER.is_alive()
+    )
+
+
+def _reload_config_if_modified(validate: bool = True) -> bool:
+    """
+    Re-load config if the config file on disk has been modified since we have parsed it.
+
+    Returns True if config has been re-loaded.
+    """
+    global CONFIG_LAST_CHECK_TIME
+
+    config_path = os.environ.get("RADIO_BRIDGE_CONFIG_PATH", None)
+
+    CONFIG_LAST_CHECK_TIME = time.monotonic()
+
+    if not config_path:
+        return False
+
+    CONFIG_STATS["mtime_checks"] += 1
+
+    if CONFIG_LOAD_TIME < int(os.path.getmtime(config_path)):
+        LOG.debug("Config file on disk has been updated since we parsed it, re-loading...")
+        _load_and_parse_config(config_path=config_path, validate=validate)
+        return True
+
+    return False
+
+
 def _load_and_parse_config(config_path: Optional[str] = None, validate: bool = True):
-    global CONFIG, CONFIG_LOAD_TIME
+    global CONFIG, CONFIG_LOAD_TIME, CONFIG_LAST_CHECK_TIME
 
     log = LOG.bind(config_path=config_path)
 
@@ -105,6 +325,10 @@ def _load_and_parse_config(config_path: Optional[str] = None, validate: bool = T
 
     CONFIG = config
     CONFIG_LOAD_TIME = int(time.time())
+    CONFIG_LAST_CHECK_TIME = time.monotonic()
+    CONFIG_STATS["reloads"] += 1
+
+    _publish_config_snapshot(config=config)
 
 
 def _validate_config(config):
@@ -128,11 +352,26 @@ def _validate_config(config):
         if not os.path.isfile(callsign):
             raise ValueError("File %s doesn't exist" % (callsign))
 
+    if config["rx"]["mode"] not in ["record", "stream"]:
+        raise ValueError(
+            "Invalid rx.mode value: %s. Valid values: record, stream" % (config["rx"]["mode"])
+        )
+
     if config["tx"]["mode"] not in ["vox", "gpio"]:
         raise ValueError(
             "Invalid tx.mode value: %s. Valid values: vox, gpio" % (config["tx"]["mode"])
         )
 
+    from radio_bridge.audio_player import AudioPlayer
+
+    valid_audio_players = AudioPlayer.backends.keys()
+
+    if config["audio"]["player"] not in valid_audio_players:
+        raise ValueError(
+            "Invalid audio.player value: %s. Valid values: %s"
+            % (config["audio"]["player"], ", ".join(valid_audio_players))
+        )
+
     from radio_bridge.tts import TextToSpeech
 
     valid_tts_implementations = TextToSpeech.implementations.keys()
@@ -143,10 +382,24 @@ def _validate_config(config):
             % (config["tts"]["implementation"], ", ".join(valid_tts_implementations))
         )
 
-    if config["plugins"]["executor"] not in ["native", "process"]:
+    from radio_bridge.dtmf import DTMFDecoder
+
+    valid_dtmf_implementations = DTMFDecoder.implementations.keys()
+
+    if config["dtmf"]["implementation"] not in valid_dtmf_implementations:
         raise ValueError(
-            "Invalid plugins.executor value: %s. Valid values: native, processs"
-            % (config["plugins"]["exeecution_model"])
+            "Invalid dtmf.implementation value: %s. Valid values: %s"
+            % (config["dtmf"]["implementation"], ", ".join(valid_dtmf_implementations))
+        )
+
+    from radio_bridge.plugins.executor import PluginExecutor
+
+    valid_executor_implementations = PluginExecutor.implementations.keys()
+
+    if config["plugins"]["executor"] not in valid_executor_implementations:
+        raise ValueError(
+            "Invalid plugins.executor value: %s. Valid values: %s"
+            % (config["plugins"]["executor"], ", ".join(valid_executor_implementations))
         )
 
     return config
@@ -157,61 +410,88 @@ def _get_config(validate: bool = True, force_load: bool = False) -> configparser
     Retrieved loaded and parsed config instance.
 
     If config hasn't be loaded yet, it will be loaded and parsed by this method.
-    """
-    global CONFIG
 
+    Unless config watcher thread is running, config file on disk is checked for modifications at
+    most once every CONFIG_CHECK_INTERVAL seconds.
+    """
     config_path = os.environ.get("RADIO_BRIDGE_CONFIG_PATH", None)
 
     if not CONFIG or force_load:
         _load_and_parse_config(config_path=config_path, validate=validate)
-
-    if config_path and CONFIG_LOAD_TIME < int(os.path.getmtime(config_path)):
-        LOG.debug("Config file on disk has been updated since we parsed it, re-loading...")
-        _load_and_parse_config(config_path=config_path, validate=validate)
+    elif (
+        config_path
+        and not _is_config_watcher_running()
+        and time.monotonic() - CONFIG_LAST_CHECK_TIME >= CONFIG_CHECK_INTERVAL
+    ):
+        _reload_config_if_modified(validate=validate)
 
     assert CONFIG is not None
     return CONFIG
 
 
-def get_config_option(
-    section: str, option: str, option_type: str = "str", fallback: Any = FALLBACK_NOT_SET_VALUE
-) -> Any:
+def get_config_snapshot() -> ConfigSnapshot:
     """
-    Return value for the provided config section and option.
+    Return snapshot of the currently active config.
     """
     config = _get_config()
 
-    if option_type == "str":
-        get_method = "get"
-    elif option_type == "int":
-        get_method = "as_int"
-    elif option_type == "float":
-        get_method = "as_loat"
-    elif option_type == "bool":
-        get_method = "as_bool"
-    else:
-        raise ValueError("Unsupported option_type: %s" % (option_type))
-
-    section_value = ConfigParserConfigObj._original_get(config, section)
-
-    if section_value is None:
-        if fallback != FALLBACK_NOT_SET_VALUE:
-            return fallback
+    if CONFIG_SNAPSHOT is None or CONFIG_SNAPSHOT.config is not config:
+        # Config object has been replaced directly (e.g. in tests)
+        _publish_config_snapshot(config=config)
 
-        raise ValueError("Section %s is empty or missing" % (section))
+    assert CONFIG_SNAPSHOT is not None
+    return CONFIG_SNAPSHOT
 
-    try:
-        value = getattr(section_value, get_method)(option)
-    except KeyError as e:
-        if fallback != FALLBACK_NOT_SET_VALUE:
-            return fallback
 
-        raise e
+def get_config_stats() -> dict:
+    """
+    Return config snapshot version and lookup counters.
+    """
+    result: Dict[str, Any] = {
+        "version": CONFIG_VERSION,
+        "watcher_running": _is_config_watcher_running(),
+    }
+    result.update(CONFIG_STATS)
 
-    if value is None and fallback != FALLBACK_NOT_SET_VALUE:
-        return fallback
+    if CONFIG_SNAPSHOT is not None:
+        result.update(CONFIG_SNAPSHOT.stats)
+
+    return result
+
+
+def start_config_watcher(interval: float = CONFIG_CHECK_INTERVAL) -> ConfigWatcher:
+    """
+    Start background thread which re-loads the config when the config file on disk is modified.
+    """
+    global CONFIG_WATCHER
+
+    if _is_config_watcher_running():
+        assert CONFIG_WATCHER is not None
+        return CONFIG_WATCHER
 
-    return value
+    CONFIG_WATCHER = ConfigWatcher(interval=interval)
+    CONFIG_WATCHER.start()
+
+    return CONFIG_WATCHER
+
+
+def stop_config_watcher() -> None:
+    global CONFIG_WATCHER
+
+    if CONFIG_WATCHER is not None:
+        CONFIG_WATCHER.stop()
+        CONFIG_WATCHER = None
+
+
+def get_config_option(
+    section: str, option: str, option_type: str = "str", fallback: Any = FALLBACK_NOT_SET_VALUE
+) -> Any:
+    """
+    Return value for the provided config section and option.
+    """
+    return get_config_snapshot().get(
+        section=section, option=option, option_type=option_type, fallback=fallback
+    )
 
 
 def get_plugin_config(plugin_id: str) -> dict:
@@ -219,7 +499,7 @@ def get_plugin_config(plugin_id: str) -> dict:
     Return plugin config for the provided plugin.
     """
     try:
-        plugin_config = dict(_get_config()["plugin:%s" % (plugin_id)])
+        plugin_config = get_config_snapshot().get_section("plugin:%s" % (plugin_id))
         LOG.debug("Found config for plugin %s" % (plugin_id), config=plugin_config)
     except KeyError as e:
         LOG.debug('Missing config entry for plugin "%s": %s' % (plugin_id, str(e)))
@@ -261,6 +541,9 @@ def set_config_option(section: str, option: str, value: Any, write_to_disk: bool
         config[section] = {}
         config[section][option] = value
 
+    # Existing snapshot is never modified so we need to publish a new one
+    _publish_config_snapshot(config=config)
+
     if write_to_disk and config_path:
         LOG.debug("Writing updated config file to disk", file_path=config_path)
         with open(config_path, "wb") as fp:
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Disk backed cache for responses retrieved from remote services.
+
+Cache survives restarts and is shared between the main process and plugin executor worker
+processes. Each response is stored in a single file which contains JSON metadata (status code,
+headers, time when it has been stored) on the first line followed by the response body. Files are
+written atomically (write to a temporary file + rename) so readers never see partially written
+entries.
+"""
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+import structlog
+import requests
+from requests.structures import CaseInsensitiveDict
+
+__all__ = ["HTTPResponseCache", "HTTPResponseCacheEntry"]
+
+LOG = structlog.getLogger(__name__)
+
+# Default maximum size of all the cached responses
+DEFAULT_CACHE_MAX_SIZE_MB = 20
+
+CACHE_FILE_EXTENSION = ".cache"
+
+
+class HTTPResponseCacheEntry(object):
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: Dict[str, str],
+        encoding: Optional[str],
+        content: bytes,
+        stored_at: float,
+    ) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.encoding = encoding
+        self.content = content
+
+        # Unix timestamp of when the response has been retrieved or last revalidated
+        self.stored_at = stored_at
+
+    @property
+    def age(self) -> float:
+        return max(time.time() - self.stored_at, 0)
+
+    @property
+    def etag(self) -> Optional[str]:
+        return CaseInsensitiveDict(self.headers).get("ETag", None)
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return CaseInsensitiveDict(self.headers).get("Last-Modified", None)
+
+    def to_response(self) -> requests.Response:
+        """
+        Return requests Response object for this entry.
+        """
+        response = requests.Response()
+        response.url = self.url
+        response.status_code = self.status_code
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response._content = self.content
+
+        # Allows callers to tell if the response has been served from cache
+        response.from_cache = True  # type: ignore
+        return response
+
+    def __repr__(self):
+        return "<HTTPResponseCacheEntry url=%s,status_code=%s,stored_at=%s,size=%s>" % (
+            self.url,
+            self.status_code,
+            self.stored_at,
+            len(self.content),
+        )
+
+
+class HTTPResponseCache(object):
+    """
+    Cache which stores successful HTTP responses on disk.
+
+    Entry freshness (TTL) is decided by the caller on lookup. Expired entries are kept around so
+    they can be revalidated using a conditional request. Least recently stored entries are removed
+    when the size of all the entries exceeds the limit.
+    """
+
+    def __init__(self, directory: str, max_size_bytes: int) -> None:
+        self.directory = os.path.abspath(directory)
+        self.max_size_bytes = max_size_bytes
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "writes": 0,
+            "write_errors": 0,
+            "read_errors": 0,
+            "evictions": 0,
+        }
+
+    def get(self, url: str) -> Optional[HTTPResponseCacheEntry]:
+        """
+        Return cached entry for the provided URL (if any).
+        """
+        file_path = self._get_file_path(url=url)
+
+        try:
+            with open(file_path, "rb") as fp:
+                metadata = json.loads(fp.readline().decode("utf-8"))
+                content = fp.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            LOG.warning("Failed to read cached response: %s" % (str(e)), url=url)
+            self._increment_stat("read_errors")
+            self._remove_file(file_path=file_path)
+            return None
+
+        return HTTPResponseCacheEntry(
+            url=metadata["url"],
+            status_code=metadata["status_code"],
+            headers=metadata["headers"],
+            encoding=metadata["encoding"],
+            content=content,
+            stored_at=metadata["stored_at"],
+        )
+
+    def set(self, url: str, response: requests.Response) -> Optional[HTTPResponseCacheEntry]:
+        """
+        Store the provided response in the cache and return the stored entry.
+        """
+        entry = HTTPResponseCacheEntry(
+            url=url,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            encoding=response.encoding,
+            content=response.content,
+            stored_at=time.time(),
+        )
+
+        if not self._write_entry(entry=entry):
+            return None
+
+        self.enforce_size_limit()
+        return entry
+
+    def touch(
+        self, entry: HTTPResponseCacheEntry, headers: Optional[Dict[str, str]] = None
+    ) -> HTTPResponseCacheEntry:
+        """
+        Mark the provided entry as fresh again after it has been successfully revalidated and
+        update the stored headers with the ones from the "304 Not Modified" response.
+        """
+        entry.headers.update(headers or {})
+        entry.stored_at = time.time()
+
+        self._write_entry(entry=entry)
+        return entry
+
+    def clear(self) -> None:
+        for file_path in self._get_file_paths():
+            self._remove_file(file_path=file_path)
+
+    def enforce_size_limit(self) -> None:
+        """
+        Remove least recently stored entries until the size of all the entries is below the limit.
+        """
+        entries = []
+        total_size = 0
+
+        for file_path in self._get_file_paths():
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                # Removed by another process
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, file_path))
+            total_size += stat.st_size
+
+        entries.sort()
+
+        for _, size, file_path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+
+            self._remove_file(file_path=file_path)
+            self._increment_stat("evictions")
+            total_size -= size
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _write_entry(self, entry: HTTPResponseCacheEntry) -> bool:
+        metadata = {
+            "url": entry.url,
+            "status_code": entry.status_code,
+            "headers": entry.headers,
+            "encoding": entry.encoding,
+            "stored_at": entry.stored_at,
+        }
+
+        temp_path = None
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            # NOTE: Multiple processes can write the same entry at the same time so each writer
+            # uses a unique temporary file
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(json.dumps(metadata).encode("utf-8") + b"\n")
+                fp.write(entry.content)
+
+            os.replace(temp_path, self._get_file_path(url=entry.url))
+        except Exception as e:
+            LOG.warning("Failed to write cached response: %s" % (str(e)), url=entry.url)
+            self._increment_stat("write_errors")
+
+            if temp_path:
+                self._remove_file(file_path=temp_path)
+
+            return False
+
+        self._increment_stat("writes")
+        return True
+
+    def _get_file_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+    def _get_file_paths(self) -> List[str]:
+        try:
+            file_names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        return [
+            os.path.join(self.directory, file_name)
+            for file_name in file_names
+            if file_name.endswith(CACHE_FILE_EXTENSION)
+        ]
+
+    def _remove_file(self, file_path: str) -> None:
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+
+    def _increment_stat(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
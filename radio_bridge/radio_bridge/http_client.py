@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shared HTTP client which is used by all the plugins and TTS implementations which talk to remote
+services.
+
+It re-uses connections (keep-alive) using per-host connection pools, applies default connect and
+read timeouts (capped by the remaining plugin run time), retries idempotent requests on
+connection errors and 502 / 503 / 504 responses with exponential backoff and tracks per-host
+latency and error metrics.
+
+GET responses can also be cached on disk (see radio_bridge.http_cache). Expired cached responses
+are revalidated using ETag / Last-Modified conditional requests.
+"""
+
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import os
+import time
+import threading
+import urllib.parse
+from collections import defaultdict
+
+import structlog
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from radio_bridge.configuration import get_config_option
+from radio_bridge.http_cache import HTTPResponseCache
+from radio_bridge.http_cache import DEFAULT_CACHE_MAX_SIZE_MB
+from radio_bridge.utils.cancellation import get_current_cancellation_token
+
+__all__ = ["HTTPClient", "get_http_client"]
+
+LOG = structlog.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 5
+
+DEFAULT_READ_TIMEOUT = 20
+
+# Maximum number of retries for failed idempotent requests
+DEFAULT_RETRIES = 2
+
+# Retries are performed after {backoff factor} * (2 ** ({retry number} - 1)) seconds
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# Maximum number of connections which are kept open per host
+DEFAULT_POOL_MAXSIZE = 4
+
+# Response status codes which are retried
+RETRY_STATUS_CODES = [502, 503, 504]
+
+DEFAULT_CACHE_DIRECTORY = "/tmp/radio-bridge-http-cache"
+
+# Minimum timeout we use when plugin run deadline is close
+MINIMUM_TIMEOUT = 0.1
+
+# Maps pid to the HTTP client instance. Sessions and their connection pools can't be shared with
+# forked processes
+HTTP_CLIENTS: Dict[int, "HTTPClient"] = {}
+HTTP_CLIENTS_LOCK = threading.Lock()
+
+
+class HTTPClient(object):
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        response_cache: Optional[HTTPResponseCache] = None,
+    ) -> None:
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
+
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._response_cache = response_cache
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {
+                "requests": 0,
+                "errors": 0,
+                "http_errors": 0,
+                "retries": 0,
+                "cache_hits": 0,
+                "cache_revalidations": 0,
+                "last_latency_ms": 0,
+                "max_latency_ms": 0,
+                "total_latency_ms": 0,
+            }
+        )
+
+    def get(self, url: str, cache_ttl: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """
+        Perform GET request and return the response.
+
+        If cache_ttl is provided and the response cache is enabled, successful responses are cached
+        on disk and served from the cache for cache_ttl seconds. After that, cached response is
+        revalidated with a conditional request. If the request fails or the server returns a 5xx
+        response, expired cached response is returned instead.
+        """
+        if cache_ttl is None or self._response_cache is None:
+            return self.request("GET", url, **kwargs)
+
+        return self._cached_get(url=url, cache_ttl=cache_ttl, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Perform HTTP request and return the response.
+
+        If timeout is not provided, default connect and read timeout is used. Timeout is capped by
+        the remaining run time of the plugin which is running in the current thread (if any).
+        """
+        token = get_current_cancellation_token()
+        token.raise_if_cancelled()
+
+        timeout = self._get_timeout(timeout=timeout, remaining_time=token.get_remaining_time())
+        host = urllib.parse.urlparse(url).netloc
+
+        start_time = time.monotonic()
+
+        try:
+            response = self._session.request(method, url, timeout=timeout, **kwargs)
+        except Exception:
+            self._record_request(host=host, start_time=start_time, error=True)
+            raise
+
+        retries = getattr(getattr(response.raw, "retries", None), "history", None) or []
+        self._record_request(
+            host=host,
+            start_time=start_time,
+            http_error=response.status_code >= 400,
+            retries=len(retries),
+        )
+
+        return response
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return per-host request stats.
+        """
+        result = {}
+
+        with self._lock:
+            for host, stats in self._stats.items():
+                result[host] = dict(stats)
+
+                if stats["requests"]:
+                    result[host]["avg_latency_ms"] = stats["total_latency_ms"] // stats["requests"]
+
+        return result
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Return response cache stats.
+        """
+        if not self._response_cache:
+            return {}
+
+        return self._response_cache.get_stats()
+
+    def clear_cache(self) -> None:
+        if self._response_cache:
+            self._response_cache.clear()
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _cached_get(self, url: str, cache_ttl: float, **kwargs: Any) -> requests.Response:
+        assert self._response_cache is not None
+
+        host = urllib.parse.urlparse(url).netloc
+        entry = self._response_cache.get(url=url)
+
+        if entry is not None and entry.age < cache_ttl:
+            self._record_cache_hit(host=host, revalidated=False)
+            return entry.to_response()
+
+        headers = dict(kwargs.pop("headers", None) or {})
+
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            response = self.request("GET", url, headers=headers, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if entry is None:
+                raise
+
+            LOG.warning("Request failed, using expired cached response: %s" % (str(e)), url=url)
+            self._record_cache_hit(host=host, revalidated=False)
+            return entry.to_response()
+
+        if response.status_code >= 500 and entry is not None:
+            LOG.warning(
+                "Request failed, using expired cached response: HTTP %s" % (response.status_code),
+                url=url,
+            )
+            self._record_cache_hit(host=host, revalidated=False)
+            return entry.to_response()
+
+        if response.status_code == 304 and entry is not None:
+            entry = self._response_cache.touch(entry=entry, headers=dict(response.headers))
+            self._record_cache_hit(host=host, revalidated=True)
+            return entry.to_response()
+
+        if response.status_code == 200:
+            self._response_cache.set(url=url, response=response)
+
+        return response
+
+    def _get_timeout(
+        self,
+        timeout: Optional[Union[float, Tuple[float, float]]],
+        remaining_time: Optional[float],
+    ) -> Tuple[float, float]:
+        if timeout is None:
+            connect_timeout, read_timeout = self._connect_timeout, self._read_timeout
+        elif isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+        else:
+            connect_timeout, read_timeout = timeout, timeout
+
+        if remaining_time is not None:
+            remaining_time = max(remaining_time, MINIMUM_TIMEOUT)
+            connect_timeout = min(connect_timeout, remaining_time)
+            read_timeout = min(read_timeout, remaining_time)
+
+        return (connect_timeout, read_timeout)
+
+    def _record_request(
+        self,
+        host: str,
+        start_time: float,
+        error: bool = False,
+        http_error: bool = False,
+        retries: int = 0,
+    ) -> None:
+        latency_ms = int((time.monotonic() - start_time) * 1000)
+
+        with self._lock:
+            stats = self._stats[host]
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["http_errors"] += int(http_error)
+            stats["retries"] += retries
+            stats["last_latency_ms"] = latency_ms
+            stats["max_latency_ms"] = max(stats["max_latency_ms"], latency_ms)
+            stats["total_latency_ms"] += latency_ms
+
+        LOG.trace("HTTP request finished", host=host, latency_ms=latency_ms, error=error)
+
+    def _record_cache_hit(self, host: str, revalidated: bool) -> None:
+        with self._lock:
+            stats = self._stats[host]
+            stats["cache_hits"] += 1
+            stats["cache_revalidations"] += int(revalidated)
+
+        LOG.trace("HTTP response served from cache", host=host, revalidated=revalidated)
+
+
+def get_http_client() -> HTTPClient:
+    """
+    Return process wide HTTP client instance.
+    """
+    pid = os.getpid()
+
+    with HTTP_CLIENTS_LOCK:
+        if pid not in HTTP_CLIENTS:
+            if get_config_option("http", "enable_cache", "bool", fallback=True):
+                # NOTE: Cache directory is shared with other processes
+                response_cache: Optional[HTTPResponseCache] = HTTPResponseCache(
+                    directory=get_config_option(
+                        "http", "cache_directory", fallback=DEFAULT_CACHE_DIRECTORY
+                    ),
+                    max_size_bytes=get_config_option(
+                        "http", "cache_max_size_mb", "int", fallback=DEFAULT_CACHE_MAX_SIZE_MB
+                    )
+                    * 1024
+                    * 1024,
+                )
+            else:
+                response_cache = None
+
+            HTTP_CLIENTS[pid] = HTTPClient(
+                connect_timeout=get_config_option(
+                    "http", "connect_timeout", "float", fallback=DEFAULT_CONNECT_TIMEOUT
+                ),
+                read_timeout=get_config_option(
+                    "http", "read_timeout", "float", fallback=DEFAULT_READ_TIMEOUT
+                ),
+                retries=get_config_option("http", "retries", "int", fallback=DEFAULT_RETRIES),
+                backoff_factor=get_config_option(
+                    "http", "backoff_factor", "float", fallback=DEFAULT_BACKOFF_FACTOR
+                ),
+                pool_maxsize=get_config_option(
+                    "http", "pool_maxsize", "int", fallback=DEFAULT_POOL_MAXSIZE
+                ),
+                response_cache=response_cache,
+            )
+
+        return HTTP_CLIENTS[pid]
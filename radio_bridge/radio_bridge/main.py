@@ -22,6 +22,7 @@ from typing import Optional
 import os
 import tty
 import sys
+import queue
 import threading
 import atexit
 import select
@@ -35,16 +36,30 @@ from wx_server.configuration import load_and_parse_config as wx_server_load_and_
 
 from radio_bridge.configuration import get_config_option
 from radio_bridge.configuration import set_config_option
+from radio_bridge.configuration import get_config_stats
+from radio_bridge.configuration import start_config_watcher
+from radio_bridge.configuration import stop_config_watcher
 from radio_bridge.log import configure_logging
+from radio_bridge.http_client import get_http_client
+from radio_bridge.utils.cache import get_refreshing_caches_stats
+from radio_bridge.utils.cache import stop_refreshing_caches
+from radio_bridge.tts_cache import get_tts_cache_manager
+from radio_bridge.tts_cache import start_tts_cache_sweeper
+from radio_bridge.tts_cache import stop_tts_cache_sweeper
+from radio_bridge.tts_warmup import TTSWarmUp
 from radio_bridge.otp import generate_and_write_otps
 from radio_bridge.rx import RX
 from radio_bridge.dtmf import DTMFDecoder
+from radio_bridge.dtmf import StreamingDTMFDetector
 from radio_bridge.dtmf import DTMF_TABLE_HIGH_LOW
 from radio_bridge.plugins import get_available_plugins
 from radio_bridge.plugins import get_plugins_with_dtmf_sequence
 from radio_bridge.plugins.base import BasePlugin
 from radio_bridge.plugins.base import BaseDTMFPlugin
 from radio_bridge.plugins.executor import PluginExecutor
+from radio_bridge.plugins.matcher import DTMFSequenceMatcher
+from radio_bridge.plugins.matcher import MATCH
+from radio_bridge.plugins.matcher import NO_MATCH
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGGING_CONFIG_PATH = os.path.abspath(os.path.join(BASE_DIR, "../conf/logging.conf"))
@@ -64,15 +79,28 @@ MAX_TRANSMIT_TIME = 120
 # Maximum length for DTMF sequences
 MAX_SEQUENCE_LENGTH = 7
 
-# Each loop iteration lasts around 0.4-0.5 seconds since we record 0.4 seconds long audio
-MAX_LOOP_ITERATIONS_RX_MODE = 15
+# How long dispatcher waits for a new DTMF character. Each dispatch loop iteration without a new
+# character lasts this long
+DISPATCH_QUEUE_TIMEOUT = 0.4
+
+# Number of dispatch loop iterations without a new character after which the sequence is reset
+MAX_LOOP_ITERATIONS = 15
 
 # select.select timeout when running in emulator mode and DTMF sequences are read from keyboard
 SELECT_TIMEOUT = 0.5
 
-# In regular RX mode, each recording is 0.4 seconds long, which means, we use the same number of
-# iterations in emulator mode
-MAX_LOOP_ITERATIONS_EMULATOR_MODE = (MAX_LOOP_ITERATIONS_RX_MODE * 0.4) / SELECT_TIMEOUT
+# How long capture and decoder threads wait for new audio before checking if server is still
+# running
+CAPTURE_TIMEOUT = 1.0
+
+# Maximum number of captured audio chunks waiting to be decoded. Each chunk is around 0.4 seconds
+# long
+CAPTURE_QUEUE_SIZE = 10
+
+# Maximum number of decoded DTMF characters waiting to be dispatched and how long decoder waits for
+# a free slot before dropping a character
+DTMF_CHAR_QUEUE_SIZE = 32
+DTMF_CHAR_QUEUE_PUT_TIMEOUT = 1.0
 
 VALID_DTMF_CHARACTERS = DTMF_TABLE_HIGH_LOW.keys()
 
@@ -84,16 +112,25 @@ class RadioBridgeServer(object):
         self._all_plugins: Dict[str, BasePlugin] = {}
         self._dtmf_plugins: Dict[str, BaseDTMFPlugin] = {}
         self._sequence_to_plugin_map: Dict[str, BaseDTMFPlugin] = {}
+        self._dtmf_sequence_matcher = DTMFSequenceMatcher(plugins={})
 
         self._emulator_mode = False
         self._dev_mode = False
         self._offline_mode = False
 
-        self._dtmf_decoder = DTMFDecoder()
+        self._rx_mode = get_config_option("rx", "mode", fallback="record")
+        self._dtmf_decoder = DTMFDecoder(
+            implementation=get_config_option("dtmf", "implementation", fallback="fft"),
+            squelch_threshold=get_config_option("dtmf", "squelch_threshold", "float", fallback=0.0),
+            decimate=get_config_option("dtmf", "decimate", "bool", fallback=False),
+        )
         self._rx = RX(
             input_device_index=get_config_option("audio", "input_device_index", "int"),
             rate=get_config_option("audio", "sample_rate", "int"),
         )
+        # In stream mode, audio is continuously fed to a stateful detector which takes care of
+        # debouncing and inter-digit timing so repeated digits are detected correctly
+        self._dtmf_detector = StreamingDTMFDetector(sample_rate=self._rx.rate)
         self._plugin_executor = PluginExecutor(
             implementation=get_config_option("plugins", "executor")
         )
@@ -105,6 +142,13 @@ class RadioBridgeServer(object):
         # loop
         self._cron_jobs_to_run: List[str] = []
 
+        # Queues which connect capture, decoder and dispatcher threads
+        self._capture_queue: queue.Queue = queue.Queue(maxsize=CAPTURE_QUEUE_SIZE)
+        self._dtmf_char_queue: queue.Queue = queue.Queue(maxsize=DTMF_CHAR_QUEUE_SIZE)
+        self._pipeline_stats = {"dropped_audio_chunks": 0, "dropped_dtmf_chars": 0}
+        self._threads: List[threading.Thread] = []
+        self._tts_warm_up: Optional[TTSWarmUp] = None
+
     def initialize(
         self,
         dev_mode: bool = False,
@@ -155,10 +199,34 @@ class RadioBridgeServer(object):
                 if instance.REQUIRES_INTERNET_CONNECTION is False
             }
 
+        self._dtmf_sequence_matcher = DTMFSequenceMatcher(plugins=self._dtmf_plugins)
+
+        # NOTE: Executor needs to be started after plugins have been loaded so any worker
+        # processes start with all the plugins already imported and initialized
+        self._plugin_executor.start()
+
         # 3. Generate OTPs
         all_otps, _ = generate_and_write_otps()
         LOG.info("Generated and unused OTPs for admin commands", otps=all_otps)
 
+        # 4. Start config watcher which re-loads config when it's modified on disk so we don't
+        # need to check it on every config option lookup
+        start_config_watcher()
+
+        # 5. Start TTS cache sweeper which evicts old and least recently used cached audio files
+        if get_config_option("tts", "enable_cache", "bool", fallback=False):
+            start_tts_cache_sweeper()
+
+        # 6. Pre-synthesize phrases which are known on startup in the background
+        if get_config_option("tts", "enable_cache", "bool", fallback=False) and get_config_option(
+            "tts", "warm_up", "bool", fallback=True
+        ):
+            self._tts_warm_up = TTSWarmUp(
+                plugins=self._all_plugins,
+                max_workers=get_config_option("tts", "warm_up_workers", "int", fallback=2),
+            )
+            self._tts_warm_up.start()
+
     def start(self):
         self._started = True
 
@@ -176,6 +244,9 @@ class RadioBridgeServer(object):
         # Add any configured jobs to the scheduler
         self._configure_cron_plugin_jobs()
 
+        if self._rx_mode == "stream" and not self._emulator_mode:
+            self._rx.start_stream()
+
         LOG.info("Radio Bridge Server Started")
 
         # Run main read on input loop and invoke corresponding plugin callbacks
@@ -215,19 +286,13 @@ class RadioBridgeServer(object):
             )
 
     def _main_loop(self) -> None:
-        # Read sequence and invoke any matching plugins
-        last_char = None
-        read_sequence = ""
-        iteration_counter = 0
-
-        # How many loop iterations before we reset the read_sequence array
-        if self._emulator_mode:
-            # In regular RX mode, each recording is 0.4 seconds long, which means, we use the same
-            # number of iterations in emulator mode
-            max_loop_iterations = MAX_LOOP_ITERATIONS_EMULATOR_MODE
-        else:
-            max_loop_iterations = MAX_LOOP_ITERATIONS_RX_MODE
+        """
+        Start capture and decoder threads and run the dispatch loop in the current thread.
 
+        Audio capture, DTMF decoding and plugin dispatch run in separate threads which are
+        connected using bounded queues. This way audio is captured and decoded while the decoder
+        is busy and while a plugin is running (which can take up to max_run_time seconds).
+        """
         if self._emulator_mode:
             old_settings = termios.tcgetattr(sys.stdin)
 
@@ -241,70 +306,217 @@ class RadioBridgeServer(object):
             # Enable non blocking mode for stdin tty so we can read characters without enter
             tty.setcbreak(sys.stdin.fileno())
 
+            # In emulator mode characters are read from the keyboard and there is nothing to decode
+            threads = [threading.Thread(target=self._read_keyboard_loop, name="keyboard")]
+        else:
+            threads = [
+                threading.Thread(target=self._capture_loop, name="capture"),
+                threading.Thread(target=self._decode_loop, name="decoder"),
+            ]
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        self._threads = threads
+        self._dispatch_loop()
+
+    def _capture_loop(self) -> None:
+        """
+        Capture thread which reads audio and puts it in the capture queue.
+
+        If the decoder can't keep up and the queue is full, the oldest audio chunk is dropped so
+        capture is never stalled.
+        """
+        while self._started:
+            if self._rx_mode == "stream":
+                # NOTE: Window is a view on the RX ring buffer. Ring buffer holds more audio than
+                # the capture queue so window is consumed before it's overwritten
+                samples = self._rx.read_stream_window(timeout=CAPTURE_TIMEOUT)
+
+                if samples is None:
+                    continue
+            else:
+                samples = self._rx.record_audio_to_buffer()
+
+            try:
+                self._capture_queue.put_nowait(samples)
+            except queue.Full:
+                try:
+                    self._capture_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+                self._pipeline_stats["dropped_audio_chunks"] += 1
+                self._capture_queue.put_nowait(samples)
+
+    def _decode_loop(self) -> None:
+        """
+        Decoder thread which decodes captured audio and puts detected characters in the DTMF char
+        queue.
+        """
+        last_char = None
+
+        while self._started:
+            try:
+                samples = self._capture_queue.get(timeout=CAPTURE_TIMEOUT)
+            except queue.Empty:
+                continue
+
+            if self._rx_mode == "stream":
+                # Detector already reports each key press exactly once so we don't need to
+                # compare it against the last char
+                for event in self._dtmf_detector.process(samples):
+                    self._put_dtmf_char(char=event.char)
+
+                continue
+
+            char = self._dtmf_decoder.decode_buffer(samples=samples, sample_rate=self._rx.rate)
+
+            if not char:
+                # NOTE: We intentionally don't reset last char on windows without a tone so a
+                # single dropped window in the middle of a tone doesn't result in a duplicated
+                # digit. Repeated digits are only supported in "stream" RX mode.
+                continue
+
+            if char != last_char:
+                self._put_dtmf_char(char=char)
+
+            last_char = char
+
+    def _read_keyboard_loop(self) -> None:
+        """
+        Thread which reads DTMF characters from the keyboard in emulator mode and puts them in the
+        DTMF char queue.
+        """
+        while self._started:
+            if sys.stdin not in select.select([sys.stdin], [], [], SELECT_TIMEOUT)[0]:
+                continue
+
+            char = sys.stdin.read(1).upper()
+            if char not in VALID_DTMF_CHARACTERS:
+                LOG.error(
+                    "Invalid DTMF character: %s. Valid characters are: %s"
+                    % (char, ", ".join(VALID_DTMF_CHARACTERS))
+                )
+                continue
+
+            LOG.info("Read DTMF character %s from the keyboard" % (char))
+            self._put_dtmf_char(char=char)
+
+    def _put_dtmf_char(self, char: str) -> None:
+        """
+        Put character in the DTMF char queue. If dispatcher doesn't consume it in time (e.g.
+        because long running plugin is running), character is dropped.
+        """
+        try:
+            self._dtmf_char_queue.put(char, timeout=DTMF_CHAR_QUEUE_PUT_TIMEOUT)
+        except queue.Full:
+            LOG.info("DTMF char queue is full, dropping char %s" % (char))
+            self._pipeline_stats["dropped_dtmf_chars"] += 1
+
+    def _dispatch_loop(self) -> None:
+        """
+        Dispatcher loop which builds the sequence from the decoded characters and invokes any
+        matching plugins.
+        """
+        read_sequence = ""
+        iteration_counter = 0
+
         while self._started:
             self._run_scheduled_jobs()
 
-            if iteration_counter >= max_loop_iterations:
+            if iteration_counter >= MAX_LOOP_ITERATIONS:
                 # Max iterations reached, reset read_sequence and start from scratch
                 LOG.info("Max iterations reached, reseting read_sequence and iteration counter")
+                LOG.debug("DTMF decoder stats", **self._dtmf_decoder.get_stats())
+                LOG.debug("Pipeline stats", **self._pipeline_stats)
+                LOG.debug("Config stats", **get_config_stats())
+                LOG.debug("TTS cache stats", **get_tts_cache_manager().get_stats())
+                LOG.debug("HTTP client stats", hosts=get_http_client().get_stats())
+                LOG.debug("HTTP response cache stats", **get_http_client().get_cache_stats())
+                LOG.debug("Data cache stats", caches=get_refreshing_caches_stats())
+
+                if self._tts_warm_up:
+                    LOG.debug("TTS warm up stats", **self._tts_warm_up.get_stats())
+
+                if self._rx_mode == "stream" and not self._emulator_mode:
+                    LOG.debug("RX stream stats", **self._rx.get_stream_stats())
 
                 read_sequence = ""
                 iteration_counter = 0
 
-            if self._emulator_mode:
-                if sys.stdin in select.select([sys.stdin], [], [], SELECT_TIMEOUT)[0]:
-                    char = sys.stdin.read(1).upper()
-                    if char not in VALID_DTMF_CHARACTERS:
-                        LOG.error(
-                            "Invalid DTMF character: %s. Valid characters are: %s"
-                            % (char, ", ".join(VALID_DTMF_CHARACTERS))
-                        )
-                        continue
-                    LOG.info("Read DTMF character %s from the keyboard" % (char))
-                else:
-                    char = ""
-            else:
-                self._rx.record_audio()
-                char = self._dtmf_decoder.decode()
+            try:
+                char = self._dtmf_char_queue.get(timeout=DISPATCH_QUEUE_TIMEOUT)
+            except queue.Empty:
+                iteration_counter += 1
+                continue
 
-            if char != last_char:
-                if not char:
-                    iteration_counter += 1
-                    continue
+            iteration_counter = 0
+            read_sequence = self._handle_dtmf_char(read_sequence=read_sequence, char=char)
 
-                iteration_counter = 0
-                read_sequence += char
+    def _handle_dtmf_char(self, read_sequence: str, char: str) -> str:
+        """
+        Append char to the sequence and invoke plugin for the sequence if there is a match.
 
-                LOG.info("Got char %s, current sequence: %s" % (char, read_sequence))
+        Returns new sequence value.
+        """
+        read_sequence += char
+
+        LOG.info("Got char %s, current sequence: %s" % (char, read_sequence))
 
-                # If sequence is valid, invoke plugin run() method via the executor
-                plugin, args, kwargs = self._get_plugin_for_dtmf_sequence(sequence=read_sequence)
+        status, candidate_plugins = self._dtmf_sequence_matcher.match(sequence=read_sequence)
 
-                if plugin or len(read_sequence) > MAX_SEQUENCE_LENGTH:
-                    if plugin:
-                        LOG.info(
-                            'Found valid sequence "%s", invoking plugin "%s"'
-                            % (read_sequence, plugin.NAME)
-                        )
-                        self._plugin_executor.run(plugin=plugin, *args, **kwargs)
-                    else:
-                        LOG.info("Max sequence length limit reached, resetting sequence")
+        if status == MATCH:
+            # If sequence is valid, invoke plugin run() method via the executor
+            plugin, args, kwargs = self._get_plugin_for_dtmf_sequence(
+                sequence=read_sequence, plugins=candidate_plugins
+            )
 
-                    read_sequence = ""
+            if plugin:
+                LOG.info(
+                    'Found valid sequence "%s", invoking plugin "%s"' % (read_sequence, plugin.NAME)
+                )
+                self._plugin_executor.run(plugin=plugin, *args, **kwargs)
+                return ""
+
+            # Plugin rejected the sequence (e.g. invalid OTP)
+            if not self._dtmf_sequence_matcher.is_prefix(sequence=read_sequence):
+                status = NO_MATCH
+
+        if status == NO_MATCH:
+            # Sequence can't match any plugin so there is no need to wait for more characters.
+            # Last character could be a start of a new valid sequence so we keep it in that case.
+            if self._dtmf_sequence_matcher.is_prefix(sequence=char):
+                read_sequence = char
             else:
-                iteration_counter += 1
-                continue
+                read_sequence = ""
 
-            last_char = char
+            LOG.info(
+                'Sequence doesn\'t match any plugin, resetting sequence to "%s"' % (read_sequence)
+            )
+            return read_sequence
+
+        if len(read_sequence) > MAX_SEQUENCE_LENGTH:
+            LOG.info("Max sequence length limit reached, resetting sequence")
+            return ""
+
+        return read_sequence
 
     def _get_plugin_for_dtmf_sequence(
-        self, sequence: str
+        self, sequence: str, plugins: Optional[List[BaseDTMFPlugin]] = None
     ) -> Tuple[Optional[BasePlugin], Optional[Tuple], Optional[Dict[str, Any]]]:
         """
         Retrieve reference to the Plugin class instance and any args and kwargs which should be
         passed to the plugin run() method.
+
+        :param plugins: Candidate plugins returned by the sequence matcher. If not provided, all
+                        the DTMF plugins are checked.
         """
-        for plugin_instance in self._dtmf_plugins.values():
+        if plugins is None:
+            plugins = list(self._dtmf_plugins.values())
+
+        for plugin_instance in plugins:
             matches, args, kwargs = plugin_instance.matches_dtmf_sequence(sequence=sequence)
 
             if matches:
@@ -346,6 +558,20 @@ class RadioBridgeServer(object):
     def stop(self):
         self._started = False
 
+        stop_config_watcher()
+        stop_tts_cache_sweeper()
+
+        if self._tts_warm_up:
+            self._tts_warm_up.stop()
+
+        self._plugin_executor.shutdown()
+
+        stop_refreshing_caches()
+
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=CAPTURE_TIMEOUT * 2)
+
 
 if __name__ == "__main__":
     server = RadioBridgeServer()
@@ -24,18 +24,21 @@ They are not meant as a 100% safe, robust and secure solution. As such, we store
 text format in a file on disk.
 """
 
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Set
 from typing import Tuple
 
 import os
+import threading
 
 import structlog
 
 from radio_bridge.configuration import get_config_option
 from radio_bridge.utils.random import generate_random_number
 
-__all__ = ["generate_and_write_otps", "validate_otp", "get_valid_otps"]
+__all__ = ["generate_and_write_otps", "validate_otp", "get_valid_otps", "OTPStore"]
 
 LOG = structlog.getLogger(__name__)
 
@@ -46,34 +49,138 @@ NUMBER_OF_UNUSED_OTPS = 100
 # How long should each OTP be
 OTP_LENGTH = 4
 
+# Maps OTPs file path to the store instance for that file
+OTP_STORES: Dict[str, "OTPStore"] = {}
+OTP_STORES_LOCK = threading.Lock()
 
-def get_valid_otps() -> List[str]:
+
+class OTPStore(object):
     """
-    Return a list of all the OTPs which are still valid (unused) from a local db file on disk.
+    Store which holds valid OTPs in memory.
+
+    OTPs are loaded from the file on disk once. Revoked OTPs are appended to a journal file
+    (<file path>.journal) which is fsynced before revocation is confirmed, which means validation
+    is a cheap in-memory check and a revoked OTP can't be re-used after a crash or restart.
+
+    Journal is merged into the OTPs file and removed when OTPs are written to disk (which happens
+    on server startup when new OTPs are generated).
     """
-    otps_file_path = get_config_option("plugins", "admin_otps_file_path")
 
-    valid_otps = []
+    def __init__(self, file_path: Optional[str]):
+        """
+        :param file_path: Path to the OTPs file. If it's not set, there are no valid OTPs.
+        """
+        self._file_path = file_path or ""
+        self._journal_path = self._file_path + ".journal" if self._file_path else ""
+
+        self._lock = threading.Lock()
+        self._otps: Optional[Set[str]] = None
+
+    @property
+    def journal_path(self) -> str:
+        return self._journal_path
+
+    def get_valid_otps(self) -> List[str]:
+        with self._lock:
+            return sorted(self._get_otps())
+
+    def revoke(self, otp: str) -> bool:
+        """
+        Revoke the provided OTP and return True if it was valid.
+        """
+        with self._lock:
+            otps = self._get_otps()
+
+            if otp not in otps:
+                return False
+
+            with open(self._journal_path, "a") as fp:
+                fp.write(otp + "\n")
+                fp.flush()
+                os.fsync(fp.fileno())
+
+            otps.remove(otp)
+            return True
+
+    def write(self, otps: List[str]) -> None:
+        """
+        Atomically replace OTPs file content with the provided OTPs and remove the journal.
+        """
+        if not self._file_path:
+            raise ValueError("admin_otps_file_path config option is not set")
+
+        with self._lock:
+            temp_path = self._file_path + ".tmp"
+
+            with open(temp_path, "w") as fp:
+                fp.write("\n".join(sorted(list(set(otps)))))
+                fp.flush()
+                os.fsync(fp.fileno())
+
+            os.replace(temp_path, self._file_path)
+
+            if os.path.isfile(self._journal_path):
+                os.unlink(self._journal_path)
+
+            self._otps = set(otps)
+
+    def _get_otps(self) -> Set[str]:
+        if self._otps is None:
+            self._otps = self._load()
 
-    if otps_file_path and os.path.isfile(otps_file_path):
-        with open(otps_file_path, "r") as fp:
+        return self._otps
+
+    def _load(self) -> Set[str]:
+        if not self._file_path:
+            return set([])
+
+        otps = set(self._read_lines(self._file_path))
+        revoked_otps = set(self._read_lines(self._journal_path))
+
+        if revoked_otps:
+            LOG.debug("Found %s revoked OTPs in the journal" % (len(revoked_otps)))
+
+        return otps - revoked_otps
+
+    def _read_lines(self, file_path: str) -> List[str]:
+        if not os.path.isfile(file_path):
+            return []
+
+        with open(file_path, "r") as fp:
             content = fp.read().strip()
 
-        if content:
-            valid_otps = content.splitlines()
+        if not content:
+            return []
 
-    return sorted(valid_otps)
+        return content.splitlines()
 
 
-def write_otps_to_disk(otps: List[str]) -> bool:
+def get_otp_store() -> OTPStore:
     """
-    Write provided OTPs to a local db file on disk, overwriting any existing content.
+    Return OTP store for the currently configured OTPs file.
     """
     otps_file_path = get_config_option("plugins", "admin_otps_file_path")
 
-    with open(otps_file_path, "w") as fp:
-        fp.write("\n".join(sorted(list(set(otps)))))
+    with OTP_STORES_LOCK:
+        if otps_file_path not in OTP_STORES:
+            OTP_STORES[otps_file_path] = OTPStore(file_path=otps_file_path)
+
+        return OTP_STORES[otps_file_path]
+
 
+def get_valid_otps() -> List[str]:
+    """
+    Return a list of all the OTPs which are still valid (unused).
+    """
+    return get_otp_store().get_valid_otps()
+
+
+def write_otps_to_disk(otps: List[str]) -> bool:
+    """
+    Write provided OTPs to a local db file on disk, overwriting any existing content and
+    revocation journal.
+    """
+    get_otp_store().write(otps=otps)
     return True
 
 
@@ -106,7 +213,8 @@ def generate_and_write_otps() -> Tuple[List[str], List[str]]:
 
     new_otps_list = sorted(new_otps_set)
 
-    # Update the file / write all the active OTPs to disk
+    # Update the file / write all the active OTPs to disk. This also compacts the revocation
+    # journal
     all_otps_set = set()
     all_otps_set.update(existing_otps)
     all_otps_set.update(new_otps_list)
@@ -121,18 +229,13 @@ def validate_otp(otp: str) -> bool:
     """
     Check if the provided OTP is valid.
 
-    If it is, True will be returned and this OTP will be marked as used (removed from a file) and
-    as such, become invalid for future requests.
+    If it is, True will be returned and this OTP will be marked as used (written to the revocation
+    journal) and as such, become invalid for future requests.
     """
-    valid_otps = get_valid_otps()
-    assert isinstance(valid_otps, list)
-
     otp_masked = otp[:2] + "*" * len(otp[2:])
 
-    if otp in valid_otps:
+    if get_otp_store().revoke(otp):
         LOG.info("OTP %s has been successfully validated and revoked" % (otp_masked))
-        valid_otps.remove(otp)
-        write_otps_to_disk(valid_otps)
         return True
 
     LOG.info("OTP %s is not valid" % (otp_masked))
@@ -22,15 +22,26 @@ from typing import Any
 import os
 import sys
 import fnmatch
+import threading
+import functools
+import contextlib
 import multiprocessing
+import concurrent.futures
 
 import structlog
 import pluginlib
 
 from radio_bridge.configuration import get_config_option
 from radio_bridge.tts import TextToSpeech
+from radio_bridge.tts import get_text_to_speech
+from radio_bridge.tts import split_text_into_segments
+from radio_bridge.tts_cache import get_tts_cache_manager
 from radio_bridge.audio_player import AudioPlayer
+from radio_bridge.audio_player import PreparedAudio
 from radio_bridge.otp import validate_otp
+from radio_bridge.utils.cancellation import CancellationToken
+from radio_bridge.utils.cancellation import get_current_cancellation_token
+from radio_bridge.utils.cancellation import set_current_cancellation_token
 
 __all__ = [
     "BaseDTMFPlugin",
@@ -57,6 +68,21 @@ LOG = structlog.getLogger(__name__)
 
 INITIALIZED = False
 
+# Lock which serializes access to the transmitter so plugins which run concurrently (e.g. when
+# using thread executor) never transmit at the same time
+TX_LOCK = threading.RLock()
+
+# How often plugin waiting for the TX lock checks if it has been cancelled
+TX_LOCK_POLL_INTERVAL = 0.5
+
+# Maximum number of audio segments which are synthesized in parallel before transmitting
+PREPARE_MAX_WORKERS = 4
+
+# Maps pid to the thread pool which is used to synthesize audio segments in parallel. Thread pools
+# can't be shared with forked processes
+PREPARE_EXECUTORS: Dict[int, concurrent.futures.ThreadPoolExecutor] = {}
+PREPARE_EXECUTORS_LOCK = threading.Lock()
+
 
 class BasePlugin(object):
     # Plugin ID
@@ -78,6 +104,11 @@ class BasePlugin(object):
     # A list of supported languages by this plugin
     SUPPORTED_LANGUAGES: List[str]
 
+    # True if text said by this plugin is a template which only differs in numbers. If
+    # concatenative TTS is enabled in the config, text fragments and numbers are synthesized and
+    # cached separately and concatenated at playback time.
+    CONCATENATIVE_TTS: bool = False
+
     def __init__(self):
         self._callsign = get_config_option("tx", "callsign")
         self._tx_mode = get_config_option("tx", "mode")
@@ -87,10 +118,11 @@ class BasePlugin(object):
         self._config = {}
 
     @property
-    def _tts(self):
-        # NOTE: We instantiate this object lazily on demand so any changes to the config state made
-        # during the program life cycle are reflected here.
-        return TextToSpeech(implementation=get_config_option("tts", "implementation"))
+    def _tts(self) -> TextToSpeech:
+        # NOTE: We retrieve this object lazily on demand so any changes to the config state made
+        # during the program life cycle are reflected here. Instances are cached per config
+        # version.
+        return get_text_to_speech(implementation=get_config_option("tts", "implementation"))
 
     def initialize(self, config: dict) -> None:
         """
@@ -104,6 +136,13 @@ class BasePlugin(object):
                 "Language %s is not supported for plugin %s" % (self._language, self.ID)
             )
 
+    def get_warm_up_phrases(self) -> List[Tuple[str, str]]:
+        """
+        Return a list of (text, language) tuples for phrases which are known in advance and can be
+        synthesized on startup so the first plugin run doesn't need to wait for the TTS.
+        """
+        return []
+
     def enable_tx(self):
         """
         Enable transmit functionality of the radio.
@@ -139,25 +178,116 @@ class BasePlugin(object):
         """
         return self.say_text(text=text, language=language)
 
+    @property
+    def cancellation_token(self) -> CancellationToken:
+        """
+        Return cancellation token for the current plugin run.
+
+        Long running plugins should use it to check if they have been cancelled (e.g. because
+        max run time has been reached) and as a timeout for any blocking calls.
+        """
+        return get_current_cancellation_token()
+
+    @contextlib.contextmanager
+    def transmit(self):
+        """
+        Context manager which acquires the TX lock, enables TX and disables it on exit.
+
+        If plugin run has been cancelled, TX is not enabled and OperationCancelledException is
+        thrown.
+        """
+        token = self.cancellation_token
+
+        while not TX_LOCK.acquire(timeout=TX_LOCK_POLL_INTERVAL):
+            token.raise_if_cancelled()
+
+        try:
+            token.raise_if_cancelled()
+            self.enable_tx()
+
+            try:
+                yield
+            finally:
+                self.disable_tx()
+        finally:
+            TX_LOCK.release()
+
     def say_text(self, text: str, language: str = "en_US"):
         """
         Run tts on the provided text and play it via the audio player.
+
+        All the audio is prepared before TX is enabled so we don't transmit dead air while waiting
+        for the TTS.
         """
-        self.enable_tx()
+        prepared_audio = self._prepare_text_audio(text=text, language=language)
+
+        with self.transmit():
+            LOG.debug('Playing text "%s"' % (text))
+            self._audio_player.play_prepared(prepared_audio=prepared_audio)
+
+    def _prepare_text_audio(self, text: str, language: str = "en_US") -> PreparedAudio:
+        """
+        Synthesize callsign and the provided text in parallel and prepare them for playback as a
+        single clip.
+        """
+        LOG.debug('Preparing audio for text "%s"' % (text))
+
+        file_paths = self._synthesize_text_audio(text=text, language=language)
 
         try:
-            # 1. Play callsign / hello message
-            self._say_callsign()
+            return self._audio_player.prepare_files(file_paths=file_paths)
+        except FileNotFoundError as e:
+            # NOTE: Cached TTS file could have been removed by the cache sweeper running in another
+            # process after the cache index in this process has been built. In that case we drop
+            # the stale entry and synthesize the text again.
+            LOG.debug("Cached audio file has been removed, synthesizing it again: %s" % (str(e)))
+            get_tts_cache_manager().remove(file_path=e.filename)
+
+        file_paths = self._synthesize_text_audio(text=text, language=language)
+        return self._audio_player.prepare_files(file_paths=file_paths)
+
+    def _synthesize_text_audio(self, text: str, language: str = "en_US") -> List[str]:
+        """
+        Synthesize callsign and the provided text in parallel and return paths to the audio files.
+        """
+        executor = _get_prepare_executor()
+        tts = self._tts
+
+        # NOTE: Cancellation token is thread local so we need to propagate it to the executor
+        # threads. This way remote TTS requests are also capped by the remaining plugin run time
+        # and cancelled together with the plugin run.
+        submit = functools.partial(
+            _submit_with_cancellation_token, executor, self.cancellation_token
+        )
+
+        # 1. Callsign / hello message
+        callsign_future = submit(self._get_callsign_file_path)
+
+        # 2. Actual requested text
+        if self._use_concatenative_tts():
+            segments = split_text_into_segments(text=text, language=language)
+        else:
+            segments = [text]
 
-            # 2. Play actual requested text
-            LOG.debug('Playing text "%s"' % (text))
+        text_futures = [
+            submit(tts.text_to_speech, text=segment, language=language) for segment in segments
+        ]
+
+        file_paths = [callsign_future.result()]
 
-            file_path = self._tts.text_to_speech(text=text, language=language)
+        for text_future in text_futures:
+            file_path = text_future.result()
 
             if file_path:
-                self._audio_player.play_file(file_path=file_path, delete_after_play=False)
-        finally:
-            self.disable_tx()
+                file_paths.append(file_path)
+
+        self.cancellation_token.raise_if_cancelled()
+        return file_paths
+
+    def _use_concatenative_tts(self) -> bool:
+        return self.CONCATENATIVE_TTS and get_config_option(
+            "tts", "concatenative", "bool", fallback=False
+        )
 
     def say_text_morse(self, text: str):
         """
@@ -167,15 +297,11 @@ class BasePlugin(object):
 
         m = Morse(words=text)
 
-        self.enable_tx()
-
-        try:
+        with self.transmit():
             # TODO: Play callsign in morse
             LOG.trace('Playing text "%s" as morse code (%s)' % (text, m.morse))
 
             m.transmit()
-        finally:
-            self.disable_tx()
 
     def say_morse(self, text: str):
         """
@@ -185,24 +311,58 @@ class BasePlugin(object):
 
         m = Morse(morse=text)
 
-        self.enable_tx()
-
-        try:
+        with self.transmit():
             # TODO: Play callsign in morse
             LOG.trace('Playing morse code "%s"' % (m.morse))
 
             m.transmit()
-        finally:
-            self.disable_tx()
 
     def _say_callsign(self) -> None:
+        file_path = self._get_callsign_file_path()
+        self._audio_player.play_file(file_path=file_path, delete_after_play=False)
+
+    def _get_callsign_file_path(self) -> str:
         if self._callsign.endswith(".mp3") or self._callsign.endswith(".wav"):
             # Assume it's a path to a file
-            self._audio_player.play_file(file_path=self._callsign)
-        else:
-            # Synthesize it
-            file_path = self._tts.text_to_speech(text=self._callsign)
-            self._audio_player.play_file(file_path=file_path, delete_after_play=False)
+            return self._callsign
+
+        # Synthesize it
+        return self._tts.text_to_speech(text=self._callsign)
+
+
+def _get_prepare_executor() -> concurrent.futures.ThreadPoolExecutor:
+    pid = os.getpid()
+
+    with PREPARE_EXECUTORS_LOCK:
+        if pid not in PREPARE_EXECUTORS:
+            PREPARE_EXECUTORS[pid] = concurrent.futures.ThreadPoolExecutor(
+                max_workers=PREPARE_MAX_WORKERS, thread_name_prefix="prepare"
+            )
+
+        return PREPARE_EXECUTORS[pid]
+
+
+def _submit_with_cancellation_token(
+    executor: concurrent.futures.Executor,
+    token: CancellationToken,
+    func: Callable[..., Any],
+    *args: Any,
+    **kwargs: Any,
+) -> concurrent.futures.Future:
+    """
+    Submit function to the executor and run it with the provided cancellation token set as the
+    current token in the executor thread.
+    """
+
+    def run_with_token() -> Any:
+        set_current_cancellation_token(token)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            set_current_cancellation_token(None)
+
+    return executor.submit(run_with_token)
 
 
 @pluginlib.Parent("DTMFPlugin")
@@ -236,6 +396,16 @@ class BaseDTMFPlugin(BasePlugin):
         """
         return (sequence == self.DTMF_SEQUENCE, (), {})
 
+    def get_dtmf_sequence_pattern(self) -> str:
+        """
+        Return pattern for all the DTMF sequences which could match this plugin. "?" matches any
+        single character.
+
+        Pattern is used to build a sequence matcher which narrows down candidate plugins, final
+        decision is made by matches_dtmf_sequence().
+        """
+        return self.DTMF_SEQUENCE
+
 
 @pluginlib.Parent("DTMFWithDataPlugin")
 class BaseDTMFWithDataPlugin(BasePlugin):
@@ -283,6 +453,9 @@ class BaseDTMFWithDataPlugin(BasePlugin):
 
         return (False, (), {})
 
+    def get_dtmf_sequence_pattern(self) -> str:
+        return self.DTMF_SEQUENCE
+
 
 @pluginlib.Parent("AdminDTMFPlugin")
 class BaseAdminDTMFPlugin(BaseDTMFPlugin):
@@ -317,6 +490,9 @@ class BaseAdminDTMFPlugin(BaseDTMFPlugin):
 
         return (False, (), {})
 
+    def get_dtmf_sequence_pattern(self) -> str:
+        return self.DTMF_SEQUENCE + "????"
+
 
 @pluginlib.Parent("AdminDTMFWithDataPlugin")
 class BaseAdminDTMFWithDataPlugin(BaseDTMFWithDataPlugin):
@@ -374,6 +550,10 @@ class BaseAdminDTMFWithDataPlugin(BaseDTMFWithDataPlugin):
 
         return (False, (), {})
 
+    def get_dtmf_sequence_pattern(self) -> str:
+        split = self.DTMF_SEQUENCE.split("?")
+        return split[0] + "????" + "?" * (len(split) - 1)
+
 
 @pluginlib.Parent("NonDTMFPlugin")
 class BaseNonDTMFPlugin(BasePlugin):
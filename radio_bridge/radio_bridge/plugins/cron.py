@@ -150,7 +150,29 @@ class CronSayPlugin(BaseNonDTMFPlugin):
         elif job_config.type == "morse":
             self.say_morse(text=value)
         elif job_config.type == "file":
-            self._audio_player.play_file(file_path=job_config.value, delete_after_play=False)
+            with self.transmit():
+                self._audio_player.play_file(file_path=job_config.value, delete_after_play=False)
+
+    def get_warm_up_phrases(self) -> List[Tuple[str, str]]:
+        """
+        Return text for all the text jobs which can be rendered in advance (don't reference any
+        dynamic values such as time or weather data).
+        """
+        context = {"callsign": get_config_option("tx", "callsign", "str", fallback="unknown")}
+
+        result = []
+        for job_config in self._job_id_to_config_map.values():
+            if job_config.type != "text":
+                continue
+
+            try:
+                text = job_config.value.format(**context)
+            except (KeyError, IndexError, ValueError):
+                continue
+
+            result.append((text, "en_US"))
+
+        return result
 
     def _parse_and_validate_config(self, config) -> Dict[str, CronSayItemConfig]:
         result = {}
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import List
+from typing import Tuple
+
 import datetime
 
 import pytz
@@ -20,6 +23,7 @@ import pytz
 from radio_bridge.plugins.base import BaseDTMFPlugin
 from radio_bridge.plugins.errors import InvalidPluginConfigurationValue
 from radio_bridge.configuration import get_plugin_config_option
+from radio_bridge.tts import split_text_into_segments
 
 __all__ = ["CurrentTimePlugin"]
 
@@ -44,6 +48,7 @@ class CurrentTimePlugin(BaseDTMFPlugin):
     REQUIRES_INTERNET_CONNECTION = False
     DEFAULT_LANGUAGE = "en_US"
     SUPPORTED_LANGUAGES = ["en_US", "sl_SI"]
+    CONCATENATIVE_TTS = True
     DTMF_SEQUENCE = get_plugin_config_option(ID, "dtmf_sequence", fallback="21")
 
     _skipload_ = get_plugin_config_option(ID, "enable", "bool", fallback=True) is False
@@ -84,3 +89,15 @@ class CurrentTimePlugin(BaseDTMFPlugin):
             minute_utc=now_utc.minute,
         )
         self.say(text=text, language=self._language)
+
+    def get_warm_up_phrases(self) -> List[Tuple[str, str]]:
+        if not self._use_concatenative_tts():
+            return []
+
+        # Fixed text fragments and all the possible hour and minute values
+        text = TEXT[self._language].format(hour_local=0, minute_local=0, hour_utc=0, minute_utc=0)
+        segments = split_text_into_segments(text=text, language=self._language)
+        segments = [segment for segment in segments if not segment.isdigit()]
+        segments += [str(value) for value in range(0, 60)]
+
+        return [(segment, self._language) for segment in segments]
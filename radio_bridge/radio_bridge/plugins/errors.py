@@ -15,7 +15,11 @@
 
 from typing import Any
 
-__all__ = ["InvalidPluginConfigurationValue", "PluginExecutionTimeoutException"]
+__all__ = [
+    "InvalidPluginConfigurationValue",
+    "PluginExecutionException",
+    "PluginExecutionTimeoutException",
+]
 
 
 class InvalidPluginConfigurationValue(ValueError):
@@ -35,3 +39,11 @@ class InvalidPluginConfigurationValue(ValueError):
 
 class PluginExecutionTimeoutException(Exception):
     pass
+
+
+class PluginExecutionException(Exception):
+    """
+    Exception which is thrown when plugin execution in a worker process fails.
+    """
+
+    pass
@@ -15,23 +15,36 @@
 
 from typing import Any
 from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
 from typing import Union
 
 import abc
 import time
 import sys
+import queue
+import threading
 import traceback
 import functools
+import itertools
 import multiprocessing
+import concurrent.futures
 from collections import defaultdict
 
 import structlog
 
 from radio_bridge.configuration import get_config_option
 from radio_bridge.configuration import get_plugin_config_option
+from radio_bridge.plugins.base import BasePlugin
 from radio_bridge.plugins.base import BaseDTMFPlugin
 from radio_bridge.plugins.base import BaseDTMFWithDataPlugin
+from radio_bridge.plugins.errors import PluginExecutionException
 from radio_bridge.plugins.errors import PluginExecutionTimeoutException
+from radio_bridge.utils.cancellation import CancellationToken
+from radio_bridge.utils.cancellation import OperationCancelledException
+from radio_bridge.utils.cancellation import set_current_cancellation_token
 
 __all__ = ["PluginExecutor"]
 
@@ -39,6 +52,19 @@ LOG = structlog.getLogger(__name__)
 
 T_Plugin = Union[BaseDTMFPlugin, BaseDTMFWithDataPlugin]
 
+# How often (in seconds) pool executor checks if the worker process running the plugin is still
+# alive while waiting for the result
+WORKER_POLL_INTERVAL = 0.5
+
+# How long to wait for the worker process to exit on shutdown before killing it
+WORKER_SHUTDOWN_TIMEOUT = 2
+
+# Start methods used for pool executor worker processes in order of preference. Workers are also
+# (re)spawned while other server threads are running and forking a multi threaded process can
+# deadlock the child (e.g. on a logging lock held by another thread at fork time) so "fork" is
+# intentionally not used
+WORKER_START_METHODS = ["forkserver", "spawn"]
+
 
 class BasePluginExecutor(object):
     """
@@ -48,6 +74,18 @@ class BasePluginExecutor(object):
     def __init__(self):
         self._max_run_time = get_config_option("plugins", "max_run_time", "int", fallback=None)
 
+    def start(self) -> None:
+        """
+        Start any resources used by this executor (e.g. worker processes).
+        """
+        pass
+
+    def shutdown(self) -> None:
+        """
+        Stop any resources used by this executor.
+        """
+        pass
+
     @abc.abstractmethod
     def run(self, plugin: T_Plugin, *args: Any, **kwargs: Any) -> None:
         """
@@ -110,8 +148,359 @@ class ProccessPluginExecutor(BasePluginExecutor):
         return result
 
 
+def _pool_worker_main(
+    task_queue: multiprocessing.Queue,
+    result_queue: multiprocessing.Queue,
+    plugins: Dict[str, T_Plugin],
+) -> None:
+    """
+    Main loop for the pool executor worker process.
+
+    Worker waits for tasks and runs the plugins until it receives None which signals it to exit.
+    """
+    while True:
+        task = task_queue.get()
+
+        if task is None:
+            break
+
+        task_id, plugin_id, plugin, args, kwargs = task
+
+        if plugin is None:
+            plugin = plugins[plugin_id]
+
+        try:
+            result = plugin.run(*args, **kwargs)
+        except Exception as e:
+            _, _, exc_traceback = sys.exc_info()
+            error = str(e) + "\n" + str("\n".join(traceback.format_tb(exc_traceback)))
+            result_queue.put((task_id, False, error))
+        else:
+            result_queue.put((task_id, True, result))
+
+
+def get_worker_context() -> Any:
+    """
+    Return multiprocessing context which is used to start pool executor worker processes.
+    """
+    available_methods = multiprocessing.get_all_start_methods()
+
+    for method in WORKER_START_METHODS:
+        if method in available_methods:
+            return multiprocessing.get_context(method)
+
+    raise ValueError(
+        "None of the supported worker start methods (%s) are available"
+        % (", ".join(WORKER_START_METHODS))
+    )
+
+
+class PoolPluginWorker(object):
+    """
+    Worker process which is used by the pool executor.
+    """
+
+    def __init__(self, plugins: Dict[str, BasePlugin], context: Any) -> None:
+        self.plugins = plugins
+        self.task_queue: multiprocessing.Queue = context.Queue()
+        self.result_queue: multiprocessing.Queue = context.Queue()
+
+        self.process = context.Process(
+            target=_pool_worker_main, args=(self.task_queue, self.result_queue, plugins)
+        )
+        self.process.daemon = True
+        self.process.start()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        """
+        Ask worker process to exit and kill it if it doesn't exit in time.
+        """
+        if self.is_alive():
+            self.task_queue.put(None)
+            self.process.join(WORKER_SHUTDOWN_TIMEOUT)
+
+        self.kill()
+
+    def kill(self) -> None:
+        if self.is_alive():
+            self.process.terminate()
+            self.process.join(WORKER_SHUTDOWN_TIMEOUT)
+
+        self.task_queue.close()
+        self.result_queue.close()
+
+
+class PoolPluginExecutor(BasePluginExecutor):
+    """
+    Plugin executor which runs plugins in a pool of pre-started worker processes.
+
+    Workers are started once all the plugins have been loaded and initialized so running a plugin
+    doesn't pay process start up and module import cost. Same as with process executor, worker
+    is killed (and replaced with a new one) and TX disabled if plugin run time is longer than the
+    max run time defined in the config.
+
+    Workers are started using "forkserver" (or "spawn" where it's not available) start method
+    since replacement workers are started while other server threads are running. Plugin
+    modules are pre-loaded in the fork server and plugin instances are pickled and passed to
+    each worker on start up.
+    """
+
+    def __init__(self):
+        super(PoolPluginExecutor, self).__init__()
+
+        self._pool_size = get_config_option("plugins", "pool_size", "int", fallback=2)
+        self._lock = threading.Lock()
+        self._idle_workers: List[PoolPluginWorker] = []
+        self._task_ids = itertools.count()
+        self._plugins: Dict[str, BasePlugin] = {}
+        self._started = False
+        self._context = get_worker_context()
+
+        self._stats = {"tasks": 0, "respawns": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+
+            # NOTE: Workers get a reference to all the registered plugins on start up so we don't
+            # need to serialize plugin instance for every run
+            from radio_bridge.plugins import REGISTERED_PLUGINS
+
+            self._plugins = {plugin.ID: plugin for plugin in REGISTERED_PLUGINS.values()}
+
+            if self._context.get_start_method() == "forkserver":
+                # NOTE: This only has an effect if fork server hasn't been started yet
+                modules = ["radio_bridge.plugins.executor"]
+                modules += sorted(
+                    {plugin.__class__.__module__ for plugin in self._plugins.values()}
+                )
+                self._context.set_forkserver_preload(modules)
+
+            self._idle_workers = [self._spawn_worker() for _ in range(0, self._pool_size)]
+            self._started = True
+
+        LOG.debug("Started %s plugin worker processes" % (self._pool_size))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = self._idle_workers
+            self._idle_workers = []
+            self._started = False
+
+        for worker in workers:
+            worker.stop()
+
+    def get_stats(self) -> Dict[str, int]:
+        result = dict(self._stats)
+        result["idle_workers"] = len(self._idle_workers)
+        return result
+
+    def run(self, plugin: T_Plugin, *args: Any, **kwargs: Any) -> None:
+        """
+        Run the plugin and pass args kwargs to the plugin run method.
+        """
+        if not self._started:
+            self.start()
+
+        # Plguin max run time (if set) has precedence over global max run time
+        max_run_time = get_plugin_config_option(
+            plugin.ID, "max_run_time", "int", fallback=self._max_run_time
+        )
+
+        worker = self._acquire_worker()
+        task_id = next(self._task_ids)
+
+        task: Tuple[int, str, Optional[T_Plugin], Tuple[Any, ...], Dict[str, Any]]
+
+        if self._plugins.get(plugin.ID, None) is plugin:
+            task = (task_id, plugin.ID, None, args, kwargs)
+        else:
+            # Plugin which workers don't know about (e.g. it has been registered after workers
+            # have been started), pass the whole instance
+            task = (task_id, plugin.ID, plugin, args, kwargs)
+
+        self._stats["tasks"] += 1
+        worker.task_queue.put(task)
+
+        try:
+            result_task_id, success, result = self._wait_for_result(
+                worker=worker, max_run_time=max_run_time
+            )
+        except PluginExecutionTimeoutException:
+            LOG.info("Plugin execution didn't finish in %s seconds, killing it..." % (max_run_time))
+            worker.kill()
+            plugin.disable_tx()
+            self._release_worker(worker=self._respawn_worker())
+            raise
+        except PluginExecutionException:
+            worker.kill()
+            plugin.disable_tx()
+            self._release_worker(worker=self._respawn_worker())
+            raise
+
+        self._release_worker(worker=worker)
+
+        assert result_task_id == task_id
+
+        if not success:
+            raise PluginExecutionException(result)
+
+        return result
+
+    def _wait_for_result(self, worker: PoolPluginWorker, max_run_time: Optional[int]) -> tuple:
+        start_time = time.monotonic()
+
+        while True:
+            if max_run_time is None:
+                timeout = WORKER_POLL_INTERVAL
+            else:
+                remaining = max_run_time - (time.monotonic() - start_time)
+
+                if remaining <= 0:
+                    raise PluginExecutionTimeoutException("Plugin execution timed out")
+
+                timeout = min(remaining, WORKER_POLL_INTERVAL)
+
+            try:
+                return worker.result_queue.get(timeout=timeout)
+            except queue.Empty:
+                pass
+
+            if not worker.is_alive():
+                raise PluginExecutionException(
+                    "Plugin worker process exited with code %s" % (worker.process.exitcode)
+                )
+
+    def _acquire_worker(self) -> PoolPluginWorker:
+        with self._lock:
+            while self._idle_workers:
+                worker = self._idle_workers.pop()
+
+                if worker.is_alive():
+                    return worker
+
+                worker.kill()
+
+        # All the workers are busy or have died, start a new one
+        return self._respawn_worker()
+
+    def _release_worker(self, worker: PoolPluginWorker) -> None:
+        with self._lock:
+            if self._started and len(self._idle_workers) < self._pool_size:
+                self._idle_workers.append(worker)
+                return
+
+        worker.stop()
+
+    def _respawn_worker(self) -> PoolPluginWorker:
+        self._stats["respawns"] += 1
+        return self._spawn_worker()
+
+    def _spawn_worker(self) -> PoolPluginWorker:
+        return PoolPluginWorker(plugins=self._plugins, context=self._context)
+
+
+class ThreadPluginExecutor(BasePluginExecutor):
+    """
+    Plugin executor which runs plugins in a bounded pool of threads.
+
+    Threads can't be killed so max run time is enforced cooperatively. Each plugin run gets a
+    cancellation token which is cancelled once max run time has been reached. Plugins use it as a
+    timeout for blocking calls and BasePlugin.transmit() refuses to enable TX for a cancelled run.
+    Access to the transmitter is serialized using a TX lock so a plugin which is still running
+    after it has timed out can never transmit over another plugin.
+    """
+
+    def __init__(self):
+        super(ThreadPluginExecutor, self).__init__()
+
+        self._pool_size = get_config_option("plugins", "pool_size", "int", fallback=2)
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self._stats = {"tasks": 0, "cancelled": 0, "running": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._pool_size, thread_name_prefix="plugin"
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+
+        if pool:
+            # NOTE: We don't wait for running plugins, they will exit once they check the
+            # cancellation token
+            pool.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    def run(self, plugin: T_Plugin, *args: Any, **kwargs: Any) -> None:
+        """
+        Run the plugin and pass args kwargs to the plugin run method.
+        """
+        self.start()
+        assert self._pool is not None
+
+        # Plguin max run time (if set) has precedence over global max run time
+        max_run_time = get_plugin_config_option(
+            plugin.ID, "max_run_time", "int", fallback=self._max_run_time
+        )
+
+        token = CancellationToken(timeout=max_run_time)
+
+        self._stats["tasks"] += 1
+        future = self._pool.submit(self._run_plugin, token, plugin, *args, **kwargs)
+
+        try:
+            return future.result(timeout=max_run_time)
+        except (concurrent.futures.TimeoutError, PluginExecutionTimeoutException):
+            LOG.info(
+                "Plugin execution didn't finish in %s seconds, cancelling it..." % (max_run_time)
+            )
+            token.cancel()
+            future.cancel()
+            self._stats["cancelled"] += 1
+
+            # Plugin may be holding the TX lock so we can't wait for it. Disabling TX is
+            # idempotent and plugin won't enable it again since the token has been cancelled
+            plugin.disable_tx()
+            raise PluginExecutionTimeoutException("Plugin execution timed out")
+
+    def _run_plugin(
+        self, token: CancellationToken, plugin: T_Plugin, *args: Any, **kwargs: Any
+    ) -> Any:
+        set_current_cancellation_token(token)
+        self._stats["running"] += 1
+
+        try:
+            token.raise_if_cancelled()
+            return plugin.run(*args, **kwargs)
+        except OperationCancelledException:
+            # Plugin noticed max run time has been reached before we did
+            LOG.info("Plugin %s run has been cancelled" % (plugin.ID))
+            raise PluginExecutionTimeoutException("Plugin execution timed out")
+        finally:
+            self._stats["running"] -= 1
+            set_current_cancellation_token(None)
+
+
 class PluginExecutor(object):
-    implementations = {"native": NativePluginExecutor, "process": ProccessPluginExecutor}
+    implementations: Dict[str, Type[BasePluginExecutor]] = {
+        "native": NativePluginExecutor,
+        "process": ProccessPluginExecutor,
+        "pool": PoolPluginExecutor,
+        "thread": ThreadPluginExecutor,
+    }
 
     def __init__(self, implementation: str) -> None:
         self._executor = self.implementations[implementation]()
@@ -128,6 +517,16 @@ class PluginExecutor(object):
             )
         )
 
+    def start(self) -> None:
+        """
+        Start the underlying executor. This should be called once all the plugins have been
+        loaded and registered.
+        """
+        self._executor.start()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
+
     def run(self, plugin: T_Plugin, *args: Any, **kwargs: Any) -> None:
         plugin_id = plugin.ID
 
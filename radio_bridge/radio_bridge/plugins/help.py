@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import List
+from typing import Tuple
+
 from radio_bridge.plugins.base import BaseDTMFPlugin
 from radio_bridge.configuration import get_plugin_config_option
 from radio_bridge.plugins import get_plugins_with_dtmf_sequence
@@ -36,6 +39,12 @@ class HelpPlugin(BaseDTMFPlugin):
     _skipload_ = get_plugin_config_option(ID, "enable", "bool", fallback=True) is False
 
     def run(self):
+        self.say(self._get_text_to_say())
+
+    def get_warm_up_phrases(self) -> List[Tuple[str, str]]:
+        return [(self._get_text_to_say(), "en_US")]
+
+    def _get_text_to_say(self) -> str:
         plugins = get_plugins_with_dtmf_sequence(include_admin=False)
 
         text_to_say = "Available commands:"
@@ -51,4 +60,4 @@ class HelpPlugin(BaseDTMFPlugin):
                 plugin_class.DESCRIPTION,
             )
 
-        self.say(text_to_say)
+        return text_to_say
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import List
+from typing import Tuple
+
 import datetime
 
 from wx_server.io import get_weather_observation_for_date
@@ -23,6 +26,8 @@ from radio_bridge.utils import weather as weather_utils
 
 __all__ = ["LocalWeatherPlugin"]
 
+TEXT_NO_OBSERVATION = "No recent weather observation found."
+
 
 class LocalWeatherPlugin(BaseDTMFPlugin):
     """
@@ -36,6 +41,7 @@ class LocalWeatherPlugin(BaseDTMFPlugin):
     REQUIRES_INTERNET_CONNECTION = False
     DEFAULT_LANGUAGE = "en_US"
     SUPPORTED_LANGUAGES = ["en_US"]
+    CONCATENATIVE_TTS = True
     DTMF_SEQUENCE = get_plugin_config_option(ID, "dtmf_sequence", fallback="34")
 
     _skipload_ = get_plugin_config_option(ID, "enable", "bool", fallback=True) is False
@@ -48,9 +54,12 @@ class LocalWeatherPlugin(BaseDTMFPlugin):
 
         observation_pb = get_weather_observation_for_date(station_id=station_id, date=date)
         if not observation_pb:
-            self.say("No recent weather observation found.")
+            self.say(TEXT_NO_OBSERVATION)
             return
 
         # 2. Convert it to text and say it
         text = weather_utils.observation_pb_to_text(observation_pb)
         self.say(text)
+
+    def get_warm_up_phrases(self) -> List[Tuple[str, str]]:
+        return [(TEXT_NO_OBSERVATION, "en_US")]
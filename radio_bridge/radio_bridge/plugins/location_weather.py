@@ -16,12 +16,12 @@
 import time
 
 import structlog
-import requests
 import xmltodict
 
 from radio_bridge.generated.protobuf import messages_pb2
 from radio_bridge.plugins.base import BaseDTMFWithDataPlugin
 from radio_bridge.configuration import get_plugin_config_option
+from radio_bridge.http_client import get_http_client
 from radio_bridge.utils import weather as weather_utils
 
 LOCATION_CODE_TO_CITY_MAP = {
@@ -45,6 +45,10 @@ CITY_TO_XML_URL_MAP = {
 
 LOG = structlog.getLogger(__name__)
 
+# Responses are cached on disk so they survive restarts and are shared with plugin executor worker
+# processes
+RESPONSE_CACHE_TTL = 60
+
 __all__ = ["LocationWeatherPlugin"]
 
 
@@ -84,11 +88,10 @@ def get_weather_observation(city: str) -> messages_pb2.WeatherObservation:
     Retrieve weather data from arso XML endpoint, parse it and convert it to WeatherObservation
     object.
     """
-    # TODO: Cache data for 60 seconds
     url = CITY_TO_XML_URL_MAP[city]
 
     LOG.debug("Retrieving weather data for city %s from %s" % (city, url))
-    response = requests.get(url)
+    response = get_http_client().get(url, cache_ttl=RESPONSE_CACHE_TTL)
     result = xmltodict.parse(response.content)
 
     LOG.trace("Retrieved weather data: %s" % (str(result)))
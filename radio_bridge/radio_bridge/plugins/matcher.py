@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Set
+from typing import Tuple
+
+from radio_bridge.dtmf import DTMF_KEYPAD_CHARACTERS
+from radio_bridge.plugins.base import BaseDTMFPlugin
+
+__all__ = ["DTMFSequenceMatcher", "MATCH", "PREFIX", "NO_MATCH"]
+
+# Sequence matches pattern for at least one plugin
+MATCH = "match"
+
+# Sequence doesn't match any plugin yet, but it could match one once more characters are received
+PREFIX = "prefix"
+
+# Sequence can't match any plugin regardless of the characters which follow (dead end)
+NO_MATCH = "no_match"
+
+
+class DTMFSequenceMatcher(object):
+    """
+    Matcher which finds candidate plugins for a DTMF sequence.
+
+    It builds a trie over DTMF sequence patterns for all the provided plugins (including "?" and
+    "*" wildcards and the OTP suffix for admin plugins) and compiles it to a deterministic
+    automaton where each state is a set of trie nodes. This means matching a sequence only requires
+    a single dictionary lookup per character, regardless of the number of plugins.
+
+    Wildcards follow the fnmatch semantics which are used by the plugin matches_dtmf_sequence()
+    methods - "?" matches any single character and "*" matches any number of characters
+    (including none).
+
+    Patterns which start with "*" (e.g. "*D*" used by the clear sequence plugin) can match at any
+    point in the sequence so every sequence is a prefix of a sequence which matches them. Those
+    patterns are compiled into a separate automaton which is only used to find matches and
+    partial matches (e.g. "*AB" after "A" has been received). Otherwise no sequence would ever
+    reach a dead end.
+
+    Matcher only looks at the sequence structure. Plugin matches_dtmf_sequence() method still needs
+    to be called for candidate plugins to validate OTP and retrieve run() arguments.
+    """
+
+    def __init__(self, plugins: Dict[str, BaseDTMFPlugin]):
+        # State 0 is the start state. For each state we store transitions (char -> state) and a
+        # list of plugins which match sequence which ends in that state
+        self._transitions, self._plugins = self._compile(
+            patterns=self._build_trie(
+                plugins=[
+                    plugin
+                    for plugin in plugins.values()
+                    if not plugin.get_dtmf_sequence_pattern().startswith("*")
+                ]
+            )
+        )
+
+        # Automaton for patterns which start with "*". State 0 means there is no partial match in
+        # progress
+        self._floating_transitions, self._floating_plugins = self._compile(
+            patterns=self._build_trie(
+                plugins=[
+                    plugin
+                    for plugin in plugins.values()
+                    if plugin.get_dtmf_sequence_pattern().startswith("*")
+                ],
+                floating=True,
+            ),
+            floating=True,
+        )
+
+    def match(self, sequence: str) -> Tuple[str, List[BaseDTMFPlugin]]:
+        """
+        Return a tuple with match status (MATCH, PREFIX or NO_MATCH) and a list of plugins which
+        match the provided sequence.
+        """
+        state = self._get_state(sequence=sequence, transitions=self._transitions)
+        floating_state = self._get_state(sequence=sequence, transitions=self._floating_transitions)
+
+        plugins: List[BaseDTMFPlugin] = []
+
+        if state != -1:
+            plugins += self._plugins[state]
+
+        if floating_state != -1:
+            plugins += self._floating_plugins[floating_state]
+
+        if plugins:
+            return MATCH, plugins
+
+        if self._is_prefix_state(state=state, floating_state=floating_state):
+            return PREFIX, []
+
+        return NO_MATCH, []
+
+    def is_prefix(self, sequence: str) -> bool:
+        """
+        Return True if the provided sequence is a prefix of a longer sequence which could match a
+        plugin.
+        """
+        return self._is_prefix_state(
+            state=self._get_state(sequence=sequence, transitions=self._transitions),
+            floating_state=self._get_state(
+                sequence=sequence, transitions=self._floating_transitions
+            ),
+        )
+
+    def _is_prefix_state(self, state: int, floating_state: int) -> bool:
+        return (state != -1 and bool(self._transitions[state])) or floating_state > 0
+
+    def _get_state(self, sequence: str, transitions: List[Dict[str, int]]) -> int:
+        """
+        Return automaton state for the provided sequence or -1 if there is no such state.
+        """
+        state = 0
+
+        for char in sequence:
+            state = transitions[state].get(char, -1)
+
+            if state == -1:
+                break
+
+        return state
+
+    def _build_trie(
+        self, plugins: List[BaseDTMFPlugin], floating: bool = False
+    ) -> Tuple[List[Dict[str, int]], List[List[BaseDTMFPlugin]]]:
+        """
+        Build a trie for all the plugin patterns and return a tuple with node children
+        (char -> node index) and plugins which terminate in each node.
+
+        :param floating: True to strip leading "*" wildcards from the patterns. Those are handled
+                         by the automaton which can start a match at any character.
+        """
+        children: List[Dict[str, int]] = [{}]
+        terminals: List[List[BaseDTMFPlugin]] = [[]]
+
+        for plugin in plugins:
+            node = 0
+            pattern = plugin.get_dtmf_sequence_pattern()
+
+            if floating:
+                pattern = pattern.lstrip("*")
+
+            for char in pattern:
+                if char not in children[node]:
+                    children.append({})
+                    terminals.append([])
+                    children[node][char] = len(children) - 1
+
+                node = children[node][char]
+
+            terminals[node].append(plugin)
+
+        return children, terminals
+
+    def _compile(
+        self,
+        patterns: Tuple[List[Dict[str, int]], List[List[BaseDTMFPlugin]]],
+        floating: bool = False,
+    ) -> Tuple[List[Dict[str, int]], List[List[BaseDTMFPlugin]]]:
+        """
+        Compile trie into a deterministic automaton using subset construction and return a tuple
+        with transitions (char -> state) and plugins which match in each state.
+
+        :param floating: True to include the root node in every state so a match can start at any
+                         character (patterns have a leading "*").
+        """
+        children, terminals = patterns
+
+        # Nodes which are reached through a "*" edge. Those nodes consume any character and stay in
+        # the same node
+        star_nodes = set([node["*"] for node in children if "*" in node])
+
+        root = set([0]) if floating else set()
+        start = self._get_closure(children=children, nodes=set([0]))
+        state_indexes: Dict[FrozenSet[int], int] = {start: 0}
+        pending = [start]
+
+        transitions: List[Dict[str, int]] = [{}]
+        plugins = [[plugin for node in sorted(start) for plugin in terminals[node]]]
+
+        while pending:
+            nodes = pending.pop()
+            state = state_indexes[nodes]
+
+            for char in DTMF_KEYPAD_CHARACTERS:
+                next_nodes = self._get_closure(
+                    children=children,
+                    nodes=set(
+                        children[node][key]
+                        for node in nodes
+                        for key in [char, "?"]
+                        if key in children[node]
+                    )
+                    | (nodes & star_nodes)
+                    | root,
+                )
+
+                if not next_nodes:
+                    continue
+
+                if next_nodes not in state_indexes:
+                    state_indexes[next_nodes] = len(transitions)
+                    transitions.append({})
+                    plugins.append(
+                        [plugin for node in sorted(next_nodes) for plugin in terminals[node]]
+                    )
+                    pending.append(next_nodes)
+
+                transitions[state][char] = state_indexes[next_nodes]
+
+        return transitions, plugins
+
+    def _get_closure(self, children: List[Dict[str, int]], nodes: Set[int]) -> FrozenSet[int]:
+        """
+        Return provided nodes and all the nodes which are reachable from them through "*" edges
+        without consuming any characters ("*" also matches an empty string).
+        """
+        result = set(nodes)
+        pending = list(nodes)
+
+        while pending:
+            node = pending.pop()
+            star_node = children[node].get("*", None)
+
+            if star_node is not None and star_node not in result:
+                result.add(star_node)
+                pending.append(star_node)
+
+        return frozenset(result)
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Optional
+
 import os
 import datetime
 
@@ -50,7 +52,9 @@ class RecordAudioPlugin(BaseNonDTMFPlugin):
         self._input_device_index = int(self._config["input_device_index"])
         self._rate = int(self._config["sample_rate"])
 
-        self._audio = pyaudio.PyAudio()
+        # NOTE: PyAudio instance is created on first run inside the process which runs the plugin.
+        # This way plugin instance can be pickled and passed to pool executor worker processes
+        self._audio: Optional[pyaudio.PyAudio] = None
 
     def run(self):
         # TODO: Refactor plugin to use a single pyaudio instance for this plugin + main loop and
@@ -59,6 +63,9 @@ class RecordAudioPlugin(BaseNonDTMFPlugin):
         # TODO: Throw if executor used is not process
         chunk_size = 2 ** 12
 
+        if self._audio is None:
+            self._audio = pyaudio.PyAudio()
+
         stream = self._audio.open(
             format=pyaudio.paInt16,
             input_device_index=self._input_device_index,
@@ -87,6 +94,6 @@ class RecordAudioPlugin(BaseNonDTMFPlugin):
     def _write_frame_buffer_to_file(self, frames_buffer: list, file_path: str) -> None:
         with wave.open(file_path, "wb") as wf:
             wf.setnchannels(self._channels)
-            wf.setsampwidth(self._audio.get_sample_size(pyaudio.paInt16))
+            wf.setsampwidth(pyaudio.get_sample_size(pyaudio.paInt16))
             wf.setframerate(self._rate)
             wf.writeframes(b"".join(frames_buffer))
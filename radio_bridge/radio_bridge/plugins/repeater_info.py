@@ -13,18 +13,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Dict
 from typing import Optional
 from typing import Tuple
 
 import re
+import time
+import functools
 
 import structlog
-import requests
 from bs4 import BeautifulSoup
-from expiringdict import ExpiringDict
+from bs4 import SoupStrainer
 
 from radio_bridge.plugins.base import BaseDTMFWithDataPlugin
 from radio_bridge.configuration import get_plugin_config_option
+from radio_bridge.http_client import get_http_client
+from radio_bridge.utils.cache import RefreshingCache
 
 REPEATERS_URL_2M = "http://rpt.hamradio.si/?modul=repetitorji&vrsta=2"
 REPEATERS_URL_70CM = "http://rpt.hamradio.si/?modul=repetitorji&vrsta=3"
@@ -40,9 +44,30 @@ CTCSS: {ctcss} MHz
 
 LOG = structlog.getLogger(__name__)
 
-# Dictionary where we stored cached HTTP responses to avoid re-fetching the data when it's not
-# necessary. Since those pages rarely change, we use a relatively long TTL.
-URL_RESPONSE_CACHE = ExpiringDict(max_len=10, max_age_seconds=(6 * 60 * 60))
+# lxml based parser is much faster than the built-in one, but it's an optional dependency
+try:
+    import lxml  # NOQA
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Cache where we store repeaters index (repeater id -> RepeaterInfo) for each of the repeater pages.
+# Pages are parsed only once per fetch so lookups don't need to parse the whole page. Since those
+# pages rarely change, we use a relatively long TTL. Entries are refreshed in the background before
+# they expire and stale copy is served while refresh is in flight or if the site is down. Empty
+# indexes (e.g. maintenance page or page layout change) are not cached.
+REPEATERS_INDEX_CACHE = RefreshingCache(
+    name="repeater_info",
+    max_len=10,
+    max_age=(6 * 60 * 60),
+    is_valid=lambda repeaters_index: bool(repeaters_index),
+)
+
+# Pages are also cached on disk so they survive restarts and are shared with plugin executor
+# worker processes. TTL is shorter than the point at which in-memory entries are refreshed so
+# background refresh always revalidates the disk copy.
+RESPONSE_DISK_CACHE_TTL = 4 * 60 * 60
 
 
 class RepeaterInfo(object):
@@ -53,6 +78,7 @@ class RepeaterInfo(object):
     location: str
     notes: str
     ctcss: Optional[str]
+    text: str
 
     def __repr__(self):
         return "<RepeaterInfo id=%s,name=%s,input=%s,output=%s,ctcss=%s,location=%s,notes=%s>" % (
@@ -78,6 +104,7 @@ class RepeaterInfoPlugin(BaseDTMFWithDataPlugin):
     REQUIRES_INTERNET_CONNECTION = True
     DEFAULT_LANGUAGE = "en_US"
     SUPPORTED_LANGUAGES = ["en_US"]
+    CONCATENATIVE_TTS = True
     # Usage: 38<1 digit for repeater type, 2 = vhf, 7 = 70cm><2 digits for repeater id, e.g. 01>
     # For example 3 8 2 0 1 - First 2m repeater
     # For example 3 8 7 0 1 - First 70cm repeater
@@ -106,9 +133,7 @@ class RepeaterInfoPlugin(BaseDTMFWithDataPlugin):
 
         LOG.debug("Retrieved repeater information", repeater_info=repeater_info)
 
-        context = self._get_render_context_for_text(repeater_info=repeater_info)
-        text_to_say = TEXT.format(**context)
-        self.say(text_to_say)
+        self.say(repeater_info.text)
 
     def _get_render_context_for_text(self, repeater_info: RepeaterInfo) -> dict:
         """
@@ -167,47 +192,99 @@ class RepeaterInfoPlugin(BaseDTMFWithDataPlugin):
         else:
             raise ValueError("Unknown repeater type: %s" % (repeater_type))
 
-        if url not in URL_RESPONSE_CACHE:
-            response = requests.get(url)
-
-            if response.status_code != 200:
-                LOG.error(
-                    "URL %s returned non-200 code" % (url),
-                    code=response.status_code,
-                    response=response.text,
-                )
-                return None
+        repeaters_index = REPEATERS_INDEX_CACHE.get(
+            url, functools.partial(self._fetch_repeaters_index, url)
+        )
 
-            URL_RESPONSE_CACHE[url] = response.text
+        if repeaters_index is None:
+            return None
 
-        response_body = URL_RESPONSE_CACHE[url]
-        soup = BeautifulSoup(response_body, "html.parser")
+        return repeaters_index.get(str(repeater_id), None)
 
-        id_tag = soup.find("b", string=repeater_id)
-        if not id_tag:
+    def _fetch_repeaters_index(self, url: str) -> Optional[Dict[str, RepeaterInfo]]:
+        """
+        Retrieve repeaters page from the provided URL and parse it into an index.
+        """
+        response = get_http_client().get(url, cache_ttl=RESPONSE_DISK_CACHE_TTL)
+
+        if response.status_code != 200:
+            LOG.error(
+                "URL %s returned non-200 code" % (url),
+                code=response.status_code,
+                response=response.text,
+            )
             return None
 
-        repeater_row = id_tag.find_parent("tr")
+        start_time = time.monotonic()
+        repeaters_index = self._parse_repeaters_index(response_body=response.text)
+        parse_duration_ms = int((time.monotonic() - start_time) * 1000)
 
-        if not repeater_row:
-            return None
+        LOG.debug(
+            "Parsed repeaters page",
+            url=url,
+            parser=HTML_PARSER,
+            repeaters=len(repeaters_index),
+            duration_ms=parse_duration_ms,
+        )
+
+        return repeaters_index
+
+    def _parse_repeaters_index(self, response_body: str) -> Dict[str, RepeaterInfo]:
+        """
+        Parse all the repeaters from the repeaters page into a dictionary which maps repeater id
+        to RepeaterInfo object with pre-rendered text.
+        """
+        # We only care about the table rows so we skip building the tree for the rest of the
+        # document
+        soup = BeautifulSoup(response_body, HTML_PARSER, parse_only=SoupStrainer("tr"))
 
-        children = list(repeater_row.children)
+        result = {}
+
+        for repeater_row in soup.find_all("tr"):
+            cells = repeater_row.find_all("td", recursive=False)
+
+            if len(cells) < 7:
+                continue
+
+            id_tag = cells[0].find("b")
+
+            if not id_tag:
+                continue
+
+            repeater_id = id_tag.text.strip()
+
+            # First row with a specific id wins
+            if not repeater_id or repeater_id in result:
+                continue
+
+            repeater = self._parse_repeater_row(cells=cells)
+
+            if repeater:
+                result[repeater_id] = repeater
+
+        return result
+
+    def _parse_repeater_row(self, cells: list) -> Optional[RepeaterInfo]:
+        name_tag = cells[3].find("b")
+        location_tag = cells[4].find("b")
+
+        if not name_tag or not location_tag:
+            return None
 
         repeater = RepeaterInfo()
 
         # Some rows contain two frequencies (one for VHF and one for UHF)
-        input_freq = re.split(r"\s+", children[3].text)
-        output_freq = re.split(r"\s+", children[5].text)
+        input_freq = re.split(r"\s+", cells[1].text)
+        output_freq = re.split(r"\s+", cells[2].text)
 
         repeater.input_freq = input_freq[0]
         repeater.output_freq = output_freq[0]
 
-        repeater.numeric_id = children[7].text.strip().split("\n")[0]
-        repeater.name = children[7].find("b").text
-        repeater.location = children[9].find("b").text
+        repeater.numeric_id = cells[3].text.strip().split("\n")[0]
+        repeater.name = name_tag.text
+        repeater.location = location_tag.text
 
-        repeater.notes = children[13].text.strip().replace("\n", " ")
+        repeater.notes = cells[6].text.strip().replace("\n", " ")
 
         # Parse CTCSS from the notes (if any if specified)
         match = re.match(r".*CTCSS:\s+((\d+)(\.)(\d+)).*", repeater.notes)
@@ -218,4 +295,9 @@ class RepeaterInfoPlugin(BaseDTMFWithDataPlugin):
             ctcss = None
 
         repeater.ctcss = ctcss
+
+        # Text is rendered only once per fetch
+        context = self._get_render_context_for_text(repeater_info=repeater)
+        repeater.text = TEXT.format(**context)
+
         return repeater
@@ -14,18 +14,19 @@
 # limitations under the License.
 
 import structlog
-import requests
 import xmltodict
-from expiringdict import ExpiringDict
 
 from radio_bridge.plugins.base import BaseDTMFPlugin
 from radio_bridge.configuration import get_plugin_config_option
+from radio_bridge.http_client import get_http_client
 
 LOG = structlog.getLogger(__name__)
 
 DEFAULT_URL = "https://spin3.sos112.si/api/javno/ODRSS/false"
 
-URL_RESPONSE_CACHE = ExpiringDict(max_len=20, max_age_seconds=(3 * 60))
+# Responses are cached on disk so they survive restarts and are shared with plugin executor worker
+# processes
+RESPONSE_CACHE_TTL = 3 * 60
 
 __all__ = ["SPINEventsPlugin"]
 
@@ -45,10 +46,8 @@ class SPINEventsPlugin(BaseDTMFPlugin):
     def run(self):
         url = self._config.get("url", DEFAULT_URL)
 
-        response = requests.get(url)
+        response = get_http_client().get(url, cache_ttl=RESPONSE_CACHE_TTL)
 
-        with open("1.xml", "w") as fp:
-            fp.write(response.text)
         data = xmltodict.parse(response.text)
 
         result = []
@@ -13,18 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import List
 from typing import Optional
 from typing import Tuple
 
 import json
+import functools
 import urllib.parse
 
 import structlog
-import requests
-from expiringdict import ExpiringDict
-
 from radio_bridge.plugins.base import BaseDTMFWithDataPlugin
 from radio_bridge.configuration import get_plugin_config_option
+from radio_bridge.http_client import get_http_client
+from radio_bridge.utils.cache import RefreshingCache
 
 LOG = structlog.getLogger(__name__)
 
@@ -35,14 +36,27 @@ TEXT_NO_EVENTS = {
     "sl_SI": "Ni dogodkov.",
 }
 
+TEXT_INVALID_SEQUENCE = "Invalid sequence."
+
 TEXT_NO_BORDER_CROSSING_DATA = {
     "en_US": "No reported delays.",
     "sl_SI": "Ni cakalnih dob.",
 }
 
-# Dictionary where we stored cached HTTP responses to avoid re-fetching the data when it's not
-# necessary.
-URL_RESPONSE_CACHE = ExpiringDict(max_len=20, max_age_seconds=(5 * 60))
+# Cache where we store HTTP responses to avoid re-fetching the data when it's not necessary.
+# Entries are refreshed in the background before they expire and stale copy is served while
+# refresh is in flight or if the API is not available.
+URL_RESPONSE_CACHE = RefreshingCache(
+    name="traffic_info",
+    max_len=20,
+    max_age=(5 * 60),
+    is_valid=lambda response: response.status_code == 200,
+)
+
+# Responses are also cached on disk so they survive restarts and are shared with plugin executor
+# worker processes. TTL is shorter than the point at which in-memory entries are refreshed so
+# background refresh always revalidates the disk copy.
+RESPONSE_DISK_CACHE_TTL = 4 * 60
 
 __all__ = ["TrafficInfoPlugin"]
 
@@ -63,7 +77,7 @@ class TrafficInfoPlugin(BaseDTMFWithDataPlugin):
     def run(self, sequence: str):
         # TODO: Query params based on language
         if sequence not in ["1", "2"]:
-            self.say(text="Invalid sequence.")
+            self.say(text=TEXT_INVALID_SEQUENCE)
             return
 
         username = self._config.get("username", None)
@@ -91,6 +105,15 @@ class TrafficInfoPlugin(BaseDTMFWithDataPlugin):
 
         self.say(text=text_to_say, language=language)
 
+    def get_warm_up_phrases(self) -> List[Tuple[str, str]]:
+        language = self._config.get("language", "en_US")
+
+        return [
+            (TEXT_INVALID_SEQUENCE, "en_US"),
+            (TEXT_NO_EVENTS[language], language),
+            (TEXT_NO_BORDER_CROSSING_DATA[language], language),
+        ]
+
     def _get_traffic_events_text_to_say(
         self, auth: Optional[Tuple[str, str]] = None, language: str = "en_US"
     ) -> str:
@@ -182,13 +205,13 @@ class TrafficInfoPlugin(BaseDTMFWithDataPlugin):
         """
         url = self._get_full_url(method=method, query_params=query_params)
 
-        if url not in URL_RESPONSE_CACHE or URL_RESPONSE_CACHE[url].status_code != 200:
-            LOG.debug("Retrieving data from %s" % (url))
-            URL_RESPONSE_CACHE[url] = requests.get(url, auth=auth)
-        else:
-            LOG.debug("Using existing cached data")
-
-        response = URL_RESPONSE_CACHE[url]
+        LOG.debug("Retrieving data from %s" % (url))
+        response = URL_RESPONSE_CACHE.get(
+            url,
+            functools.partial(
+                get_http_client().get, url, auth=auth, cache_ttl=RESPONSE_DISK_CACHE_TTL
+            ),
+        )
 
         if response.status_code != 200:
             LOG.warning(
@@ -13,13 +13,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Any
 from typing import List
+from typing import Dict
+from typing import Optional
 
+import time
 import atexit
 
 import wave
 import pyaudio
 import structlog
+import numpy as np
+
+from radio_bridge.utils.ring_buffer import AudioRingBuffer
 
 LOG = structlog.getLogger(__name__)
 
@@ -36,7 +43,13 @@ class RX(object):
         rate: int = 48000,
         chunk_size: int = 2 ** 12,  # frames per buffer
         time: float = 0.2,
+        stream_buffer_time: float = 10.0,
     ):
+        """
+        :param time: Record time in seconds for record_audio() and window size in seconds for
+                     streaming mode.
+        :param stream_buffer_time: How many seconds of audio ring buffer holds in streaming mode.
+        """
         self._device_index = input_device_index
         self._file_path = file_path
         self._audio_format = audio_format
@@ -44,12 +57,18 @@ class RX(object):
         self._rate = rate
         self._chunk_size = chunk_size
         self._record_time = time
+        self._stream_buffer_time = stream_buffer_time
 
         self.audio = pyaudio.PyAudio()
-        self.stream = None
+        self.stream: Optional[Any] = None
 
         self.frames_buffer: List[bytes] = []
 
+        # Used in streaming mode
+        self._ring_buffer: Optional[AudioRingBuffer] = None
+        self._read_position = 0
+        self._stream_stats = {"overflows": 0, "underflows": 0}
+
         device_info = self._get_device_info(self._device_index)
         LOG.debug(
             "Using audio device with index %s and name %s."
@@ -64,7 +83,29 @@ class RX(object):
         result = p.get_device_info_by_host_api_device_index(0, device_index)
         return result
 
+    @property
+    def rate(self) -> int:
+        return self._rate
+
     def record_audio(self):
+        """
+        Record audio and write it to a file.
+        """
+        self._read_frames()
+        self._write_frames_buffer_to_file()
+
+    def record_audio_to_buffer(self) -> bytes:
+        """
+        Record audio and return raw PCM data without writing it to a file.
+        """
+        self._read_frames()
+
+        data = b"".join(self.frames_buffer)
+        self.frames_buffer = []
+
+        return data
+
+    def _read_frames(self):
         LOG.trace("Starting recording")
 
         # Start Recording
@@ -86,7 +127,105 @@ class RX(object):
         self.stream.stop_stream()
         self.stream.close()
 
-        self._write_frames_buffer_to_file()
+    def start_stream(self) -> None:
+        """
+        Start streaming mode.
+
+        In this mode a single input stream is kept open and samples are written to a ring buffer
+        in a PyAudio callback. This means there are no gaps between windows and no stream
+        open / close overhead for every read.
+        """
+        if self._ring_buffer:
+            return
+
+        if self._channels != 1 or self._audio_format != pyaudio.paInt16:
+            raise ValueError("Streaming mode only supports mono 16 bit audio")
+
+        self._ring_buffer = AudioRingBuffer(
+            capacity=int(self._rate * self._stream_buffer_time), dtype="int16"
+        )
+        self._read_position = 0
+
+        LOG.debug("Starting audio input stream", buffer_time=self._stream_buffer_time)
+
+        self.stream = self.audio.open(
+            format=self._audio_format,
+            channels=self._channels,
+            input_device_index=self._device_index,
+            rate=self._rate,
+            input=True,
+            frames_per_buffer=self._chunk_size,
+            stream_callback=self._stream_callback,
+        )
+        assert self.stream is not None
+        self.stream.start_stream()
+
+    def read_stream_window(
+        self,
+        window_time: Optional[float] = None,
+        overlap: float = 0.0,
+        timeout: Optional[float] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Return next window with samples from the stream ring buffer.
+
+        Returned array is a read only view on the ring buffer (no copy is made) so it should be
+        consumed before the writer wraps around.
+
+        :param window_time: Window size in seconds. Defaults to record time.
+        :param overlap: How many seconds of the returned window are also included in the next
+                        window.
+        :param timeout: How long to wait for window samples to become available. None means to wait
+                        forever.
+        """
+        if not self._ring_buffer:
+            raise ValueError("Stream is not started, call start_stream() first")
+
+        size = int(self._rate * (window_time or self._record_time))
+        step = max(1, size - int(self._rate * overlap))
+
+        start_time = time.time()
+
+        while True:
+            result = self._ring_buffer.get_window(position=self._read_position, size=size)
+
+            if result:
+                break
+
+            if timeout is not None and time.time() - start_time >= timeout:
+                return None
+
+            # Sleep until there should be enough samples available
+            missing_samples = self._read_position + size - self._ring_buffer.write_position
+            time.sleep(min(max(missing_samples / self._rate, 0.005), 0.1))
+
+        position, window = result
+        self._read_position = position + step
+
+        return window
+
+    def get_stream_stats(self) -> Dict[str, int]:
+        """
+        Return streaming mode stats (number of input overflows, missed samples, etc.).
+        """
+        stats = dict(self._stream_stats)
+
+        if self._ring_buffer:
+            stats.update(self._ring_buffer.get_stats())
+
+        return stats
+
+    def _stream_callback(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self._stream_stats["overflows"] += 1
+
+        if status & pyaudio.paInputUnderflow:
+            self._stream_stats["underflows"] += 1
+
+        assert self._ring_buffer is not None
+        self._ring_buffer.write(np.frombuffer(in_data, dtype=np.int16))
+
+        return (None, pyaudio.paContinue)
 
     def _write_frames_buffer_to_file(self):
         if not self.frames_buffer:
@@ -108,6 +247,9 @@ class RX(object):
 
         if self.stream:
             self.stream.close()
+            self.stream = None
+
+        self._ring_buffer = None
 
         if self.audio:
             self.audio.terminate()
@@ -14,20 +14,58 @@
 # limitations under the License.
 
 from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Type
 
 import os
+import re
 import abc
 import hashlib
+import threading
 
 import structlog
-import requests
 import mutagen
 
 from radio_bridge.configuration import get_config_option
+from radio_bridge.configuration import get_config_snapshot
 from radio_bridge.audio_player import get_audio_file_duration
+from radio_bridge.http_client import get_http_client
+from radio_bridge.tts_cache import get_tts_cache_manager
+
+__all__ = [
+    "TextToSpeech",
+    "get_text_to_speech",
+    "get_tts_implementation",
+    "split_text_into_segments",
+]
 
 LOG = structlog.getLogger(__name__)
 
+# Maps (implementation, config version) to a cached TextToSpeech instance
+TEXT_TO_SPEECH_INSTANCES: Dict[Tuple[str, int], "TextToSpeech"] = {}
+
+# Maps (implementation, language, config version) to a cached TTS implementation instance
+TTS_IMPLEMENTATION_INSTANCES: Dict[Tuple[str, str, int], "BaseTextToSpeechImplementation"] = {}
+
+TTS_INSTANCES_LOCK = threading.Lock()
+
+# Matches numbers (optionally negative and with a decimal part) which are synthesized as separate
+# segments in the concatenative mode
+NUMBER_RE = re.compile(r"(?<![\w.-])(-?)(\d+)(?:\.(\d+))?(?![\w])")
+
+# Words which are used for the parts of the numbers in the concatenative mode
+TEXT_DECIMAL_POINT = {
+    "en_US": "point",
+    "sl_SI": "vejica",
+}
+
+TEXT_MINUS = {
+    "en_US": "minus",
+    "sl_SI": "minus",
+}
+
 
 class BaseTextToSpeechImplementation(object):
     """
@@ -49,7 +87,6 @@ class BaseTextToSpeechImplementation(object):
         Return file path to where the synthesized audio file will be saved / cached, if cache is
         enabled, otherwise return random file path.
         """
-        # TODO: Add cron job which auto purges old recording cached files
         file_hash = hashlib.md5(
             text.encode("utf-8") + self.implementation_id.encode("utf-8")
         ).hexdigest()
@@ -66,9 +103,6 @@ class BaseTextToSpeechImplementation(object):
         else:
             file_path = os.path.join("/tmp", file_name)
 
-        if self._is_valid_cached_file(file_path=file_path, use_cache=use_cache):
-            return file_path
-
         return file_path
 
     def _is_valid_cached_file(self, file_path: str, use_cache: bool = True):
@@ -79,7 +113,21 @@ class BaseTextToSpeechImplementation(object):
         if not cache_generated_audio_files or not use_cache:
             return False
 
-        return os.path.isfile(file_path) and os.stat(file_path).st_size > 0
+        # NOTE: Cache index is kept in memory so this doesn't touch the filesystem
+        return get_tts_cache_manager().lookup(file_path=file_path)
+
+    def _add_cached_file(self, file_path: str) -> None:
+        """
+        Add newly synthesized file to the cache index so it can be reused and evicted when needed.
+        """
+        cache_generated_audio_files = get_config_option(
+            "tts", "enable_cache", "bool", fallback=False
+        )
+
+        if not cache_generated_audio_files:
+            return
+
+        get_tts_cache_manager().add(file_path=file_path)
 
 
 class ESpeakTextToSpeech(BaseTextToSpeechImplementation):
@@ -94,10 +142,12 @@ class ESpeakTextToSpeech(BaseTextToSpeechImplementation):
     file_extension = ".wav"
     supported_languages = ["en_US"]
 
-    def text_to_speech(self, text: str, slow: bool = False, use_cache: bool = True) -> str:
-        # TODO: Allow various settings to be changed via config option
-        from espeakng import ESpeakNG
+    def __init__(self):
+        # Maps slow flag to ESpeakNG instance. We use separate instances so we don't need to
+        # modify the speed of a shared instance which could be used by multiple threads
+        self._esng_instances: Dict[bool, Any] = {}
 
+    def text_to_speech(self, text: str, slow: bool = False, use_cache: bool = True) -> str:
         file_path = self._get_cache_file_path(text=text, use_cache=use_cache)
 
         if self._is_valid_cached_file(file_path=file_path, use_cache=use_cache):
@@ -106,23 +156,33 @@ class ESpeakTextToSpeech(BaseTextToSpeechImplementation):
 
         LOG.trace('Performing TTS on text "%s" and saving result to %s' % (text, file_path))
 
-        esng = ESpeakNG()
-        esng.voice = "en-us"
-        esng.pitch = 32
-        esng.pitch = 32
-
-        if slow:
-            esng.speed = 80
-        else:
-            esng.speed = 150
-
+        esng = self._get_esng(slow=slow)
         wave_data = esng.synth_wav(text)
 
         with open(file_path, "wb") as fp:
             fp.write(wave_data)
 
+        self._add_cached_file(file_path=file_path)
         return file_path
 
+    def _get_esng(self, slow: bool = False) -> Any:
+        if slow not in self._esng_instances:
+            # TODO: Allow various settings to be changed via config option
+            from espeakng import ESpeakNG
+
+            esng = ESpeakNG()
+            esng.voice = "en-us"
+            esng.pitch = 32
+
+            if slow:
+                esng.speed = 80
+            else:
+                esng.speed = 150
+
+            self._esng_instances[slow] = esng
+
+        return self._esng_instances[slow]
+
 
 class GoogleTextToSpeech(BaseTextToSpeechImplementation):
     """
@@ -174,6 +234,7 @@ class GoogleTextToSpeech(BaseTextToSpeechImplementation):
             LOG.error('Failed to perform TTS on text "%s"' % (text))
             return ""
 
+        self._add_cached_file(file_path=file_path)
         return file_path
 
 
@@ -199,7 +260,7 @@ class GovornikTextToSpeech(BaseTextToSpeechImplementation):
             "source": "radio_bridge",
             "format": "wav",
         }
-        resp = requests.post(url=url, data=data)
+        resp = get_http_client().post(url, data=data)
 
         if resp.status_code != 200:
             LOG.warning("Received invalid status code (%s): %s." % (resp.status_code, resp.text))
@@ -208,11 +269,12 @@ class GovornikTextToSpeech(BaseTextToSpeechImplementation):
             for chunk in resp.iter_content(chunk_size=4096):
                 fp.write(chunk)
 
+        self._add_cached_file(file_path=file_path)
         return file_path
 
 
 class TextToSpeech(object):
-    implementations = {
+    implementations: Dict[str, Type[BaseTextToSpeechImplementation]] = {
         "gtts": GoogleTextToSpeech,
         "espeak": ESpeakTextToSpeech,
         "govornik": GovornikTextToSpeech,
@@ -240,7 +302,7 @@ class TextToSpeech(object):
                 % (implementation, ",".join(self.implementations))
             )
 
-        self._tts = self.implementations[implementation]()  # type: ignore
+        self._tts = get_tts_implementation(implementation=implementation)
 
     def text_to_speech(
         self, text: str, language: str = "en_US", slow: bool = False, use_cache: bool = True
@@ -250,11 +312,99 @@ class TextToSpeech(object):
 
     def _get_tts_implementation_for_language(self, language: str) -> BaseTextToSpeechImplementation:
         if language == "sl_SI":
-            return self.implementations["govornik"]()  # type: ignore
+            return get_tts_implementation(implementation="govornik", language=language)
         elif language == "en_US":
             if "en_US" in self._tts.supported_languages:  # type: ignore
                 return self._tts
             else:
-                return self.implementations["espeak"]()  # type: ignore
+                return get_tts_implementation(implementation="espeak", language=language)
         else:
             return self._tts  # type: ignore
+
+
+def get_text_to_speech(implementation: str) -> TextToSpeech:
+    """
+    Return cached TextToSpeech instance for the provided implementation.
+
+    Instances are cached per config version so any config changes made during the program life
+    cycle (e.g. cache directory) are reflected here.
+    """
+    key = (implementation, get_config_snapshot().version)
+
+    with TTS_INSTANCES_LOCK:
+        instance = TEXT_TO_SPEECH_INSTANCES.get(key, None)
+
+    if instance is None:
+        instance = TextToSpeech(implementation=implementation)
+
+        with TTS_INSTANCES_LOCK:
+            TEXT_TO_SPEECH_INSTANCES.clear()
+            TEXT_TO_SPEECH_INSTANCES[key] = instance
+
+    return instance
+
+
+def get_tts_implementation(
+    implementation: str, language: str = "en_US"
+) -> BaseTextToSpeechImplementation:
+    """
+    Return cached TTS implementation instance for the provided implementation and language.
+    """
+    if implementation not in TextToSpeech.implementations:
+        raise ValueError(
+            "Invalid implementation: %s. Valid implementation are: %s"
+            % (implementation, ",".join(TextToSpeech.implementations))
+        )
+
+    version = get_config_snapshot().version
+    key = (implementation, language, version)
+
+    with TTS_INSTANCES_LOCK:
+        if key not in TTS_IMPLEMENTATION_INSTANCES:
+            # Instances for the old config versions are not needed anymore
+            for existing_key in list(TTS_IMPLEMENTATION_INSTANCES.keys()):
+                if existing_key[2] != version:
+                    del TTS_IMPLEMENTATION_INSTANCES[existing_key]
+
+            TTS_IMPLEMENTATION_INSTANCES[key] = TextToSpeech.implementations[implementation]()
+
+        return TTS_IMPLEMENTATION_INSTANCES[key]
+
+
+def split_text_into_segments(text: str, language: str = "en_US") -> List[str]:
+    """
+    Split text into fixed text fragments and numbers which can be synthesized and cached
+    separately and concatenated at playback time.
+
+    Integer part of a number is synthesized as a whole (e.g. "12") and decimal part digit by digit
+    (e.g. "12.05" -> "12", "point", "0", "5") so only a small vocabulary of numbers is needed.
+    """
+    segments: List[str] = []
+
+    def add_text_fragment(fragment: str) -> None:
+        fragment = re.sub(r"\s+", " ", fragment).strip().lstrip(".,:; ")
+
+        # Skip fragments which only contain whitespace and punctuation
+        if re.search(r"\w", fragment):
+            segments.append(fragment)
+
+    position = 0
+
+    for match in NUMBER_RE.finditer(text):
+        add_text_fragment(text[position : match.start()])
+        position = match.end()
+
+        sign, integer_part, decimal_part = match.groups()
+
+        if sign:
+            segments.append(TEXT_MINUS.get(language, TEXT_MINUS["en_US"]))
+
+        segments.append(str(int(integer_part)))
+
+        if decimal_part:
+            segments.append(TEXT_DECIMAL_POINT.get(language, TEXT_DECIMAL_POINT["en_US"]))
+            segments.extend(list(decimal_part))
+
+    add_text_fragment(text[position:])
+
+    return segments
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Index for the synthesized TTS audio files which are cached on disk.
+
+Index is kept in memory and is populated with a single directory scan so cache lookups don't need
+to touch the filesystem. Entries are evicted based on the maximum cache size (least recently used
+entries first) and maximum entry age by a background sweeper thread.
+"""
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Optional
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import structlog
+
+from radio_bridge.configuration import get_config_option
+
+__all__ = [
+    "TTSCacheEntry",
+    "TTSCacheManager",
+    "TTSCacheSweeper",
+    "get_tts_cache_manager",
+    "start_tts_cache_sweeper",
+    "stop_tts_cache_sweeper",
+]
+
+LOG = structlog.getLogger(__name__)
+
+# Default maximum size of all the cached files
+DEFAULT_CACHE_MAX_SIZE_MB = 100
+
+# Default maximum age (in seconds) of a cached file
+DEFAULT_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+# Default interval (in seconds) between cache sweeps
+DEFAULT_CACHE_SWEEP_INTERVAL = 300
+
+# Extensions of the files which are managed by the cache
+CACHED_FILE_EXTENSIONS = [".mp3", ".wav"]
+
+# Maps (cache directory, pid) to a cache manager instance. Index is populated with a directory scan
+# so each process (e.g. plugin executor worker) builds its own index
+TTS_CACHE_MANAGERS: Dict[Tuple[str, int], "TTSCacheManager"] = {}
+TTS_CACHE_MANAGERS_LOCK = threading.Lock()
+
+TTS_CACHE_SWEEPER: Optional["TTSCacheSweeper"] = None
+
+
+class TTSCacheEntry(object):
+    # Size of the file in bytes
+    size: int
+
+    # Unix timestamp of when the file has been synthesized
+    created_at: float
+
+    # Unix timestamp of when the file has been last looked up
+    last_used_at: float
+
+    # Number of lookups which resulted in a cache hit
+    hits: int
+
+    def __init__(self, size: int, created_at: float, last_used_at: float, hits: int = 0):
+        self.size = size
+        self.created_at = created_at
+        self.last_used_at = last_used_at
+        self.hits = hits
+
+    def __repr__(self):
+        return "<TTSCacheEntry size=%s,created_at=%s,last_used_at=%s,hits=%s>" % (
+            self.size,
+            self.created_at,
+            self.last_used_at,
+            self.hits,
+        )
+
+
+class TTSCacheManager(object):
+    """
+    In-memory index of the cached TTS audio files in a single directory.
+
+    Entries are ordered by the last use time so least recently used entries are evicted first.
+    Index is periodically reconciled with the directory content so files written or removed by
+    other processes are picked up.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size_bytes: int,
+        max_age: int,
+        reconcile_interval: float = DEFAULT_CACHE_SWEEP_INTERVAL,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.max_size_bytes = max_size_bytes
+        self.max_age = max_age
+        self.reconcile_interval = reconcile_interval
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._size_bytes = 0
+        self._last_reconcile_time: Optional[float] = None
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "evicted_bytes": 0,
+            "sweeps": 0,
+            "reconciles": 0,
+        }
+
+    def lookup(self, file_path: str) -> bool:
+        """
+        Return True if the provided file is cached and can be used.
+
+        Unless the index needs to be reconciled with the directory content, this method doesn't
+        touch the filesystem. Last use time is only tracked in the in-memory index (writing it to
+        disk on every hit would wear out the SD card).
+
+        This means file could have been removed by the sweeper running in another process since
+        the last reconcile. Callers which run into a missing file should remove() it from the index
+        and synthesize it again.
+        """
+        if self._needs_reconcile():
+            self.reconcile()
+
+        file_path = os.path.abspath(file_path)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(file_path, None)
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return False
+
+            if self._is_expired(entry=entry, now=now):
+                # File will be synthesized again and re-added, or removed on the next sweep
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return False
+
+            entry.last_used_at = now
+            entry.hits += 1
+            self._entries.move_to_end(file_path)
+            self._stats["hits"] += 1
+
+        return True
+
+    def add(self, file_path: str) -> None:
+        """
+        Add newly synthesized file to the index.
+        """
+        file_path = os.path.abspath(file_path)
+
+        try:
+            size = os.stat(file_path).st_size
+        except FileNotFoundError:
+            return
+
+        if size == 0:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._remove_entry(file_path=file_path)
+            self._entries[file_path] = TTSCacheEntry(size=size, created_at=now, last_used_at=now)
+            self._size_bytes += size
+
+    def remove(self, file_path: str) -> None:
+        """
+        Remove the provided file from the index (file itself is not removed).
+        """
+        with self._lock:
+            self._remove_entry(file_path=os.path.abspath(file_path))
+
+    def sweep(self) -> List[str]:
+        """
+        Evict expired entries and least recently used entries until cache size is below the
+        limit. Evicted files are removed from disk.
+
+        Returns a list of evicted file paths.
+        """
+        self.reconcile()
+
+        now = time.time()
+        evicted: List[str] = []
+
+        with self._lock:
+            for file_path, entry in list(self._entries.items()):
+                if self._is_expired(entry=entry, now=now):
+                    evicted.append(file_path)
+                    self._evict_entry(file_path=file_path)
+
+            # Entries are ordered from least to most recently used
+            while self._size_bytes > self.max_size_bytes and self._entries:
+                file_path = next(iter(self._entries))
+                evicted.append(file_path)
+                self._evict_entry(file_path=file_path)
+
+            self._stats["sweeps"] += 1
+
+        # NOTE: We don't hold the lock while removing the files
+        for file_path in evicted:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                LOG.warning("Failed to remove cached TTS file %s: %s" % (file_path, str(e)))
+
+        if evicted:
+            LOG.debug("Evicted %s cached TTS files" % (len(evicted)), **self.get_stats())
+
+        return evicted
+
+    def reconcile(self) -> None:
+        """
+        Synchronize the index with the cache directory content.
+
+        Files which have been added by other processes are added to the index and entries for
+        files which don't exist anymore are removed.
+        """
+        self._last_reconcile_time = time.monotonic()
+
+        try:
+            file_names = os.listdir(self.directory)
+        except FileNotFoundError:
+            file_names = []
+
+        existing: Dict[str, os.stat_result] = {}
+
+        for file_name in file_names:
+            if os.path.splitext(file_name)[1] not in CACHED_FILE_EXTENSIONS:
+                continue
+
+            file_path = os.path.join(self.directory, file_name)
+
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+
+            if stat.st_size > 0:
+                existing[file_path] = stat
+
+        with self._lock:
+            for file_path in list(self._entries.keys()):
+                if file_path not in existing:
+                    self._remove_entry(file_path=file_path)
+
+            # Files we haven't seen yet are inserted at the beginning (least recently used end) in
+            # modification time order. We don't know when they have been last used so we use
+            # modification time.
+            new_file_paths = sorted(
+                [file_path for file_path in existing if file_path not in self._entries],
+                key=lambda file_path: existing[file_path].st_mtime,
+                reverse=True,
+            )
+
+            for file_path in new_file_paths:
+                stat = existing[file_path]
+                self._entries[file_path] = TTSCacheEntry(
+                    size=stat.st_size, created_at=stat.st_mtime, last_used_at=stat.st_mtime
+                )
+                self._entries.move_to_end(file_path, last=False)
+                self._size_bytes += stat.st_size
+
+            self._stats["reconciles"] += 1
+
+    def get_entry(self, file_path: str) -> Optional[TTSCacheEntry]:
+        with self._lock:
+            return self._entries.get(os.path.abspath(file_path), None)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._stats)
+            result["entries"] = len(self._entries)
+            result["size_bytes"] = self._size_bytes
+            result["max_size_bytes"] = self.max_size_bytes
+
+        return result
+
+    def _needs_reconcile(self) -> bool:
+        if self._last_reconcile_time is None:
+            return True
+
+        # Sweeper thread running in this process takes care of reconciling the index
+        if _is_tts_cache_sweeper_running():
+            return False
+
+        return time.monotonic() - self._last_reconcile_time >= self.reconcile_interval
+
+    def _is_expired(self, entry: TTSCacheEntry, now: float) -> bool:
+        return bool(self.max_age) and now - entry.created_at > self.max_age
+
+    def _remove_entry(self, file_path: str) -> None:
+        entry = self._entries.pop(file_path, None)
+
+        if entry is not None:
+            self._size_bytes -= entry.size
+
+    def _evict_entry(self, file_path: str) -> None:
+        entry = self._entries[file_path]
+
+        self._remove_entry(file_path=file_path)
+        self._stats["evictions"] += 1
+        self._stats["evicted_bytes"] += entry.size
+
+
+class TTSCacheSweeper(threading.Thread):
+    """
+    Background thread which periodically evicts entries from the TTS cache.
+    """
+
+    def __init__(self, interval: float = DEFAULT_CACHE_SWEEP_INTERVAL) -> None:
+        super(TTSCacheSweeper, self).__init__(name="tts-cache-sweeper")
+        self.daemon = True
+
+        self.pid = os.getpid()
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                get_tts_cache_manager().sweep()
+            except Exception as e:
+                LOG.exception("Failed to sweep TTS cache: %s" % (str(e)))
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def get_tts_cache_manager() -> TTSCacheManager:
+    """
+    Return cache manager instance for the configured cache directory.
+    """
+    directory = get_config_option("tts", "cache_directory", "str", fallback="/tmp/tts-audio-cache")
+    max_size_mb = get_config_option(
+        "tts", "cache_max_size_mb", "int", fallback=DEFAULT_CACHE_MAX_SIZE_MB
+    )
+    max_age = get_config_option("tts", "cache_max_age", "int", fallback=DEFAULT_CACHE_MAX_AGE)
+    sweep_interval = get_config_option(
+        "tts", "cache_sweep_interval", "int", fallback=DEFAULT_CACHE_SWEEP_INTERVAL
+    )
+
+    key = (directory, os.getpid())
+
+    with TTS_CACHE_MANAGERS_LOCK:
+        manager = TTS_CACHE_MANAGERS.get(key, None)
+
+        if manager is None:
+            manager = TTSCacheManager(
+                directory=directory,
+                max_size_bytes=max_size_mb * 1024 * 1024,
+                max_age=max_age,
+                reconcile_interval=sweep_interval,
+            )
+            TTS_CACHE_MANAGERS[key] = manager
+        else:
+            # Limits could have changed if config has been re-loaded
+            manager.max_size_bytes = max_size_mb * 1024 * 1024
+            manager.max_age = max_age
+            manager.reconcile_interval = sweep_interval
+
+    return manager
+
+
+def _is_tts_cache_sweeper_running() -> bool:
+    return (
+        TTS_CACHE_SWEEPER is not None
+        and TTS_CACHE_SWEEPER.pid == os.getpid()
+        and TTS_CACHE_SWEEPER.is_alive()
+    )
+
+
+def start_tts_cache_sweeper(interval: Optional[float] = None) -> TTSCacheSweeper:
+    """
+    Start background thread which periodically sweeps the TTS cache (if not already running).
+    """
+    global TTS_CACHE_SWEEPER
+
+    if _is_tts_cache_sweeper_running():
+        assert TTS_CACHE_SWEEPER is not None
+        return TTS_CACHE_SWEEPER
+
+    if interval is None:
+        interval = get_config_option(
+            "tts", "cache_sweep_interval", "int", fallback=DEFAULT_CACHE_SWEEP_INTERVAL
+        )
+
+    TTS_CACHE_SWEEPER = TTSCacheSweeper(interval=interval)
+    TTS_CACHE_SWEEPER.start()
+
+    return TTS_CACHE_SWEEPER
+
+
+def stop_tts_cache_sweeper() -> None:
+    global TTS_CACHE_SWEEPER
+
+    if TTS_CACHE_SWEEPER is not None:
+        TTS_CACHE_SWEEPER.stop()
+        TTS_CACHE_SWEEPER = None
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pre-synthesizes phrases which are known on startup (callsign, help text, static plugin responses,
+cron text jobs) so the first plugin run which uses them doesn't need to wait for the TTS.
+"""
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import time
+import threading
+import concurrent.futures
+
+import structlog
+
+from radio_bridge.configuration import get_config_option
+from radio_bridge.plugins.base import BasePlugin
+from radio_bridge.tts import get_text_to_speech
+
+__all__ = ["TTSWarmUp"]
+
+LOG = structlog.getLogger(__name__)
+
+# Default number of phrases which are synthesized in parallel
+DEFAULT_WARM_UP_WORKERS = 2
+
+
+class TTSWarmUp(threading.Thread):
+    """
+    Background thread which synthesizes all the warm up phrases using a bounded worker pool.
+    """
+
+    def __init__(self, plugins: Dict[str, BasePlugin], max_workers: int = DEFAULT_WARM_UP_WORKERS):
+        super(TTSWarmUp, self).__init__(name="tts-warm-up")
+        self.daemon = True
+
+        self._plugins = plugins
+        self._max_workers = max_workers
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+        self._stats: Dict[str, Any] = {
+            "phrases": 0,
+            "completed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "duration_ms": 0,
+            "finished": False,
+        }
+
+    def get_phrases(self) -> List[Tuple[str, str]]:
+        """
+        Return a list of unique (text, language) tuples which should be synthesized.
+        """
+        phrases: List[Tuple[str, str]] = []
+
+        callsign = get_config_option("tx", "callsign", "str", fallback=None)
+
+        if callsign and not (callsign.endswith(".mp3") or callsign.endswith(".wav")):
+            phrases.append((callsign, "en_US"))
+
+        for plugin_name, plugin in self._plugins.items():
+            try:
+                phrases.extend(plugin.get_warm_up_phrases())
+            except Exception as e:
+                LOG.warning(
+                    "Failed to retrieve warm up phrases for plugin %s: %s" % (plugin_name, str(e))
+                )
+
+        # Remove empty and duplicated phrases while preserving the order
+        result: List[Tuple[str, str]] = []
+
+        for phrase in phrases:
+            if phrase[0] and phrase not in result:
+                result.append(phrase)
+
+        return result
+
+    def run(self) -> None:
+        phrases = self.get_phrases()
+        tts = get_text_to_speech(implementation=get_config_option("tts", "implementation"))
+
+        with self._lock:
+            self._stats["phrases"] = len(phrases)
+
+        LOG.info("Starting TTS warm up", phrases=len(phrases), workers=self._max_workers)
+
+        start_time = time.monotonic()
+
+        def synthesize(text: str, language: str) -> float:
+            if self._stopped.is_set():
+                return -1
+
+            phrase_start_time = time.monotonic()
+            tts.text_to_speech(text=text, language=language)
+            return time.monotonic() - phrase_start_time
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="tts-warm-up"
+        ) as executor:
+            future_to_phrase = {
+                executor.submit(synthesize, text, language): (text, language)
+                for text, language in phrases
+            }
+
+            for future in concurrent.futures.as_completed(future_to_phrase):
+                text, language = future_to_phrase[future]
+
+                try:
+                    duration = future.result()
+                except Exception as e:
+                    with self._lock:
+                        self._stats["failed"] += 1
+
+                    LOG.warning('Failed to warm up TTS for text "%s": %s' % (text, str(e)))
+                    continue
+
+                with self._lock:
+                    if duration < 0:
+                        self._stats["skipped"] += 1
+                        continue
+
+                    self._stats["completed"] += 1
+                    progress = "%s/%s" % (
+                        self._stats["completed"] + self._stats["failed"],
+                        len(phrases),
+                    )
+
+                LOG.debug(
+                    'Warmed up TTS for text "%s"' % (text),
+                    language=language,
+                    progress=progress,
+                    duration_ms=int(duration * 1000),
+                )
+
+        with self._lock:
+            self._stats["duration_ms"] = int((time.monotonic() - start_time) * 1000)
+            self._stats["finished"] = True
+
+        LOG.info("TTS warm up finished", **self.get_stats())
+
+    def stop(self) -> None:
+        """
+        Signal the thread to skip all the phrases which haven't been synthesized yet.
+        """
+        self._stopped.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import structlog
+
+__all__ = ["RefreshingCache", "get_refreshing_caches_stats", "stop_refreshing_caches"]
+
+LOG = structlog.getLogger(__name__)
+
+# References to all the caches so we can report their stats and stop them on shutdown
+REFRESHING_CACHES: List["RefreshingCache"] = []
+
+# How long to wait (in seconds) for each background thread to finish when stopping the cache
+DEFAULT_STOP_TIMEOUT = 5
+
+
+class RefreshingCacheEntry(object):
+    def __init__(self, value: Any, fetch_func: Callable[[], Any]) -> None:
+        self.value = value
+        self.fetch_func = fetch_func
+
+        self.fetched_at = time.monotonic()
+        self.last_access_at = self.fetched_at
+
+        # True while background refresh for this entry is in flight
+        self.refreshing = False
+
+
+class RefreshingCache(object):
+    """
+    Stale-while-revalidate cache for data retrieved from remote services.
+
+    Entries which are about to expire are refreshed in the background (both on access and by a
+    background thread for recently used entries) so users rarely need to wait for the upstream
+    fetch. Expired entries keep being served while refresh is in flight and if the upstream
+    service is unavailable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_len: int,
+        max_age: float,
+        refresh_ahead: float = 0.8,
+        max_stale_age: Optional[float] = None,
+        refresh_idle_timeout: Optional[float] = None,
+        is_valid: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        """
+        :param max_age: Number of seconds after which entry is considered stale.
+        :param refresh_ahead: Fraction of max_age after which entry is refreshed in the background.
+        :param max_stale_age: Number of seconds for which stale entry can be served while it's
+                              being refreshed. After that, entry is fetched synchronously (stale
+                              copy is only used if that fetch fails). Defaults to 4 * max_age.
+        :param refresh_idle_timeout: Entries which haven't been accessed for this many seconds are
+                                     not proactively refreshed by the background thread. Defaults
+                                     to 4 * max_age.
+        :param is_valid: Function which returns False for fetched values which shouldn't be
+                         cached (e.g. error responses).
+        """
+        self.name = name
+
+        self._max_len = max_len
+        self._max_age = max_age
+        self._refresh_after = max_age * refresh_ahead
+        self._max_stale_age = max_stale_age if max_stale_age is not None else max_age * 4
+        self._refresh_idle_timeout = (
+            refresh_idle_timeout if refresh_idle_timeout is not None else max_age * 4
+        )
+        self._is_valid = is_valid or (lambda value: True)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+        # Refresher thread can't be shared with forked processes so we track which process has
+        # started it
+        self._pid: Optional[int] = None
+        self._refresher_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        # Threads for refreshes which are in flight
+        self._refresh_threads: Set[threading.Thread] = set()
+
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "last_refresh_latency_ms": 0,
+            "total_refresh_latency_ms": 0,
+        }
+
+        REFRESHING_CACHES.append(self)
+
+    def get(self, key: str, fetch_func: Callable[[], Any]) -> Any:
+        """
+        Return cached value for the provided key and call fetch_func() to retrieve it on cache
+        miss or refresh.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry is not None:
+                entry.last_access_at = now
+                entry.fetch_func = fetch_func
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            age = now - entry.fetched_at
+
+            if age < self._max_age:
+                self._increment_stat("hits")
+
+                if age >= self._refresh_after:
+                    self._schedule_refresh(key=key)
+
+                return entry.value
+
+            if age < self._max_stale_age:
+                self._increment_stat("stale_hits")
+                self._schedule_refresh(key=key)
+                return entry.value
+
+        self._increment_stat("misses")
+
+        try:
+            value = fetch_func()
+        except Exception as e:
+            if entry is None:
+                raise e
+
+            LOG.warning(
+                "Failed to fetch data, using stale cached copy: %s" % (str(e)),
+                cache=self.name,
+                key=key,
+            )
+            self._increment_stat("stale_hits")
+            return entry.value
+
+        if self._is_valid(value):
+            self._set(key=key, value=value, fetch_func=fetch_func)
+        elif entry is not None:
+            self._increment_stat("stale_hits")
+            return entry.value
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stop(self, timeout: Optional[float] = DEFAULT_STOP_TIMEOUT) -> None:
+        """
+        Stop the background refresher thread and wait for the refreshes which are in flight to
+        finish.
+
+        Cache can still be used after it has been stopped, refresher thread is started again when
+        a new entry is stored.
+        """
+        with self._lock:
+            self._stopped.set()
+
+            threads: List[threading.Thread] = list(self._refresh_threads)
+
+            if self._refresher_thread and self._pid == os.getpid():
+                threads.append(self._refresher_thread)
+
+            self._pid = None
+            self._refresher_thread = None
+
+        for thread in threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._stats)
+            result["entries"] = len(self._entries)
+
+        if result["refreshes"]:
+            result["avg_refresh_latency_ms"] = (
+                result["total_refresh_latency_ms"] // result["refreshes"]
+            )
+
+        return result
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _set(self, key: str, value: Any, fetch_func: Callable[[], Any]) -> None:
+        with self._lock:
+            self._entries[key] = RefreshingCacheEntry(value=value, fetch_func=fetch_func)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_len:
+                self._entries.popitem(last=False)
+
+        self._ensure_refresher_started()
+
+    def _schedule_refresh(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry is None or entry.refreshing:
+                return
+
+            entry.refreshing = True
+
+            # NOTE: We use daemon threads so refresh which is in flight doesn't block the shutdown
+            # for longer than stop() timeout. Number of concurrent refreshes is bounded by the
+            # number of entries.
+            thread = threading.Thread(
+                target=self._refresh, args=(key, entry), name="cache-refresh-%s" % (self.name)
+            )
+            thread.daemon = True
+            self._refresh_threads.add(thread)
+
+        thread.start()
+
+    def _refresh(self, key: str, entry: RefreshingCacheEntry) -> None:
+        try:
+            self._refresh_entry(key=key, entry=entry)
+        finally:
+            with self._lock:
+                self._refresh_threads.discard(threading.current_thread())
+
+    def _refresh_entry(self, key: str, entry: RefreshingCacheEntry) -> None:
+        start_time = time.monotonic()
+
+        try:
+            value = entry.fetch_func()
+
+            if not self._is_valid(value):
+                raise ValueError("Fetched value is not valid")
+        except Exception as e:
+            LOG.warning("Failed to refresh cached data: %s" % (str(e)), cache=self.name, key=key)
+
+            with self._lock:
+                self._stats["refresh_failures"] += 1
+                entry.refreshing = False
+
+            return
+
+        latency_ms = int((time.monotonic() - start_time) * 1000)
+
+        with self._lock:
+            self._stats["refreshes"] += 1
+            self._stats["last_refresh_latency_ms"] = latency_ms
+            self._stats["total_refresh_latency_ms"] += latency_ms
+
+            # Entry could have been evicted or replaced in the mean time
+            if self._entries.get(key, None) is entry:
+                new_entry = RefreshingCacheEntry(value=value, fetch_func=entry.fetch_func)
+                new_entry.last_access_at = entry.last_access_at
+                self._entries[key] = new_entry
+
+        LOG.debug("Refreshed cached data", cache=self.name, key=key, latency_ms=latency_ms)
+
+    def _refresh_loop(self, stopped: threading.Event) -> None:
+        """
+        Periodically refresh recently used entries which are about to expire until the cache is
+        stopped.
+        """
+        interval = max(min((self._max_age - self._refresh_after) / 2, 60), 0.05)
+
+        while not stopped.wait(interval):
+            now = time.monotonic()
+
+            with self._lock:
+                keys = [
+                    key
+                    for key, entry in self._entries.items()
+                    if now - entry.fetched_at >= self._refresh_after
+                    and now - entry.last_access_at <= self._refresh_idle_timeout
+                ]
+
+            for key in keys:
+                self._schedule_refresh(key=key)
+
+    def _ensure_refresher_started(self) -> None:
+        pid = os.getpid()
+
+        with self._lock:
+            if self._pid == pid:
+                return
+
+            # NOTE: Each refresher thread gets its own event so thread which is still being
+            # stopped doesn't pick up the event for the new one
+            self._pid = pid
+            self._stopped = threading.Event()
+            self._refresher_thread = threading.Thread(
+                target=self._refresh_loop,
+                args=(self._stopped,),
+                name="cache-refresher-%s" % (self.name),
+            )
+            self._refresher_thread.daemon = True
+            self._refresher_thread.start()
+
+    def _increment_stat(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+def get_refreshing_caches_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Return stats for all the refreshing caches.
+    """
+    return {cache.name: cache.get_stats() for cache in REFRESHING_CACHES}
+
+
+def stop_refreshing_caches(timeout: Optional[float] = DEFAULT_STOP_TIMEOUT) -> None:
+    """
+    Stop background threads for all the refreshing caches.
+    """
+    for cache in REFRESHING_CACHES:
+        cache.stop(timeout=timeout)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional
+
+import time
+import threading
+
+__all__ = [
+    "CancellationToken",
+    "OperationCancelledException",
+    "get_current_cancellation_token",
+    "set_current_cancellation_token",
+]
+
+# Stores cancellation token for the plugin which is running in the current thread
+_THREAD_LOCAL = threading.local()
+
+
+class OperationCancelledException(Exception):
+    pass
+
+
+class CancellationToken(object):
+    """
+    Token which is used to cooperatively cancel a running operation.
+
+    Token is cancelled explicitly using cancel() or implicitly once the deadline (if any) has been
+    reached. Code which is cancellable should periodically call raise_if_cancelled() and use
+    get_remaining_time() as a timeout for blocking calls.
+    """
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        """
+        :param timeout: Number of seconds after which token is automatically cancelled.
+        """
+        self._cancelled = threading.Event()
+        self._deadline = time.monotonic() + timeout if timeout else None
+
+    @property
+    def is_cancelled(self) -> bool:
+        if self._cancelled.is_set():
+            return True
+
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled:
+            raise OperationCancelledException("Operation has been cancelled")
+
+    def get_remaining_time(self, default: Optional[float] = None) -> Optional[float]:
+        """
+        Return number of seconds until the deadline or default if token has no deadline.
+        """
+        if self._deadline is None:
+            return default
+
+        return max(self._deadline - time.monotonic(), 0)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleep for up to timeout seconds. Returns True if the token has been cancelled.
+        """
+        remaining_time = self.get_remaining_time(default=timeout)
+        assert remaining_time is not None
+
+        self._cancelled.wait(min(timeout, remaining_time))
+        return self.is_cancelled
+
+
+def get_current_cancellation_token() -> CancellationToken:
+    """
+    Return cancellation token for the operation running in the current thread.
+
+    If there is none, token which is never cancelled is returned.
+    """
+    token = getattr(_THREAD_LOCAL, "token", None)
+
+    if token is None:
+        return CancellationToken()
+
+    return token
+
+
+def set_current_cancellation_token(token: Optional[CancellationToken]) -> None:
+    _THREAD_LOCAL.token = token
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+__all__ = ["AudioRingBuffer"]
+
+
+class AudioRingBuffer(object):
+    """
+    Preallocated ring buffer for audio samples with a single writer and any number of readers.
+
+    Buffer doesn't use any locks. Writer copies samples into the buffer and only then advances
+    the write position so readers never see partially written samples.
+
+    Each sample is written twice (at index i and i + capacity) so any window which is not longer
+    than the capacity is available as a contiguous slice and can be returned as a view without
+    copying the data.
+
+    Keep in mind that returned windows are views and will be overwritten by the writer once it
+    wraps around so buffer capacity should be much larger than the window size.
+    """
+
+    def __init__(self, capacity: int, dtype: str = "int16"):
+        """
+        :param capacity: Buffer capacity in number of samples.
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be larger than 0")
+
+        self._capacity = capacity
+        self._buffer = np.zeros(capacity * 2, dtype=dtype)
+
+        # Total number of samples written to the buffer since it was created
+        self._write_position = 0
+
+        self._stats = {"written_samples": 0, "missed_samples": 0}
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def write_position(self) -> int:
+        return self._write_position
+
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Write samples to the buffer. Only a single thread should write to the buffer.
+        """
+        count = len(samples)
+        self._stats["written_samples"] += count
+
+        if count > self._capacity:
+            # Only the last <capacity> samples would survive anyway
+            samples = samples[-self._capacity :]
+            self._write_position += count - self._capacity
+            count = self._capacity
+
+        start = self._write_position % self._capacity
+        first_count = min(count, self._capacity - start)
+
+        for offset in [0, self._capacity]:
+            self._buffer[offset + start : offset + start + first_count] = samples[:first_count]
+            self._buffer[offset : offset + count - first_count] = samples[first_count:]
+
+        self._write_position += count
+
+    def get_window(self, position: int, size: int) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Return a tuple with position of the first sample and read only view for samples
+        [position, position + size) or None if those samples haven't been written yet.
+
+        If the requested samples have already been overwritten, window which starts with the
+        oldest available sample is returned instead and number of lost samples is recorded in the
+        "missed_samples" counter.
+        """
+        if size > self._capacity:
+            raise ValueError(
+                "Window size (%s) is larger than capacity (%s)" % (size, self._capacity)
+            )
+
+        write_position = self._write_position
+
+        if position + size > write_position:
+            return None
+
+        oldest_position = write_position - self._capacity
+
+        if position < oldest_position:
+            self._stats["missed_samples"] += oldest_position - position
+            position = oldest_position
+
+        start = position % self._capacity
+        window = self._buffer[start : start + size]
+        window.flags.writeable = False
+
+        return position, window
+
+    def get_oldest_position(self) -> int:
+        """
+        Return position of the oldest sample which is still available in the buffer.
+        """
+        return max(0, self._write_position - self._capacity)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._stats)
@@ -22,8 +22,10 @@ from configobj import ConfigObj
 
 from radio_bridge.configuration import get_plugin_config_option
 from radio_bridge.configuration import set_plugin_config_option
+from radio_bridge.http_client import get_http_client
 from radio_bridge.plugins.base import BasePlugin
 from radio_bridge.plugins import get_plugins_with_dtmf_sequence
+from radio_bridge.utils.cache import stop_refreshing_caches
 
 from tests.unit.base import BaseTestCase
 
@@ -64,11 +66,17 @@ class BasePluginTestCase(BaseTestCase):
         self._config_path = self._temp_path
         os.environ["RADIO_BRIDGE_CONFIG_PATH"] = self._config_path
 
+        # Make sure responses cached on disk by other tests are not used
+        get_http_client().clear_cache()
+
     def tearDown(self):
         super(BasePluginTestCase, self).tearDown()
 
         self._reset_environ()
 
+        # Background refreshes for cached plugin data shouldn't outlive the test
+        stop_refreshing_caches()
+
         if os.path.isfile(self._temp_path):
             os.unlink(self._temp_path)
 
@@ -117,6 +117,22 @@ class CronSayPluginTestCase(BasePluginTestCase):
             ValueError, expected_msg, plugin._parse_and_validate_config, config=plugin_config
         )
 
+    def test_get_warm_up_phrases(self):
+        plugin = CronSayPlugin()
+        plugin.initialize(
+            config={
+                "say_hello": "interval;seconds=300;text;Hello from {callsign}.",
+                "say_time": "interval;seconds=300;text;Current time is {time_utc} UTC.",
+                "say_static": "interval;seconds=300;text;Static text.",
+                "say_morse": "interval;seconds=300;text_to_morse;sos",
+            }
+        )
+
+        self.assertEqual(
+            plugin.get_warm_up_phrases(),
+            [("Hello from TEST.", "en_US"), ("Static text.", "en_US")],
+        )
+
     @mock.patch("radio_bridge.plugins.cron.datetime")
     def test_get_text_format_context(self, mock_datetime):
         mock_datetime.datetime.utcnow.return_value = datetime.datetime(2020, 10, 26, 19, 57)
@@ -17,6 +17,7 @@ import mock
 import datetime
 
 from radio_bridge.plugins.current_time import CurrentTimePlugin
+from radio_bridge.configuration import set_config_option
 
 from tests.unit.plugins.base import BasePluginTestCase
 from tests.unit.plugins.base import MockBasePlugin
@@ -56,3 +57,27 @@ class CurrentTimePluginTestCase(BasePluginTestCase):
 
         self.assertEqual(len(plugin.mock_said_text), 1)
         self.assertEqual(plugin.mock_said_text[0], expected_text)
+
+    def test_get_warm_up_phrases(self):
+        plugin = CurrentTimePluginForTest()
+        plugin.initialize(config={"local_timezone": "CET"})
+
+        set_config_option("tts", "concatenative", "False")
+        self.assertEqual(plugin.get_warm_up_phrases(), [])
+
+        set_config_option("tts", "concatenative", "True")
+        phrases = plugin.get_warm_up_phrases()
+
+        self.assertEqual(
+            phrases[:4],
+            [
+                ("Current time is", "en_US"),
+                ("local.", "en_US"),
+                ("U T C.", "en_US"),
+                ("0", "en_US"),
+            ],
+        )
+        self.assertEqual(len(phrases), 3 + 60)
+        self.assertEqual(phrases[-1], ("59", "en_US"))
+
+        set_config_option("tts", "concatenative", "False")
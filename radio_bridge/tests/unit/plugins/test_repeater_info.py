@@ -15,11 +15,14 @@
 
 import os
 
+import mock
 import requests_mock
 
 from radio_bridge.plugins.repeater_info import REPEATERS_URL_2M
 from radio_bridge.plugins.repeater_info import REPEATERS_URL_70CM
+from radio_bridge.plugins.repeater_info import REPEATERS_INDEX_CACHE
 from radio_bridge.plugins.repeater_info import RepeaterInfoPlugin
+from radio_bridge.http_client import get_http_client
 
 from tests.unit.plugins.base import BasePluginTestCase
 from tests.unit.plugins.base import MockBasePlugin
@@ -153,3 +156,50 @@ CTCSS: 1 2 3 decimal 0 MHz
             m.get(REPEATERS_URL_70CM, text=MOCK_DATA_70CM)
             repeater = plugin._get_repeater_info(100, "uhf")
             self.assertIsNone(repeater)
+
+    def test_repeaters_page_is_parsed_once_per_fetch(self):
+        REPEATERS_INDEX_CACHE.clear()
+        plugin = RepeaterInfoPlugin()
+
+        with requests_mock.Mocker() as m:
+            m.get(REPEATERS_URL_2M, text=MOCK_DATA_2M)
+
+            with mock.patch.object(
+                plugin, "_parse_repeaters_index", wraps=plugin._parse_repeaters_index
+            ) as mock_parse_repeaters_index:
+                repeater1 = plugin._get_repeater_info("1", "vhf")
+                repeater2 = plugin._get_repeater_info("2", "vhf")
+                repeater3 = plugin._get_repeater_info("1", "vhf")
+
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(mock_parse_repeaters_index.call_count, 1)
+
+        self.assertEqual(repeater1.name, "S55VLM")
+        self.assertEqual(repeater2.name, "S55VCM")
+        self.assertTrue(repeater1 is repeater3)
+        self.assertTrue(repeater1.text.startswith("Repeater S55VLM."))
+
+    def test_get_repeater_info_non_200_response_is_not_cached(self):
+        REPEATERS_INDEX_CACHE.clear()
+        plugin = RepeaterInfoPlugin()
+
+        with requests_mock.Mocker() as m:
+            m.get(REPEATERS_URL_70CM, status_code=500, text="error")
+            self.assertIsNone(plugin._get_repeater_info("1", "uhf"))
+
+            m.get(REPEATERS_URL_70CM, text=MOCK_DATA_70CM)
+            self.assertEqual(plugin._get_repeater_info("1", "uhf").name, "S55UBK")
+
+    def test_get_repeater_info_empty_index_is_not_cached(self):
+        REPEATERS_INDEX_CACHE.clear()
+        plugin = RepeaterInfoPlugin()
+
+        # Page without any repeaters (e.g. maintenance page or layout change)
+        with requests_mock.Mocker() as m:
+            m.get(REPEATERS_URL_70CM, text="<html><body></body></html>")
+            self.assertIsNone(plugin._get_repeater_info("1", "uhf"))
+            self.assertFalse(REPEATERS_URL_70CM in REPEATERS_INDEX_CACHE)
+
+            get_http_client().clear_cache()
+            m.get(REPEATERS_URL_70CM, text=MOCK_DATA_70CM)
+            self.assertEqual(plugin._get_repeater_info("1", "uhf").name, "S55UBK")
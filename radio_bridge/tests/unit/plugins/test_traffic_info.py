@@ -67,7 +67,7 @@ class TrafficInfoPluginTrafficEventsTestCase(BasePluginTestCase):
     def setUp(self):
         super(TrafficInfoPluginTrafficEventsTestCase, self).setUp()
 
-        radio_bridge.plugins.traffic_info.URL_RESPONSE_CACHE = {}
+        radio_bridge.plugins.traffic_info.URL_RESPONSE_CACHE.clear()
 
     def test_run_success_en_US(self):
         plugin = TrafficInfoPluginForTest()
@@ -168,7 +168,7 @@ class TrafficInfoPluginBorderCrossingsDelaysTestCase(BasePluginTestCase):
     def setUp(self):
         super(TrafficInfoPluginBorderCrossingsDelaysTestCase, self).setUp()
 
-        radio_bridge.plugins.traffic_info.URL_RESPONSE_CACHE = {}
+        radio_bridge.plugins.traffic_info.URL_RESPONSE_CACHE.clear()
 
     def test_run_success_en_US(self):
         plugin = TrafficInfoPluginForTest()
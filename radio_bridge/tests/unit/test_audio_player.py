@@ -14,11 +14,23 @@
 # limitations under the License.
 
 import os
+import sys
+import wave
+import shutil
+import tempfile
 
 import mock
+import numpy as np
 
+import radio_bridge.audio_player
 from radio_bridge.audio_player import AudioPlayer
+from radio_bridge.audio_player import DecodedAudioCache
+from radio_bridge.audio_player import PyAudioPlayerBackend
+from radio_bridge.audio_player import ExternalAudioPlayerBackend
+from radio_bridge.audio_player import decode_audio_file
+from radio_bridge.audio_player import get_audio_player_backend
 from radio_bridge.audio_player import get_audio_file_duration
+from radio_bridge.tts_cache import TTSCacheManager
 
 from tests.unit.base import BaseTestCase
 
@@ -42,6 +54,10 @@ class AudioPlayerTestCase(BaseTestCase):
     It's relatively hard to test this functionality end to end so we use mocking.
     """
 
+    def setUp(self):
+        super(AudioPlayerTestCase, self).setUp()
+        radio_bridge.audio_player.DECODED_AUDIO_CACHE = None
+
     @mock.patch("shutil.which", mock.Mock(return_value="/bin/mpg123"))
     @mock.patch("subprocess.run")
     def test_play_mp3(self, mock_run):
@@ -68,3 +84,169 @@ class AudioPlayerTestCase(BaseTestCase):
 
         duration = get_audio_file_duration(WAV_FILE_PATH)
         self.assertEqual(duration, 6.048)
+
+    @mock.patch("shutil.which", mock.Mock(return_value="/bin/aplay"))
+    @mock.patch("subprocess.run")
+    def test_play_files_external_backend_single_process_gapless(self, mock_run):
+        played_files = []
+
+        def mock_aplay(args, **kwargs):
+            file_path = args.split(" ")[-1]
+
+            with wave.open(file_path, "rb") as fp:
+                played_files.append((file_path, fp.getframerate(), fp.getnframes()))
+
+        mock_run.side_effect = mock_aplay
+
+        audio_player = AudioPlayer(backend="external")
+        audio_player.play_files(file_paths=[WAV_FILE_PATH, WAV_FILE_PATH])
+
+        # Both clips are concatenated and played using a single aplay process
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(len(played_files), 1)
+
+        file_path, sample_rate, frames_count = played_files[0]
+        self.assertEqual(sample_rate, 48000)
+        self.assertEqual(frames_count, 145152 * 2 * 2)
+
+        # Temporary file is removed after playback
+        self.assertFalse(os.path.exists(file_path))
+
+        stats = audio_player.get_stats()
+        self.assertEqual(stats["plays"], 1)
+        self.assertEqual(stats["clips"], 2)
+
+        # Playback start can't be measured when using external binaries
+        self.assertFalse("last_start_latency_ms" in stats)
+        self.assertFalse("avg_start_latency_ms" in stats)
+
+    def test_decode_wav_file(self):
+        # Fixture is 24 kHz mono
+        samples = decode_audio_file(WAV_FILE_PATH, sample_rate=24000)
+        self.assertEqual(samples.dtype, np.int16)
+        self.assertEqual(len(samples), 145152)
+
+        samples = decode_audio_file(WAV_FILE_PATH, sample_rate=48000)
+        self.assertEqual(samples.dtype, np.int16)
+        self.assertEqual(len(samples), 145152 * 2)
+
+    def test_play_files_pyaudio_backend_single_stream_gapless(self):
+        mock_stream = mock.Mock()
+        mock_stream.get_output_latency.return_value = 0.0
+
+        backend = PyAudioPlayerBackend(sample_rate=24000)
+        backend._open_stream = mock.Mock(return_value=mock_stream)
+
+        backend.play_files(file_paths=[WAV_FILE_PATH, WAV_FILE_PATH])
+        backend.play_files(file_paths=[WAV_FILE_PATH])
+
+        # Stream is opened only once and both clips are written as a single buffer
+        self.assertEqual(backend._open_stream.call_count, 1)
+        self.assertEqual(mock_stream.write.call_count, 2)
+        self.assertEqual(len(mock_stream.write.call_args_list[0][0][0]), 145152 * 2 * 2)
+
+        stats = backend.get_stats()
+        self.assertEqual(stats["plays"], 2)
+        self.assertEqual(stats["clips"], 3)
+        self.assertTrue("avg_start_latency_ms" in stats)
+
+        # File has only been decoded once
+        cache_stats = radio_bridge.audio_player.get_decoded_audio_cache().get_stats()
+        self.assertEqual(cache_stats["misses"], 1)
+        self.assertEqual(cache_stats["hits"], 2)
+
+    def test_play_files_pyaudio_backend_close_stream_after_playback(self):
+        mock_stream = mock.Mock()
+        mock_stream.get_output_latency.return_value = 0.0
+
+        backend = PyAudioPlayerBackend(sample_rate=24000, keep_stream_open=False)
+        backend._open_stream = mock.Mock(return_value=mock_stream)
+
+        backend.play_files(file_paths=[WAV_FILE_PATH])
+        backend.play_files(file_paths=[WAV_FILE_PATH])
+
+        self.assertEqual(backend._open_stream.call_count, 2)
+        self.assertEqual(mock_stream.close.call_count, 2)
+
+    def test_get_audio_player_backend_fallback(self):
+        with mock.patch.dict(sys.modules, {"pyaudio": None}):
+            with mock.patch.dict("radio_bridge.audio_player.BACKEND_INSTANCES", clear=True):
+                backend = get_audio_player_backend("pyaudio")
+                self.assertTrue(isinstance(backend, ExternalAudioPlayerBackend))
+
+    def test_decoded_audio_cache_lru_eviction(self):
+        cache = DecodedAudioCache(max_size_bytes=2 * 100 * 2)
+        decode_func = mock.Mock(side_effect=lambda: np.zeros(100, dtype=np.int16))
+
+        for sample_rate in [8000, 16000, 8000, 24000]:
+            samples = cache.get_samples(
+                file_path=WAV_FILE_PATH, sample_rate=sample_rate, decode_func=decode_func
+            )
+            self.assertFalse(samples.flags.writeable)
+
+        stats = cache.get_stats()
+        self.assertEqual(decode_func.call_count, 3)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["size_bytes"], 400)
+
+        # 16000 was least recently used and has been evicted
+        cache.get_samples(file_path=WAV_FILE_PATH, sample_rate=8000, decode_func=decode_func)
+        self.assertEqual(decode_func.call_count, 3)
+        cache.get_samples(file_path=WAV_FILE_PATH, sample_rate=16000, decode_func=decode_func)
+        self.assertEqual(decode_func.call_count, 4)
+
+    def test_get_audio_file_duration_cached_until_file_changes(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+
+        file_path = os.path.join(temp_dir, "test.mp3")
+        shutil.copy(MP3_FILE_PATH, file_path)
+
+        self.assertEqual(get_audio_file_duration(file_path), 6.048)
+        self.assertEqual(get_audio_file_duration(file_path), 6.048)
+
+        cache_stats = radio_bridge.audio_player.get_decoded_audio_cache().get_stats()
+        self.assertEqual(cache_stats["misses"], 1)
+        self.assertEqual(cache_stats["hits"], 1)
+
+        # Modified file should be parsed again
+        os.utime(file_path, ns=(0, 0))
+        self.assertEqual(get_audio_file_duration(file_path), 6.048)
+
+        # Entry for the previous version is evicted right away
+        cache_stats = radio_bridge.audio_player.get_decoded_audio_cache().get_stats()
+        self.assertEqual(cache_stats["misses"], 2)
+        self.assertEqual(cache_stats["invalidations"], 1)
+        self.assertEqual(cache_stats["entries"], 1)
+        self.assertEqual(cache_stats["size_bytes"], 64)
+
+    def test_cached_tts_file_is_decoded_once(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+
+        file_path = os.path.join(temp_dir, "hello.wav")
+        shutil.copy(WAV_FILE_PATH, file_path)
+
+        mock_stream = mock.Mock()
+        mock_stream.get_output_latency.return_value = 0.0
+
+        backend = PyAudioPlayerBackend(sample_rate=24000)
+        backend._open_stream = mock.Mock(return_value=mock_stream)
+
+        # TTS cache hit shouldn't modify the file and invalidate the decoded samples
+        tts_cache_manager = TTSCacheManager(directory=temp_dir, max_size_bytes=10 ** 7, max_age=0)
+        self.assertTrue(tts_cache_manager.lookup(file_path))
+
+        backend.play_files(file_paths=[file_path])
+
+        self.assertTrue(tts_cache_manager.lookup(file_path))
+        backend.play_files(file_paths=[file_path])
+
+        cache_stats = radio_bridge.audio_player.get_decoded_audio_cache().get_stats()
+        self.assertEqual(cache_stats["misses"], 1)
+        self.assertEqual(cache_stats["hits"], 1)
+        self.assertEqual(cache_stats["invalidations"], 0)
+        self.assertEqual(cache_stats["entries"], 1)
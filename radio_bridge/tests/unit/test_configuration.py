@@ -25,6 +25,10 @@ from radio_bridge.configuration import get_config_option
 from radio_bridge.configuration import get_plugin_config
 from radio_bridge.configuration import get_plugin_config_option
 from radio_bridge.configuration import set_config_option
+from radio_bridge.configuration import get_config_snapshot
+from radio_bridge.configuration import get_config_stats
+from radio_bridge.configuration import start_config_watcher
+from radio_bridge.configuration import stop_config_watcher
 
 __all__ = ["ConfigurationTestCase"]
 
@@ -48,6 +52,7 @@ class ConfigurationTestCase(unittest.TestCase):
     def tearDown(self):
         super(ConfigurationTestCase, self).tearDown()
         self._reset_environ()
+        stop_config_watcher()
 
     def _reset_environ(self):
         if "RADIO_BRIDGE_CONFIG_PATH" in os.environ:
@@ -171,3 +176,85 @@ class ConfigurationTestCase(unittest.TestCase):
 
         expected_msg = "Logging config with path \"invalid\" doesn't exist or it's not a file"
         self.assertRaisesRegex(ValueError, expected_msg, _get_config, force_load=True)
+
+    def test_config_snapshot_memoized_typed_lookups(self):
+        os.environ["RADIO_BRIDGE_CONFIG_PATH"] = CONFIG_PATH_1
+
+        snapshot = get_config_snapshot()
+        self.assertEqual(snapshot.stats, {"lookups": 0, "cache_hits": 0, "cache_misses": 0})
+
+        self.assertEqual(get_config_option("main", "dev_mode", "bool"), True)
+        self.assertEqual(get_config_option("main", "dev_mode", "bool"), True)
+        self.assertEqual(get_config_option("main", "dev_mode", "str"), "True")
+        self.assertEqual(get_config_option("audio", "sample_rate", "int"), 48000)
+        self.assertEqual(get_config_option("audio", "sample_rate", "float"), 48000.0)
+
+        self.assertEqual(snapshot.stats, {"lookups": 5, "cache_hits": 1, "cache_misses": 4})
+
+        # Missing values are memoized as well
+        self.assertEqual(get_config_option("tx", "invalid", "int", fallback=1), 1)
+        self.assertEqual(get_config_option("tx", "invalid", "int", fallback=2), 2)
+        self.assertRaises(KeyError, get_config_option, "tx", "invalid", "int")
+        self.assertEqual(snapshot.stats, {"lookups": 8, "cache_hits": 3, "cache_misses": 5})
+
+        # Snapshot is read-only, sections are returned as copies
+        section = snapshot.get_section("tx")
+        section["callsign"] = "MODIFIED"
+        self.assertEqual(snapshot.get("tx", "callsign"), "ABCD")
+
+        stats = get_config_stats()
+        self.assertEqual(stats["version"], snapshot.version)
+        self.assertEqual(stats["lookups"], 9)
+        self.assertFalse(stats["watcher_running"])
+
+    def test_set_config_option_publishes_new_snapshot(self):
+        os.environ["RADIO_BRIDGE_CONFIG_PATH"] = self._temp_path_1
+
+        snapshot_1 = get_config_snapshot()
+        self.assertEqual(get_config_option("tx", "callsign"), "ABCD")
+
+        set_config_option("tx", "callsign", "UPDATED", write_to_disk=False)
+
+        snapshot_2 = get_config_snapshot()
+        self.assertEqual(snapshot_2.version, snapshot_1.version + 1)
+        self.assertEqual(get_config_option("tx", "callsign"), "UPDATED")
+
+        # Old snapshot is not modified
+        self.assertEqual(snapshot_1.get("tx", "callsign"), "ABCD")
+
+    def test_config_file_mtime_check_is_rate_limited(self):
+        os.environ["RADIO_BRIDGE_CONFIG_PATH"] = self._temp_path_1
+
+        _get_config()
+        mtime_checks = get_config_stats()["mtime_checks"]
+
+        for index in range(0, 100):
+            get_config_option("tx", "callsign")
+
+        self.assertEqual(get_config_stats()["mtime_checks"], mtime_checks)
+
+    def test_config_watcher_reloads_modified_config(self):
+        os.environ["RADIO_BRIDGE_CONFIG_PATH"] = self._temp_path_1
+
+        self.assertEqual(get_config_option("tx", "callsign"), "ABCD")
+        version = get_config_stats()["version"]
+
+        watcher = start_config_watcher(interval=0.1)
+        self.assertTrue(get_config_stats()["watcher_running"])
+        self.assertEqual(start_config_watcher(interval=0.1), watcher)
+
+        with open(self._temp_path_1, "r") as fp:
+            content = fp.read()
+
+        time.sleep(1)
+
+        with open(self._temp_path_1, "w") as fp:
+            fp.write(content.replace("ABCD", "WATCHED"))
+
+        for index in range(0, 20):
+            if get_config_stats()["version"] > version:
+                break
+
+            time.sleep(0.1)
+
+        self.assertEqual(get_config_option("tx", "callsign"), "WATCHED")
@@ -14,11 +14,25 @@
 # limitations under the License.
 
 import os
+import glob
 import unittest
 
+import numpy as np
+from scipy.io import wavfile
+
+from radio_bridge.dtmf import DTMFDecoder
 from radio_bridge.dtmf import FFTDTMFDecoderImplementation
+from radio_bridge.dtmf import GoertzelDTMFDecoderImplementation
+from radio_bridge.dtmf import StreamingDTMFDetector
+from radio_bridge.dtmf import DTMFEvent
+from radio_bridge.dtmf import DTMF_TABLE_HIGH_LOW
 
-__all__ = ["TestFFTDTMFDecoder"]
+__all__ = [
+    "TestFFTDTMFDecoder",
+    "TestGoertzelDTMFDecoder",
+    "TestDTMFDecoder",
+    "TestStreamingDTMFDetector",
+]
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FIXTURES_DIR = os.path.abspath(os.path.join(BASE_DIR, "../fixtures/dtmf"))
@@ -66,3 +80,281 @@ class TestFFTDTMFDecoder(unittest.TestCase):
             file_path = os.path.join(FIXTURES_DIR, "audiochecknet/", file_path)
             decoder = FFTDTMFDecoderImplementation(file_path=file_path)
             self.assertEqual(decoder.decode(), expected_code)
+
+    def test_decode_batch_mode_returns_same_result_as_window_mode(self):
+        file_paths = glob.glob(os.path.join(FIXTURES_DIR, "*/*.wav"))
+        self.assertTrue(file_paths)
+
+        for file_path in file_paths:
+            for return_on_first_char in [True, False]:
+                decoder = FFTDTMFDecoderImplementation(file_path=file_path, batch_mode=False)
+                expected_result = decoder.decode(return_on_first_char=return_on_first_char)
+
+                decoder = FFTDTMFDecoderImplementation(file_path=file_path, batch_mode=True)
+                result = decoder.decode(return_on_first_char=return_on_first_char)
+
+                self.assertEqual(result, expected_result, file_path)
+
+    def test_decode_frequency_bins_are_cached(self):
+        file_path = os.path.join(FIXTURES_DIR, "audiochecknet/audiocheck.net_dtmf_1.wav")
+
+        for batch_mode in [True, False]:
+            decoder = FFTDTMFDecoderImplementation(file_path=file_path, batch_mode=batch_mode)
+            self.assertEqual(decoder.get_stats(), {"cache_hits": 0, "cache_misses": 0})
+
+            self.assertEqual(decoder.decode(), "1")
+            self.assertEqual(decoder.get_stats(), {"cache_hits": 0, "cache_misses": 1})
+
+            self.assertEqual(decoder.decode(), "1")
+            self.assertEqual(decoder.decode(), "1")
+            self.assertEqual(decoder.get_stats(), {"cache_hits": 2, "cache_misses": 1})
+
+
+class TestGoertzelDTMFDecoder(unittest.TestCase):
+    def test_decode_anytone_578_dtmf_data(self):
+        values = [
+            ("1.wav", "1"),
+            ("2.wav", "2"),
+            ("3.wav", "3"),
+            ("4.wav", "4"),
+            ("5.wav", "5"),
+            ("6.wav", "6"),
+            ("7.wav", "7"),
+            ("8.wav", "8"),
+            ("9.wav", "9"),
+            ("*.wav", "*"),
+            ("0.wav", "0"),
+            ("#.wav", "#"),
+        ]
+
+        for file_path, expected_code in values:
+            file_path = os.path.join(FIXTURES_DIR, "anytone_578/", file_path)
+            decoder = GoertzelDTMFDecoderImplementation(file_path=file_path)
+            self.assertEqual(decoder.decode(), expected_code)
+
+    def test_decode_audio_check_tone_generator_data(self):
+        values = [
+            ("audiocheck.net_dtmf_1.wav", "1"),
+            ("audiocheck.net_dtmf_2.wav", "2"),
+            ("audiocheck.net_dtmf_3.wav", "3"),
+            ("audiocheck.net_dtmf_4.wav", "4"),
+            ("audiocheck.net_dtmf_5.wav", "5"),
+            ("audiocheck.net_dtmf_6.wav", "6"),
+            ("audiocheck.net_dtmf_7.wav", "7"),
+            ("audiocheck.net_dtmf_8.wav", "8"),
+            ("audiocheck.net_dtmf_9.wav", "9"),
+            ("audiocheck.net_dtmf_*.wav", "*"),
+            ("audiocheck.net_dtmf_0.wav", "0"),
+            ("audiocheck.net_dtmf_#.wav", "#"),
+        ]
+
+        for file_path, expected_code in values:
+            file_path = os.path.join(FIXTURES_DIR, "audiochecknet/", file_path)
+            decoder = GoertzelDTMFDecoderImplementation(file_path=file_path)
+            self.assertEqual(decoder.decode(), expected_code)
+
+    def test_decode_anytone_578_dtmf_sequence(self):
+        file_path = os.path.join(FIXTURES_DIR, "anytone_578/dtmf_codes_1-#_anytone_578.wav")
+        decoder = GoertzelDTMFDecoderImplementation(file_path=file_path)
+        self.assertEqual(decoder.decode(return_on_first_char=False), "123456789*0#")
+
+
+class TestDTMFDecoder(unittest.TestCase):
+    def test_decode_buffer(self):
+        file_path = os.path.join(FIXTURES_DIR, "anytone_578/dtmf_codes_1-#_anytone_578.wav")
+        sample_rate, samples = wavfile.read(file_path)
+
+        for implementation in DTMFDecoder.implementations.keys():
+            decoder = DTMFDecoder(file_path=file_path, implementation=implementation)
+            expected_result = decoder.decode(return_on_first_char=False)
+
+            # numpy array
+            result = decoder.decode_buffer(
+                samples=samples, sample_rate=sample_rate, return_on_first_char=False
+            )
+            self.assertEqual(result, expected_result)
+
+            # raw PCM bytes
+            result = decoder.decode_buffer(
+                samples=samples.tobytes(), sample_rate=sample_rate, return_on_first_char=False
+            )
+            self.assertEqual(result, expected_result)
+
+            result = decoder.decode_buffer(samples=samples.tobytes(), sample_rate=sample_rate)
+            self.assertEqual(result, "1")
+
+    def test_decode_buffer_squelch_gate(self):
+        file_path = os.path.join(FIXTURES_DIR, "anytone_578/1.wav")
+        sample_rate, samples = wavfile.read(file_path)
+        silence = np.zeros(len(samples), dtype=np.int16) + 200
+
+        for implementation in DTMFDecoder.implementations.keys():
+            decoder = DTMFDecoder(implementation=implementation, squelch_threshold=100)
+
+            # DC offset alone doesn't open the squelch
+            self.assertEqual(decoder.decode_buffer(samples=silence, sample_rate=sample_rate), "")
+            self.assertEqual(decoder.decode_buffer(samples=samples, sample_rate=sample_rate), "1")
+
+            stats = decoder.get_stats()
+            self.assertEqual(stats["gated_frames"], 1)
+            self.assertEqual(stats["decoded_frames"], 1)
+
+        # Signal which is below the threshold is gated
+        decoder = DTMFDecoder(squelch_threshold=100000)
+        self.assertEqual(decoder.decode_buffer(samples=samples, sample_rate=sample_rate), "")
+        self.assertEqual(decoder.get_stats()["gated_frames"], 1)
+
+        # Squelch gate is disabled by default
+        decoder = DTMFDecoder()
+        self.assertEqual(decoder.decode_buffer(samples=silence, sample_rate=sample_rate), "")
+        self.assertEqual(decoder.get_stats()["gated_frames"], 0)
+        self.assertEqual(decoder.get_stats()["decoded_frames"], 1)
+
+    def test_decode_buffer_decimate(self):
+        file_path = os.path.join(FIXTURES_DIR, "anytone_578/dtmf_codes_1-#_anytone_578.wav")
+        sample_rate, samples = wavfile.read(file_path)
+
+        decoder = DTMFDecoder(implementation="goertzel", decimate=True)
+        result = decoder.decode_buffer(
+            samples=samples, sample_rate=sample_rate, return_on_first_char=False
+        )
+        self.assertEqual(result, "123456789*0#")
+
+        for file_path in glob.glob(os.path.join(FIXTURES_DIR, "anytone_578/?.wav")):
+            expected_result = os.path.basename(file_path)[0]
+            sample_rate, samples = wavfile.read(file_path)
+
+            decoder = DTMFDecoder(implementation="goertzel", decimate=True)
+            result = decoder.decode_buffer(samples=samples, sample_rate=sample_rate)
+            self.assertEqual(result, expected_result)
+
+    def test_decimate_not_supported_by_fft_implementation(self):
+        self.assertRaisesRegex(
+            ValueError,
+            "Decimation is not supported by implementation fft",
+            DTMFDecoder,
+            implementation="fft",
+            decimate=True,
+        )
+
+    def test_decode_buffer_input_shorter_than_window(self):
+        for implementation in DTMFDecoder.implementations.keys():
+            decoder = DTMFDecoder(implementation=implementation)
+            result = decoder.decode_buffer(samples=b"\x00\x00" * 10, sample_rate=8000)
+            self.assertEqual(result, "")
+
+
+class TestStreamingDTMFDetector(unittest.TestCase):
+    sample_rate = 8000
+
+    def _get_tone(self, char: str, duration: float) -> np.ndarray:
+        high, low = DTMF_TABLE_HIGH_LOW[char]
+        t = np.arange(int(self.sample_rate * duration)) / self.sample_rate
+        return (8000 * (np.sin(2 * np.pi * low * t) + np.sin(2 * np.pi * high * t))).astype(
+            np.int16
+        )
+
+    def _get_silence(self, duration: float) -> np.ndarray:
+        return np.zeros(int(self.sample_rate * duration), dtype=np.int16)
+
+    def _get_chars(self, samples: np.ndarray) -> str:
+        detector = StreamingDTMFDetector(sample_rate=self.sample_rate)
+        return "".join([event.char for event in detector.process(samples)])
+
+    def test_process_result_doesnt_depend_on_chunk_size(self):
+        file_path = os.path.join(FIXTURES_DIR, "anytone_578/dtmf_codes_1-#_anytone_578.wav")
+        sample_rate, samples = wavfile.read(file_path)
+
+        for chunk_size in [37, 1000, 4096, len(samples)]:
+            detector = StreamingDTMFDetector(sample_rate=sample_rate)
+
+            events = []
+            for index in range(0, len(samples), chunk_size):
+                events.extend(detector.process(samples[index : index + chunk_size].tobytes()))
+
+            self.assertEqual("".join([event.char for event in events]), "123456789*0#")
+
+    def test_process_repeated_digit(self):
+        # Repeated digits separated by a valid pause are reported as two events
+        samples = np.concatenate(
+            [
+                self._get_silence(0.1),
+                self._get_tone("5", 0.06),
+                self._get_silence(0.06),
+                self._get_tone("5", 0.06),
+                self._get_silence(0.1),
+            ]
+        )
+        self.assertEqual(self._get_chars(samples), "55")
+
+        # Short drop out in the middle of a tone is not detected as a new key press
+        samples = np.concatenate(
+            [
+                self._get_silence(0.1),
+                self._get_tone("5", 0.06),
+                self._get_silence(0.015),
+                self._get_tone("5", 0.06),
+                self._get_silence(0.1),
+            ]
+        )
+        self.assertEqual(self._get_chars(samples), "5")
+
+    def test_process_minimum_tone_duration(self):
+        for duration, expected_result in [(0.015, ""), (0.02, ""), (0.04, "7"), (0.1, "7")]:
+            samples = np.concatenate(
+                [self._get_silence(0.1), self._get_tone("7", duration), self._get_silence(0.1)]
+            )
+            self.assertEqual(self._get_chars(samples), expected_result)
+
+    def test_process_event_position(self):
+        samples = np.concatenate(
+            [self._get_silence(0.5), self._get_tone("#", 0.1), self._get_silence(0.1)]
+        )
+        detector = StreamingDTMFDetector(sample_rate=self.sample_rate)
+        events = detector.process(samples)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].char, "#")
+        self.assertTrue(abs(events[0].sample - 4000) <= 4)
+        self.assertEqual(events[0].time, events[0].sample / self.sample_rate)
+
+        # After reset, position starts from 0 again
+        detector.reset()
+        events = detector.process(samples)
+        self.assertEqual(len(events), 1)
+        self.assertTrue(abs(events[0].sample - 4000) <= 4)
+
+    def test_process_event_position_is_not_aligned_to_hop_grid(self):
+        # Detector hop is 80 samples, tone onsets are between the hop grid points
+        for onset in [4013, 4040, 4079]:
+            samples = np.concatenate(
+                [
+                    np.zeros(onset, dtype=np.int16),
+                    self._get_tone("3", 0.1),
+                    self._get_silence(0.1),
+                ]
+            )
+
+            # Onset is also found when it's close to the chunk boundary
+            for chunk_size in [37, 4000, len(samples)]:
+                detector = StreamingDTMFDetector(sample_rate=self.sample_rate)
+
+                events = []
+                for index in range(0, len(samples), chunk_size):
+                    events.extend(detector.process(samples[index : index + chunk_size]))
+
+                self.assertEqual([event.char for event in events], ["3"])
+                self.assertTrue(
+                    abs(events[0].sample - onset) <= 4,
+                    "Expected onset %s, got %s" % (onset, events[0].sample),
+                )
+
+    def test_event_equality_and_hash(self):
+        event1 = DTMFEvent(char="1", sample=100, time=0.0125)
+        event2 = DTMFEvent(char="1", sample=100, time=0.0125)
+        event3 = DTMFEvent(char="2", sample=100, time=0.0125)
+
+        self.assertEqual(event1, event2)
+        self.assertNotEqual(event1, event3)
+        self.assertNotEqual(event1, ("1", 100))
+        self.assertEqual(len(set([event1, event2, event3])), 2)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from radio_bridge.http_cache import HTTPResponseCache
+
+__all__ = ["HTTPResponseCacheTestCase"]
+
+
+def get_mock_response(content: bytes, headers=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = "utf-8"
+    response._content = content
+    return response
+
+
+class HTTPResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        super(HTTPResponseCacheTestCase, self).setUp()
+
+        self._cache_directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(HTTPResponseCacheTestCase, self).tearDown()
+
+        shutil.rmtree(self._cache_directory, ignore_errors=True)
+
+    def test_set_and_get(self):
+        cache = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=1024 * 1024)
+        url = "https://www.example.com/1"
+
+        self.assertIsNone(cache.get(url))
+
+        cache.set(url, get_mock_response(b"data\nmore data", headers={"ETag": '"abc"'}))
+
+        # Entries are shared between cache instances (processes) which use the same directory
+        entry = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=1024).get(url)
+        self.assertEqual(entry.url, url)
+        self.assertEqual(entry.status_code, 200)
+        self.assertEqual(entry.etag, '"abc"')
+        self.assertIsNone(entry.last_modified)
+        self.assertTrue(entry.age < 1)
+
+        response = entry.to_response()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "data\nmore data")
+        self.assertEqual(response.headers["etag"], '"abc"')
+        self.assertTrue(response.from_cache)
+
+        # No temporary files are left behind
+        self.assertEqual(len(os.listdir(self._cache_directory)), 1)
+
+        cache.clear()
+        self.assertIsNone(cache.get(url))
+
+    def test_touch_updates_stored_at_and_headers(self):
+        cache = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=1024 * 1024)
+        url = "https://www.example.com/1"
+
+        entry = cache.set(url, get_mock_response(b"data", headers={"ETag": '"abc"'}))
+        entry.stored_at -= 100
+        self.assertTrue(entry.age >= 100)
+
+        cache.touch(entry, headers={"ETag": '"def"'})
+
+        entry = cache.get(url)
+        self.assertTrue(entry.age < 1)
+        self.assertEqual(entry.etag, '"def"')
+        self.assertEqual(entry.content, b"data")
+
+    def test_corrupted_entry_is_removed(self):
+        cache = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=1024 * 1024)
+        url = "https://www.example.com/1"
+
+        cache.set(url, get_mock_response(b"data"))
+
+        file_path = os.path.join(self._cache_directory, os.listdir(self._cache_directory)[0])
+        with open(file_path, "wb") as fp:
+            fp.write(b"{invalid")
+
+        self.assertIsNone(cache.get(url))
+        self.assertFalse(os.path.exists(file_path))
+        self.assertEqual(cache.get_stats()["read_errors"], 1)
+
+    def test_size_limit_is_enforced(self):
+        cache = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=2500)
+
+        for index in range(1, 4):
+            cache.set("https://www.example.com/%s" % (index), get_mock_response(b"a" * 1000))
+
+            # Make sure modification times differ
+            file_path = cache._get_file_path("https://www.example.com/%s" % (index))
+            os.utime(file_path, (time.time() - 10 + index, time.time() - 10 + index))
+
+        cache.enforce_size_limit()
+
+        # Least recently stored entries are removed first
+        self.assertIsNone(cache.get("https://www.example.com/1"))
+        self.assertIsNotNone(cache.get("https://www.example.com/3"))
+        self.assertTrue(cache.get_stats()["evictions"] >= 1)
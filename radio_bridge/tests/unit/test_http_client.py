@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import tempfile
+
+import requests
+import requests_mock
+
+from radio_bridge.http_cache import HTTPResponseCache
+from radio_bridge.http_client import HTTPClient
+from radio_bridge.http_client import get_http_client
+from radio_bridge.utils.cancellation import CancellationToken
+from radio_bridge.utils.cancellation import OperationCancelledException
+from radio_bridge.utils.cancellation import set_current_cancellation_token
+
+from tests.unit.base import BaseTestCase
+
+__all__ = ["HTTPClientTestCase"]
+
+
+class HTTPClientTestCase(BaseTestCase):
+    def setUp(self):
+        super(HTTPClientTestCase, self).setUp()
+
+        self._cache_directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(HTTPClientTestCase, self).tearDown()
+
+        set_current_cancellation_token(None)
+        shutil.rmtree(self._cache_directory, ignore_errors=True)
+
+    def test_get_http_client_is_cached(self):
+        self.assertTrue(get_http_client() is get_http_client())
+
+    def test_session_is_configured_with_retries(self):
+        client = HTTPClient(retries=3, backoff_factor=0.1, pool_maxsize=2)
+
+        adapter = client._session.get_adapter("https://www.example.com")
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertEqual(adapter.max_retries.backoff_factor, 0.1)
+        self.assertEqual(list(adapter.max_retries.status_forcelist), [502, 503, 504])
+        self.assertEqual(adapter._pool_maxsize, 2)
+
+    def test_default_timeout_is_used(self):
+        client = HTTPClient(connect_timeout=2, read_timeout=10)
+
+        with requests_mock.Mocker() as m:
+            m.get("https://www.example.com/1", text="ok")
+            response = client.get("https://www.example.com/1")
+
+            self.assertEqual(response.text, "ok")
+            self.assertEqual(m.request_history[0].timeout, (2, 10))
+
+            # Explicitly provided timeout
+            client.get("https://www.example.com/1", timeout=1)
+            self.assertEqual(m.request_history[1].timeout, (1, 1))
+
+    def test_timeout_is_capped_by_remaining_plugin_run_time(self):
+        client = HTTPClient(connect_timeout=2, read_timeout=10)
+        set_current_cancellation_token(CancellationToken(timeout=5))
+
+        with requests_mock.Mocker() as m:
+            m.get("https://www.example.com/1", text="ok")
+            client.get("https://www.example.com/1")
+
+            connect_timeout, read_timeout = m.request_history[0].timeout
+            self.assertEqual(connect_timeout, 2)
+            self.assertTrue(4 < read_timeout <= 5)
+
+        # Cancelled run shouldn't perform any requests
+        token = CancellationToken()
+        token.cancel()
+        set_current_cancellation_token(token)
+
+        self.assertRaises(OperationCancelledException, client.get, "https://www.example.com/1")
+
+    def test_per_host_stats(self):
+        client = HTTPClient()
+
+        with requests_mock.Mocker() as m:
+            m.get("https://www.example.com/1", text="ok")
+            m.get("https://www.example.com/2", status_code=500)
+            m.post("http://api.example.com/", exc=requests.exceptions.ConnectTimeout)
+
+            client.get("https://www.example.com/1")
+            client.get("https://www.example.com/2")
+            self.assertRaises(
+                requests.exceptions.ConnectTimeout, client.post, "http://api.example.com/"
+            )
+
+        stats = client.get_stats()
+        self.assertEqual(sorted(stats.keys()), ["api.example.com", "www.example.com"])
+
+        self.assertEqual(stats["www.example.com"]["requests"], 2)
+        self.assertEqual(stats["www.example.com"]["errors"], 0)
+        self.assertEqual(stats["www.example.com"]["http_errors"], 1)
+        self.assertTrue("avg_latency_ms" in stats["www.example.com"])
+
+        self.assertEqual(stats["api.example.com"]["requests"], 1)
+        self.assertEqual(stats["api.example.com"]["errors"], 1)
+
+    def test_cached_get(self):
+        response_cache = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=1024)
+        client = HTTPClient(response_cache=response_cache)
+        url = "https://www.example.com/1"
+
+        with requests_mock.Mocker() as m:
+            m.get(url, text="ok", headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jun 2020"})
+
+            # Response cache is only used when TTL is provided
+            client.get(url)
+            self.assertIsNone(response_cache.get(url))
+
+            response = client.get(url, cache_ttl=60)
+            self.assertEqual(response.text, "ok")
+            self.assertFalse(getattr(response, "from_cache", False))
+
+            # Served from cache, also by a different client instance (process)
+            response = client.get(url, cache_ttl=60)
+            self.assertEqual(response.text, "ok")
+            self.assertTrue(response.from_cache)
+
+            response = HTTPClient(response_cache=response_cache).get(url, cache_ttl=60)
+            self.assertTrue(response.from_cache)
+            self.assertEqual(m.call_count, 2)
+
+            # Expired entry is revalidated with a conditional request
+            m.get(url, status_code=304, headers={"ETag": '"v1"'})
+            response = client.get(url, cache_ttl=0)
+
+            self.assertEqual(m.call_count, 3)
+            self.assertEqual(m.last_request.headers["If-None-Match"], '"v1"')
+            self.assertEqual(m.last_request.headers["If-Modified-Since"], "Mon, 01 Jun 2020")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.text, "ok")
+            self.assertTrue(response.from_cache)
+
+            # Modified response replaces the cached one
+            m.get(url, text="new", headers={"ETag": '"v2"'})
+            response = client.get(url, cache_ttl=0)
+            self.assertEqual(response.text, "new")
+            self.assertEqual(response_cache.get(url).etag, '"v2"')
+
+            # Error responses are not cached
+            m.get(url, status_code=404, text="error")
+            response = client.get(url, cache_ttl=0)
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response_cache.get(url).content, b"new")
+
+        stats = client.get_stats()["www.example.com"]
+        self.assertEqual(stats["cache_hits"], 2)
+        self.assertEqual(stats["cache_revalidations"], 1)
+        self.assertEqual(client.get_cache_stats()["writes"], 3)
+
+    def test_cached_get_expired_entry_is_used_when_request_fails(self):
+        response_cache = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=1024)
+        client = HTTPClient(response_cache=response_cache)
+        url = "https://www.example.com/1"
+
+        with requests_mock.Mocker() as m:
+            m.get(url, text="ok")
+            client.get(url, cache_ttl=60)
+
+            m.get(url, exc=requests.exceptions.ConnectTimeout)
+            response = client.get(url, cache_ttl=0)
+            self.assertEqual(response.text, "ok")
+            self.assertTrue(response.from_cache)
+
+            # Nothing cached, exception is propagated
+            m.get("https://www.example.com/2", exc=requests.exceptions.ConnectTimeout)
+            self.assertRaises(
+                requests.exceptions.ConnectTimeout,
+                client.get,
+                "https://www.example.com/2",
+                cache_ttl=60,
+            )
+
+    def test_cached_get_expired_entry_is_used_on_server_error(self):
+        response_cache = HTTPResponseCache(directory=self._cache_directory, max_size_bytes=1024)
+        client = HTTPClient(response_cache=response_cache)
+        url = "https://www.example.com/1"
+
+        with requests_mock.Mocker() as m:
+            m.get(url, text="ok")
+            client.get(url, cache_ttl=60)
+
+            m.get(url, status_code=503, text="error")
+            response = client.get(url, cache_ttl=0)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.text, "ok")
+            self.assertTrue(response.from_cache)
+            self.assertEqual(response_cache.get(url).content, b"ok")
+
+            # Nothing cached, error response is returned
+            m.get("https://www.example.com/2", status_code=503, text="error")
+            response = client.get("https://www.example.com/2", cache_ttl=60)
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(getattr(response, "from_cache", False))
+
+        stats = client.get_stats()["www.example.com"]
+        self.assertEqual(stats["cache_hits"], 1)
+        self.assertEqual(stats["cache_revalidations"], 0)
@@ -22,6 +22,7 @@ from radio_bridge.otp import write_otps_to_disk
 from radio_bridge.otp import validate_otp
 from radio_bridge.otp import generate_and_write_otps
 from radio_bridge.otp import NUMBER_OF_UNUSED_OTPS
+from radio_bridge.otp import OTPStore
 
 from tests.unit.utils import use_mock_config
 from tests.unit.utils import reset_config
@@ -72,6 +73,13 @@ class OTPsTestCase(unittest.TestCase):
         result = get_valid_otps()
         self.assertEqual(result, sorted(MOCK_OTPS))
 
+    def test_otps_file_path_not_set(self):
+        use_mock_config({"plugins": {"admin_otps_file_path": ""}})
+
+        self.assertEqual(get_valid_otps(), [])
+        self.assertFalse(validate_otp(MOCK_OTPS[0]))
+        self.assertRaises(ValueError, write_otps_to_disk, MOCK_OTPS)
+
     def test_validate_otp(self):
         self._write_mock_otps()
 
@@ -88,17 +96,41 @@ class OTPsTestCase(unittest.TestCase):
         otp = MOCK_OTPS[0]
         result = validate_otp(otp)
         self.assertTrue(result)
-        self._assertOtpNotInFile(otp)
+        self._assertOtpInJournal(otp)
 
         otp = MOCK_OTPS[1]
         result = validate_otp(otp)
         self.assertTrue(result)
-        self._assertOtpNotInFile(otp)
+        self._assertOtpInJournal(otp)
+
+        # OTP can only be used once
+        result = validate_otp(otp)
+        self.assertFalse(result)
 
         # Verify OTPs have been revoked
         valid_ots = get_valid_otps()
         self.assertEqual(len(valid_ots), len(MOCK_OTPS) - 2)
 
+        # Revoked OTPs are also not valid after a restart when OTPs are loaded from disk again
+        store = OTPStore(file_path=self._db_path)
+        self.assertEqual(store.get_valid_otps(), valid_ots)
+        self.assertFalse(store.revoke(MOCK_OTPS[0]))
+
+    def test_generate_and_write_otps_compacts_journal(self):
+        self._write_mock_otps()
+
+        otp = MOCK_OTPS[0]
+        self.assertTrue(validate_otp(otp))
+        self.assertTrue(os.path.isfile(self._db_path + ".journal"))
+
+        all_otps, _ = generate_and_write_otps()
+        self.assertNotIn(otp, all_otps)
+        self.assertFalse(os.path.isfile(self._db_path + ".journal"))
+        self._assertOtpNotInFile(otp)
+
+        store = OTPStore(file_path=self._db_path)
+        self.assertEqual(store.get_valid_otps(), all_otps)
+
     def test_generate_and_write_ops_initial_empty_file(self):
         all_otps, new_otps = generate_and_write_otps()
         self.assertEqual(len(all_otps), NUMBER_OF_UNUSED_OTPS)
@@ -118,5 +150,11 @@ class OTPsTestCase(unittest.TestCase):
         if otp in content:
             self.fail("OTP %s found in file" % (otp))
 
+    def _assertOtpInJournal(self, otp: str) -> None:
+        with open(self._db_path + ".journal", "r") as fp:
+            content = fp.read()
+
+        self.assertIn(otp, content.splitlines())
+
     def _write_mock_otps(self):
         write_otps_to_disk(otps=MOCK_OTPS)
@@ -21,8 +21,12 @@ from radio_bridge.plugins.base import BaseDTMFPlugin
 from radio_bridge.plugins.base import BaseDTMFWithDataPlugin
 from radio_bridge.plugins.base import BaseAdminDTMFPlugin
 from radio_bridge.plugins.base import BaseAdminDTMFWithDataPlugin
+from radio_bridge.utils.cancellation import CancellationToken
+from radio_bridge.utils.cancellation import get_current_cancellation_token
+from radio_bridge.utils.cancellation import set_current_cancellation_token
 
 __all__ = [
+    "BasePluginSayTextTestCase",
     "BaseDTMFPluginTestCase",
     "BaseDTMFWithDataPluginTestCase",
     "BaseAdminDTMFPluginTestCase",
@@ -66,6 +70,125 @@ class MockAdminDTMFWithDataPlugin(BaseAdminDTMFWithDataPlugin):
         return "success"
 
 
+class BasePluginSayTextTestCase(unittest.TestCase):
+    def test_say_text_audio_is_prepared_before_tx_is_enabled(self):
+        calls = []
+
+        mock_tts = mock.Mock()
+        mock_tts.text_to_speech.side_effect = lambda text, language="en_US": calls.append(
+            "tts:%s" % (text)
+        ) or ("/tmp/%s.wav" % (text))
+
+        plugin = MockDTMFPlugin()
+        plugin._callsign = "CALL"
+        plugin._audio_player = mock.Mock()
+        plugin._audio_player.prepare_files.side_effect = lambda file_paths: calls.append(
+            "prepare:%s" % (",".join(file_paths))
+        )
+        plugin._audio_player.play_prepared.side_effect = lambda prepared_audio: calls.append("play")
+        plugin.enable_tx = mock.Mock(side_effect=lambda: calls.append("enable_tx"))
+        plugin.disable_tx = mock.Mock(side_effect=lambda: calls.append("disable_tx"))
+
+        with mock.patch.object(type(plugin), "_tts", new_callable=mock.PropertyMock) as tts:
+            tts.return_value = mock_tts
+            plugin.say_text("hello")
+
+        # Callsign and text are synthesized in parallel so their order is not deterministic
+        self.assertEqual(sorted(calls[:2]), ["tts:CALL", "tts:hello"])
+        self.assertEqual(
+            calls[2:],
+            ["prepare:/tmp/CALL.wav,/tmp/hello.wav", "enable_tx", "play", "disable_tx"],
+        )
+
+    def test_say_text_cancellation_token_is_propagated_to_tts_threads(self):
+        tokens = []
+
+        mock_tts = mock.Mock()
+        mock_tts.text_to_speech.side_effect = lambda text, language="en_US": tokens.append(
+            get_current_cancellation_token()
+        ) or ("/tmp/%s.wav" % (text))
+
+        plugin = MockDTMFPlugin()
+        plugin._callsign = "CALL"
+        plugin._audio_player = mock.Mock()
+        plugin.enable_tx = mock.Mock()
+        plugin.disable_tx = mock.Mock()
+
+        token = CancellationToken(timeout=10)
+        set_current_cancellation_token(token)
+
+        try:
+            with mock.patch.object(type(plugin), "_tts", new_callable=mock.PropertyMock) as tts:
+                tts.return_value = mock_tts
+                plugin.say_text("hello")
+        finally:
+            set_current_cancellation_token(None)
+
+        self.assertEqual(len(tokens), 2)
+        self.assertTrue(all([value is token for value in tokens]))
+
+    @mock.patch("radio_bridge.plugins.base.get_tts_cache_manager")
+    def test_say_text_cached_file_removed_by_other_process(self, mock_get_tts_cache_manager):
+        mock_tts = mock.Mock()
+        mock_tts.text_to_speech.side_effect = lambda text, language="en_US": "/tmp/%s.wav" % (text)
+
+        plugin = MockDTMFPlugin()
+        plugin._callsign = "CALL"
+        plugin._audio_player = mock.Mock()
+        plugin._audio_player.prepare_files.side_effect = [
+            FileNotFoundError(2, "No such file or directory", "/tmp/hello.wav"),
+            mock.sentinel.prepared_audio,
+        ]
+        plugin.enable_tx = mock.Mock()
+        plugin.disable_tx = mock.Mock()
+
+        with mock.patch.object(type(plugin), "_tts", new_callable=mock.PropertyMock) as tts:
+            tts.return_value = mock_tts
+            plugin.say_text("hello")
+
+        # Stale entry is removed from the index and the text is synthesized again
+        mock_get_tts_cache_manager.return_value.remove.assert_called_once_with(
+            file_path="/tmp/hello.wav"
+        )
+        self.assertEqual(mock_tts.text_to_speech.call_count, 4)
+        plugin._audio_player.play_prepared.assert_called_once_with(
+            prepared_audio=mock.sentinel.prepared_audio
+        )
+
+    @mock.patch("radio_bridge.plugins.base.get_config_option")
+    def test_say_text_concatenative_tts(self, mock_get_config_option):
+        mock_get_config_option.side_effect = (
+            lambda section, option, option_type="str", fallback=None: True
+            if option == "concatenative"
+            else fallback
+        )
+
+        mock_tts = mock.Mock()
+        mock_tts.text_to_speech.side_effect = lambda text, language="en_US": "/tmp/%s.wav" % (text)
+
+        plugin = MockDTMFPlugin()
+        plugin._callsign = "CALL"
+        plugin._audio_player = mock.Mock()
+        plugin.enable_tx = mock.Mock()
+        plugin.disable_tx = mock.Mock()
+
+        with mock.patch.object(type(plugin), "_tts", new_callable=mock.PropertyMock) as tts:
+            tts.return_value = mock_tts
+
+            # Plugin hasn't opted in, whole text is synthesized
+            plugin.say_text("Time is 12 05.")
+            plugin._audio_player.prepare_files.assert_called_with(
+                file_paths=["/tmp/CALL.wav", "/tmp/Time is 12 05..wav"]
+            )
+
+            # Plugin has opted in, text fragments and numbers are synthesized separately
+            plugin.CONCATENATIVE_TTS = True
+            plugin.say_text("Time is 12 05.")
+            plugin._audio_player.prepare_files.assert_called_with(
+                file_paths=["/tmp/CALL.wav", "/tmp/Time is.wav", "/tmp/12.wav", "/tmp/5.wav"]
+            )
+
+
 class BaseDTMFPluginTestCase(unittest.TestCase):
     def test_matches_dtmf_sequence(self):
         plugin = MockDTMFPlugin()
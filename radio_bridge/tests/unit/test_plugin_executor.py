@@ -15,9 +15,13 @@
 
 import time
 import unittest
+import threading
 
 from radio_bridge.plugins.base import BaseDTMFPlugin
 from radio_bridge.plugins.executor import PluginExecutor
+from radio_bridge.utils.cancellation import CancellationToken
+from radio_bridge.utils.cancellation import OperationCancelledException
+from radio_bridge.utils.cancellation import set_current_cancellation_token
 
 from tests.unit.utils import use_mock_config
 from tests.unit.utils import reset_config
@@ -124,3 +128,180 @@ class ProcessPluginExecutorTestCase(unittest.TestCase):
         result = self._executor.run(plugin=MockDTMFWithDataPlugin())
         self.assertEqual(result, None)
         self.assertEqual(self._executor._plugin_execution_stats["mock_with_data"]["timeout"], 1)
+
+
+class MockFailingDTMFPlugin(BaseDTMFPlugin):
+    ID = "mock_failing"
+    NAME = "mock"
+    DTMF_SEQUENCE = "03"
+
+    def run(self):
+        raise ValueError("plugin failure")
+
+
+class PoolPluginExecutorTestCase(unittest.TestCase):
+    def setUp(self):
+        super(PoolPluginExecutorTestCase, self).setUp()
+
+        mock_config = {
+            "tx": {
+                "callsign": "T",
+            },
+            "plugins": {
+                "max_run_time": 1,
+                "pool_size": 1,
+            },
+        }
+        use_mock_config(mock_config)
+
+        self._executor = PluginExecutor(implementation="pool")
+        self._executor.start()
+
+    def tearDown(self):
+        super(PoolPluginExecutorTestCase, self).tearDown()
+        self._executor.shutdown()
+        reset_config()
+
+    def test_run_success_worker_is_reused(self):
+        self.assertEqual(self._executor._plugin_execution_stats["mock"]["success"], 0)
+
+        worker_pid = self._executor._executor._idle_workers[0].process.pid
+
+        result = self._executor.run(plugin=MockDTMFPlugin())
+        self.assertEqual(result, "success")
+        result = self._executor.run(plugin=MockDTMFPlugin())
+        self.assertEqual(result, "success")
+        self.assertEqual(self._executor._plugin_execution_stats["mock"]["success"], 2)
+
+        self.assertEqual(self._executor._executor._idle_workers[0].process.pid, worker_pid)
+        self.assertEqual(self._executor._executor.get_stats()["respawns"], 0)
+
+    def test_run_plugin_exception(self):
+        result = self._executor.run(plugin=MockFailingDTMFPlugin())
+        self.assertEqual(result, None)
+        self.assertEqual(self._executor._plugin_execution_stats["mock_failing"]["failure"], 1)
+
+        # Worker should still be usable
+        result = self._executor.run(plugin=MockDTMFPlugin())
+        self.assertEqual(result, "success")
+        self.assertEqual(self._executor._executor.get_stats()["respawns"], 0)
+
+    def test_run_timeout_reached_worker_killed_and_respawned(self):
+        self.assertEqual(self._executor._plugin_execution_stats["mock_with_data"]["timeout"], 0)
+
+        worker_pid = self._executor._executor._idle_workers[0].process.pid
+
+        result = self._executor.run(plugin=MockDTMFWithDataPlugin())
+        self.assertEqual(result, None)
+        self.assertEqual(self._executor._plugin_execution_stats["mock_with_data"]["timeout"], 1)
+
+        self.assertEqual(self._executor._executor.get_stats()["respawns"], 1)
+        self.assertNotEqual(self._executor._executor._idle_workers[0].process.pid, worker_pid)
+
+        result = self._executor.run(plugin=MockDTMFPlugin())
+        self.assertEqual(result, "success")
+
+    def test_workers_are_not_forked_from_main_process(self):
+        # Workers are (re)spawned while other threads are running so they can't use "fork"
+        start_method = self._executor._executor._context.get_start_method()
+        self.assertTrue(start_method in ["forkserver", "spawn"])
+
+        worker = self._executor._executor._idle_workers[0]
+        self.assertEqual(worker.process._popen.method, start_method)
+
+
+class MockCooperativeDTMFPlugin(BaseDTMFPlugin):
+    ID = "mock_cooperative"
+    NAME = "mock"
+    DTMF_SEQUENCE = "04"
+
+    def __init__(self):
+        super(MockCooperativeDTMFPlugin, self).__init__()
+        self.transmitted = False
+        self.finished = threading.Event()
+
+    def run(self):
+        try:
+            self.cancellation_token.wait(10)
+
+            with self.transmit():
+                self.transmitted = True
+        finally:
+            self.finished.set()
+
+
+class ThreadPluginExecutorTestCase(unittest.TestCase):
+    def setUp(self):
+        super(ThreadPluginExecutorTestCase, self).setUp()
+
+        mock_config = {
+            "tx": {
+                "callsign": "T",
+            },
+            "plugins": {
+                "max_run_time": 1,
+            },
+        }
+        use_mock_config(mock_config)
+
+        self._executor = PluginExecutor(implementation="thread")
+
+    def tearDown(self):
+        super(ThreadPluginExecutorTestCase, self).tearDown()
+        self._executor.shutdown()
+        reset_config()
+
+    def test_run_success(self):
+        self.assertEqual(self._executor._plugin_execution_stats["mock"]["success"], 0)
+
+        result = self._executor.run(plugin=MockDTMFPlugin())
+        self.assertEqual(result, "success")
+        self.assertEqual(self._executor._plugin_execution_stats["mock"]["success"], 1)
+
+    def test_run_timeout_reached_plugin_cancelled(self):
+        plugin = MockCooperativeDTMFPlugin()
+
+        result = self._executor.run(plugin=plugin)
+        self.assertEqual(result, None)
+        self.assertEqual(self._executor._plugin_execution_stats["mock_cooperative"]["timeout"], 1)
+        self.assertEqual(self._executor._executor.get_stats()["cancelled"], 1)
+
+        # Cancelled plugin should exit without enabling TX
+        self.assertTrue(plugin.finished.wait(5))
+        self.assertFalse(plugin.transmitted)
+
+    def test_transmit_cancelled_token(self):
+        plugin = MockDTMFPlugin()
+        token = CancellationToken()
+        token.cancel()
+
+        set_current_cancellation_token(token)
+
+        try:
+            with self.assertRaises(OperationCancelledException):
+                with plugin.transmit():
+                    pass
+        finally:
+            set_current_cancellation_token(None)
+
+    def test_transmit_is_serialized(self):
+        plugin = MockDTMFPlugin()
+        events = []
+
+        def transmit(name):
+            with plugin.transmit():
+                events.append(name + "_start")
+                time.sleep(0.2)
+                events.append(name + "_end")
+
+        threads = [threading.Thread(target=transmit, args=(name,)) for name in ["a", "b"]]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(events), 4)
+        self.assertEqual(events[0][0], events[1][0])
+        self.assertEqual(events[2][0], events[3][0])
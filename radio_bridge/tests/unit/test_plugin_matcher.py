@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from radio_bridge.plugins.matcher import DTMFSequenceMatcher
+from radio_bridge.plugins.matcher import MATCH
+from radio_bridge.plugins.matcher import PREFIX
+from radio_bridge.plugins.matcher import NO_MATCH
+from radio_bridge.plugins import get_plugins_with_dtmf_sequence
+
+from tests.unit.test_plugin_classes import MockDTMFPlugin
+from tests.unit.test_plugin_classes import MockDTMFWithDataPlugin
+from tests.unit.test_plugin_classes import MockAdminDTMFPlugin
+from tests.unit.test_plugin_classes import MockAdminDTMFWithDataPlugin
+from tests.unit.plugins.base import BasePluginTestCase
+
+__all__ = ["DTMFSequenceMatcherTestCase", "DTMFSequenceMatcherDefaultPluginsTestCase"]
+
+
+class DTMFSequenceMatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        super(DTMFSequenceMatcherTestCase, self).setUp()
+
+        self.plugin = MockDTMFPlugin()
+        self.plugin_with_data = MockDTMFWithDataPlugin()
+        self.admin_plugin = MockAdminDTMFPlugin()
+        self.admin_plugin_with_data = MockAdminDTMFWithDataPlugin()
+
+        self.matcher = DTMFSequenceMatcher(
+            plugins={
+                "12": self.plugin,
+                "32??": self.plugin_with_data,
+                "45": self.admin_plugin,
+                "65?": self.admin_plugin_with_data,
+            }
+        )
+
+    def test_match(self):
+        # Plugin without data
+        self.assertEqual(self.matcher.match("1"), (PREFIX, []))
+        self.assertEqual(self.matcher.match("12"), (MATCH, [self.plugin]))
+        self.assertEqual(self.matcher.match("123"), (NO_MATCH, []))
+        self.assertEqual(self.matcher.match("13"), (NO_MATCH, []))
+
+        # Plugin with data
+        self.assertEqual(self.matcher.match("32"), (PREFIX, []))
+        self.assertEqual(self.matcher.match("320"), (PREFIX, []))
+        self.assertEqual(self.matcher.match("3201"), (MATCH, [self.plugin_with_data]))
+        self.assertEqual(self.matcher.match("32*#"), (MATCH, [self.plugin_with_data]))
+        self.assertEqual(self.matcher.match("32011"), (NO_MATCH, []))
+
+        # Admin plugins with OTP suffix
+        self.assertEqual(self.matcher.match("45123"), (PREFIX, []))
+        self.assertEqual(self.matcher.match("451234"), (MATCH, [self.admin_plugin]))
+        self.assertEqual(self.matcher.match("4512345"), (NO_MATCH, []))
+        self.assertEqual(self.matcher.match("651234"), (PREFIX, []))
+        self.assertEqual(self.matcher.match("6512346"), (MATCH, [self.admin_plugin_with_data]))
+        self.assertEqual(self.matcher.match("65123467"), (NO_MATCH, []))
+
+        # Dead ends
+        self.assertEqual(self.matcher.match(""), (PREFIX, []))
+        self.assertEqual(self.matcher.match("7"), (NO_MATCH, []))
+        self.assertEqual(self.matcher.match("?"), (NO_MATCH, []))
+
+    def test_match_overlapping_patterns(self):
+        plugin = MockDTMFPlugin()
+        plugin.DTMF_SEQUENCE = "3201"
+
+        matcher = DTMFSequenceMatcher(plugins={"32??": self.plugin_with_data, "3201": plugin})
+
+        self.assertEqual(matcher.match("3201"), (MATCH, [self.plugin_with_data, plugin]))
+        self.assertEqual(matcher.match("3202"), (MATCH, [self.plugin_with_data]))
+        self.assertEqual(matcher.match("320"), (PREFIX, []))
+
+    def test_match_star_wildcard(self):
+        # Same pattern as the one used by the clear sequence plugin
+        plugin = MockDTMFWithDataPlugin()
+        plugin.DTMF_SEQUENCE = "*D*"
+
+        matcher = DTMFSequenceMatcher(plugins={"*D*": plugin, "12": self.plugin})
+
+        self.assertEqual(matcher.match("D"), (MATCH, [plugin]))
+        self.assertEqual(matcher.match("12D"), (MATCH, [plugin]))
+        self.assertEqual(matcher.match("D34"), (MATCH, [plugin]))
+        self.assertEqual(matcher.match("1D2"), (MATCH, [plugin]))
+        self.assertEqual(matcher.match("12"), (MATCH, [self.plugin]))
+
+        # Leading "*" pattern doesn't prevent dead ends
+        self.assertEqual(matcher.match("1"), (PREFIX, []))
+        self.assertEqual(matcher.match("123"), (NO_MATCH, []))
+        self.assertEqual(matcher.match("7"), (NO_MATCH, []))
+        self.assertFalse(matcher.is_prefix("7"))
+
+        # Results are consistent with the plugin matches_dtmf_sequence() method
+        for sequence in ["D", "12D", "D34", "1D2"]:
+            self.assertTrue(plugin.matches_dtmf_sequence(sequence)[0])
+
+        for sequence in ["1", "123"]:
+            self.assertFalse(plugin.matches_dtmf_sequence(sequence)[0])
+
+    def test_match_leading_star_wildcard_partial_match(self):
+        plugin = MockDTMFWithDataPlugin()
+        plugin.DTMF_SEQUENCE = "*AB"
+
+        matcher = DTMFSequenceMatcher(plugins={"*AB": plugin, "12": self.plugin})
+
+        self.assertEqual(matcher.match("7"), (NO_MATCH, []))
+        self.assertEqual(matcher.match("7A"), (PREFIX, []))
+        self.assertEqual(matcher.match("7AB"), (MATCH, [plugin]))
+        self.assertEqual(matcher.match("AAB"), (MATCH, [plugin]))
+        self.assertEqual(matcher.match("7AC"), (NO_MATCH, []))
+        self.assertEqual(matcher.match("7ABC"), (NO_MATCH, []))
+        self.assertTrue(matcher.is_prefix("A"))
+        self.assertFalse(matcher.is_prefix("C"))
+
+        # Anchored pattern with a "*" wildcard in the middle never reaches a dead end
+        plugin = MockDTMFWithDataPlugin()
+        plugin.DTMF_SEQUENCE = "1*2"
+
+        matcher = DTMFSequenceMatcher(plugins={"1*2": plugin})
+
+        self.assertEqual(matcher.match("1"), (PREFIX, []))
+        self.assertEqual(matcher.match("1342"), (MATCH, [plugin]))
+        self.assertEqual(matcher.match("1343"), (PREFIX, []))
+        self.assertEqual(matcher.match("2"), (NO_MATCH, []))
+
+    def test_is_prefix(self):
+        self.assertTrue(self.matcher.is_prefix(""))
+        self.assertTrue(self.matcher.is_prefix("1"))
+        self.assertTrue(self.matcher.is_prefix("32"))
+        self.assertTrue(self.matcher.is_prefix("45"))
+
+        self.assertFalse(self.matcher.is_prefix("12"))
+        self.assertFalse(self.matcher.is_prefix("3201"))
+        self.assertFalse(self.matcher.is_prefix("7"))
+
+    def test_no_plugins(self):
+        matcher = DTMFSequenceMatcher(plugins={})
+
+        self.assertEqual(matcher.match("1"), (NO_MATCH, []))
+        self.assertFalse(matcher.is_prefix(""))
+
+
+class DTMFSequenceMatcherDefaultPluginsTestCase(BasePluginTestCase):
+    def test_match_default_plugins(self):
+        plugins = get_plugins_with_dtmf_sequence()
+        plugin_ids = [plugin.ID for plugin in plugins.values()]
+        self.assertTrue("clear_sequence" in plugin_ids)
+
+        matcher = DTMFSequenceMatcher(plugins=plugins)
+
+        # Clear sequence plugin ("*D*") doesn't prevent dead ends
+        self.assertEqual(matcher.match("7"), (NO_MATCH, []))
+        self.assertEqual(matcher.match("13"), (NO_MATCH, []))
+        self.assertFalse(matcher.is_prefix("7"))
+
+        self.assertEqual(matcher.match("1"), (PREFIX, []))
+        self.assertEqual(matcher.match("12")[0], MATCH)
+        self.assertEqual(matcher.match("12")[1][0].ID, "help")
+        self.assertEqual(matcher.match("13D")[0], MATCH)
+        self.assertEqual(matcher.match("13D")[1][0].ID, "clear_sequence")
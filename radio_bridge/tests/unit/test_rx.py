@@ -35,3 +35,29 @@ class RXTestCase(BaseTestCase):
         rx = RX(file_path=temp_path)
         rx.record_audio()
         self.assertTrue(os.path.isfile(temp_path))
+
+    @unittest.skipIf(os.environ.get("CI"), "Skipping test on CI with no input devices")
+    def test_record_audio_to_buffer(self):
+        # NOTE: This test will fail if there is no input device detected on the system
+        _, temp_path = tempfile.mkstemp()
+        os.unlink(temp_path)
+
+        rx = RX(file_path=temp_path)
+        data = rx.record_audio_to_buffer()
+        self.assertTrue(len(data) > 0)
+        self.assertFalse(os.path.isfile(temp_path))
+
+    @unittest.skipIf(os.environ.get("CI"), "Skipping test on CI with no input devices")
+    def test_read_stream_window(self):
+        # NOTE: This test will fail if there is no input device detected on the system
+        rx = RX(time=0.1)
+        rx.start_stream()
+
+        try:
+            window1 = rx.read_stream_window(overlap=0.05, timeout=5)
+            window2 = rx.read_stream_window(overlap=0.05, timeout=5)
+        finally:
+            rx.stop()
+
+        self.assertEqual(len(window1), int(rx.rate * 0.1))
+        self.assertEqual(len(window2), int(rx.rate * 0.1))
@@ -20,6 +20,9 @@ import random
 import time
 
 from radio_bridge.tts import TextToSpeech
+from radio_bridge.tts import get_text_to_speech
+from radio_bridge.tts import get_tts_implementation
+from radio_bridge.tts import split_text_into_segments
 from radio_bridge.audio_player import get_audio_file_duration
 from radio_bridge.configuration import set_config_option
 
@@ -50,6 +53,55 @@ class TTSTestCase(BaseTestCase):
         assert self._temp_dir.startswith("/tmp")
         shutil.rmtree(self._temp_dir)
 
+    def test_split_text_into_segments(self):
+        self.assertEqual(
+            split_text_into_segments("Current time is 20 07 local. 19 57 U T C."),
+            ["Current time is", "20", "7", "local.", "19", "57", "U T C."],
+        )
+        self.assertEqual(
+            split_text_into_segments("Temperature -3.5 degrees celsius.\nDew point 5.05."),
+            ["Temperature", "minus", "3", "point", "5", "degrees celsius. Dew point", "5"]
+            + ["point", "0", "5"],
+        )
+        self.assertEqual(
+            split_text_into_segments("Temperatura 12.5 stopinj.", language="sl_SI"),
+            ["Temperatura", "12", "vejica", "5", "stopinj."],
+        )
+        # Numbers which are part of the words are not split
+        self.assertEqual(
+            split_text_into_segments("Repeater S55ABC-1 on channel 5"),
+            ["Repeater S55ABC-1 on channel", "5"],
+        )
+        self.assertEqual(split_text_into_segments("No numbers."), ["No numbers."])
+
+    def test_get_text_to_speech_instances_are_cached_per_config_version(self):
+        tts1 = get_text_to_speech(implementation="gtts")
+        tts2 = get_text_to_speech(implementation="gtts")
+        self.assertTrue(tts1 is tts2)
+        self.assertTrue(tts1._tts is get_tts_implementation(implementation="gtts"))
+
+        tts3 = get_text_to_speech(implementation="espeak")
+        self.assertFalse(tts1 is tts3)
+
+        # Config change should result in a new instance
+        set_config_option("tts", "cache_directory", self._temp_dir)
+
+        tts4 = get_text_to_speech(implementation="gtts")
+        self.assertFalse(tts1 is tts4)
+        self.assertTrue(tts4 is get_text_to_speech(implementation="gtts"))
+
+    def test_get_tts_implementation_for_language_reuses_instances(self):
+        tts = get_text_to_speech(implementation="gtts")
+
+        govornik1 = tts._get_tts_implementation_for_language(language="sl_SI")
+        govornik2 = tts._get_tts_implementation_for_language(language="sl_SI")
+        self.assertTrue(govornik1 is govornik2)
+        self.assertTrue(tts._get_tts_implementation_for_language(language="en_US") is tts._tts)
+
+        self.assertRaisesRegex(
+            ValueError, "Invalid implementation", get_tts_implementation, implementation="invalid"
+        )
+
     def test_text_to_speech_gtts(self):
         tts = TextToSpeech(implementation="gtts")
 
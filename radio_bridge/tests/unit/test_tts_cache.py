@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional
+
+import os
+import time
+import shutil
+import tempfile
+
+import mock
+
+from radio_bridge.tts_cache import TTSCacheManager
+from radio_bridge.tts_cache import get_tts_cache_manager
+from radio_bridge.configuration import set_config_option
+
+from tests.unit.base import BaseTestCase
+
+__all__ = ["TTSCacheManagerTestCase"]
+
+
+class TTSCacheManagerTestCase(BaseTestCase):
+    def setUp(self):
+        super(TTSCacheManagerTestCase, self).setUp()
+
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TTSCacheManagerTestCase, self).tearDown()
+
+        assert self._temp_dir.startswith("/tmp")
+        shutil.rmtree(self._temp_dir)
+
+    def _write_file(self, file_name: str, size: int, mtime: Optional[float] = None) -> str:
+        file_path = os.path.join(self._temp_dir, file_name)
+
+        with open(file_path, "wb") as fp:
+            fp.write(b"a" * size)
+
+        if mtime:
+            os.utime(file_path, (mtime, mtime))
+
+        return file_path
+
+    def test_lookup_uses_index_populated_with_directory_scan(self):
+        file_path1 = self._write_file("1.wav", 100)
+        file_path2 = self._write_file("2.mp3", 200)
+        self._write_file("3.wav", 0)
+        self._write_file("4.txt", 100)
+
+        manager = TTSCacheManager(directory=self._temp_dir, max_size_bytes=1000, max_age=0)
+
+        self.assertTrue(manager.lookup(file_path1))
+        self.assertTrue(manager.lookup(file_path2))
+        self.assertFalse(manager.lookup(os.path.join(self._temp_dir, "3.wav")))
+        self.assertFalse(manager.lookup(os.path.join(self._temp_dir, "4.txt")))
+
+        stats = manager.get_stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["size_bytes"], 300)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["reconciles"], 1)
+        self.assertEqual(manager.get_entry(file_path1).hits, 1)
+
+        # Subsequent lookups shouldn't scan the directory
+        with mock.patch("radio_bridge.tts_cache.os.stat") as mock_stat, mock.patch(
+            "radio_bridge.tts_cache.os.listdir"
+        ) as mock_listdir:
+            self.assertTrue(manager.lookup(file_path1))
+            self.assertFalse(manager.lookup(os.path.join(self._temp_dir, "5.wav")))
+
+            self.assertEqual(mock_stat.call_count, 0)
+            self.assertEqual(mock_listdir.call_count, 0)
+
+        # File added after the initial scan
+        file_path5 = self._write_file("5.wav", 50)
+        manager.add(file_path5)
+        self.assertTrue(manager.lookup(file_path5))
+        self.assertEqual(manager.get_stats()["size_bytes"], 350)
+
+    def test_sweep_evicts_least_recently_used_entries(self):
+        now = time.time()
+        file_path1 = self._write_file("1.wav", 100, mtime=now - 30)
+        file_path2 = self._write_file("2.wav", 100, mtime=now - 20)
+        file_path3 = self._write_file("3.wav", 100, mtime=now - 10)
+
+        manager = TTSCacheManager(directory=self._temp_dir, max_size_bytes=250, max_age=0)
+
+        # 1 has been used most recently so 2 should be evicted
+        self.assertTrue(manager.lookup(file_path1))
+
+        evicted = manager.sweep()
+        self.assertEqual(evicted, [file_path2])
+        self.assertFalse(os.path.isfile(file_path2))
+        self.assertTrue(os.path.isfile(file_path1))
+        self.assertTrue(os.path.isfile(file_path3))
+
+        stats = manager.get_stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["size_bytes"], 200)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["evicted_bytes"], 100)
+
+        # Nothing to evict
+        self.assertEqual(manager.sweep(), [])
+
+    def test_sweep_evicts_expired_entries(self):
+        now = time.time()
+        file_path1 = self._write_file("1.wav", 100, mtime=now - 1000)
+        file_path2 = self._write_file("2.wav", 100, mtime=now - 10)
+
+        manager = TTSCacheManager(directory=self._temp_dir, max_size_bytes=1000, max_age=500)
+
+        # Expired entries result in a cache miss
+        self.assertFalse(manager.lookup(file_path1))
+        self.assertTrue(manager.lookup(file_path2))
+        self.assertEqual(manager.get_stats()["expired"], 1)
+
+        self.assertEqual(manager.sweep(), [file_path1])
+        self.assertFalse(os.path.isfile(file_path1))
+        self.assertTrue(os.path.isfile(file_path2))
+
+    def test_sweep_reconciles_files_removed_by_other_processes(self):
+        file_path1 = self._write_file("1.wav", 100)
+
+        manager = TTSCacheManager(directory=self._temp_dir, max_size_bytes=1000, max_age=0)
+        self.assertTrue(manager.lookup(file_path1))
+
+        os.remove(file_path1)
+        file_path2 = self._write_file("2.wav", 100)
+
+        manager.sweep()
+        self.assertFalse(manager.lookup(file_path1))
+        self.assertTrue(manager.lookup(file_path2))
+        self.assertEqual(manager.get_stats()["size_bytes"], 100)
+
+    def test_lookup_file_removed_by_other_process(self):
+        file_path1 = self._write_file("1.wav", 100)
+
+        manager = TTSCacheManager(directory=self._temp_dir, max_size_bytes=1000, max_age=0)
+        self.assertTrue(manager.lookup(file_path1))
+
+        # Removed by the sweeper running in another process. Lookups don't touch the filesystem so
+        # entry is only dropped on reconcile or when the caller removes it
+        os.remove(file_path1)
+
+        with mock.patch("radio_bridge.tts_cache.os.utime") as mock_utime:
+            self.assertTrue(manager.lookup(file_path1))
+            self.assertEqual(mock_utime.call_count, 0)
+
+        manager.remove(file_path1)
+        self.assertFalse(manager.lookup(file_path1))
+        self.assertEqual(manager.get_stats()["size_bytes"], 0)
+
+        # Synthesized again
+        self._write_file("1.wav", 100)
+        manager.add(file_path1)
+        self.assertTrue(manager.lookup(file_path1))
+
+    def test_get_tts_cache_manager(self):
+        set_config_option("tts", "cache_directory", self._temp_dir)
+        set_config_option("tts", "cache_max_size_mb", "1")
+
+        manager1 = get_tts_cache_manager()
+        manager2 = get_tts_cache_manager()
+        self.assertTrue(manager1 is manager2)
+        self.assertEqual(manager1.max_size_bytes, 1024 * 1024)
+
+        set_config_option("tts", "cache_max_size_mb", "2")
+        self.assertTrue(get_tts_cache_manager() is manager1)
+        self.assertEqual(manager1.max_size_bytes, 2 * 1024 * 1024)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from radio_bridge.tts_warmup import TTSWarmUp
+from radio_bridge.configuration import set_config_option
+from radio_bridge.plugins.traffic_info import TrafficInfoPlugin
+from radio_bridge.plugins.local_weather import LocalWeatherPlugin
+
+from tests.unit.base import BaseTestCase
+from tests.unit.utils import reset_config
+
+__all__ = ["TTSWarmUpTestCase"]
+
+
+class MockPlugin(object):
+    def __init__(self, phrases):
+        self._phrases = phrases
+
+    def get_warm_up_phrases(self):
+        if isinstance(self._phrases, Exception):
+            raise self._phrases
+
+        return self._phrases
+
+
+class TTSWarmUpTestCase(BaseTestCase):
+    def setUp(self):
+        super(TTSWarmUpTestCase, self).setUp()
+
+        set_config_option("tx", "callsign", "Test Callsign")
+
+    def tearDown(self):
+        super(TTSWarmUpTestCase, self).tearDown()
+
+        reset_config()
+
+    def test_get_phrases(self):
+        traffic_info_plugin = TrafficInfoPlugin()
+        traffic_info_plugin.initialize(config={"language": "sl_SI"})
+
+        local_weather_plugin = LocalWeatherPlugin()
+        local_weather_plugin.initialize(config={})
+
+        plugins = {
+            "TrafficInfoPlugin": traffic_info_plugin,
+            "LocalWeatherPlugin": local_weather_plugin,
+            "MockPlugin1": MockPlugin([("Invalid sequence.", "en_US"), ("", "en_US")]),
+            "MockPlugin2": MockPlugin(ValueError("failure")),
+        }
+
+        warm_up = TTSWarmUp(plugins=plugins)
+        self.assertEqual(
+            warm_up.get_phrases(),
+            [
+                ("Test Callsign", "en_US"),
+                ("Invalid sequence.", "en_US"),
+                ("Ni dogodkov.", "sl_SI"),
+                ("Ni cakalnih dob.", "sl_SI"),
+                ("No recent weather observation found.", "en_US"),
+            ],
+        )
+
+        # Callsign which is a path to an audio file shouldn't be synthesized
+        set_config_option("tx", "callsign", "/tmp/callsign.wav")
+        self.assertEqual(warm_up.get_phrases()[0], ("Invalid sequence.", "en_US"))
+
+    @mock.patch("radio_bridge.tts_warmup.get_text_to_speech")
+    def test_run_synthesizes_all_phrases(self, mock_get_text_to_speech):
+        mock_tts = mock.Mock()
+
+        def mock_text_to_speech(text, language):
+            if text == "fail":
+                raise Exception("TTS failed")
+
+            return "/tmp/test.wav"
+
+        mock_tts.text_to_speech.side_effect = mock_text_to_speech
+        mock_get_text_to_speech.return_value = mock_tts
+
+        plugins = {
+            "MockPlugin1": MockPlugin([("Text 1.", "en_US"), ("fail", "en_US")]),
+            "MockPlugin2": MockPlugin([("Text 2.", "sl_SI"), ("Text 1.", "en_US")]),
+        }
+
+        warm_up = TTSWarmUp(plugins=plugins, max_workers=2)
+        warm_up.start()
+        warm_up.join(timeout=10)
+
+        self.assertFalse(warm_up.is_alive())
+        self.assertEqual(mock_tts.text_to_speech.call_count, 4)
+        mock_tts.text_to_speech.assert_any_call(text="Test Callsign", language="en_US")
+        mock_tts.text_to_speech.assert_any_call(text="Text 2.", language="sl_SI")
+
+        stats = warm_up.get_stats()
+        self.assertEqual(stats["phrases"], 4)
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["skipped"], 0)
+        self.assertTrue(stats["finished"])
+
+    @mock.patch("radio_bridge.tts_warmup.get_text_to_speech")
+    def test_stopped_warm_up_skips_remaining_phrases(self, mock_get_text_to_speech):
+        mock_tts = mock.Mock()
+        mock_get_text_to_speech.return_value = mock_tts
+
+        warm_up = TTSWarmUp(plugins={"MockPlugin": MockPlugin([("Text 1.", "en_US")])})
+        warm_up.stop()
+        warm_up.run()
+
+        self.assertEqual(mock_tts.text_to_speech.call_count, 0)
+        self.assertEqual(warm_up.get_stats()["skipped"], 2)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from radio_bridge.utils.cache import RefreshingCache
+from radio_bridge.utils.cache import get_refreshing_caches_stats
+from radio_bridge.utils.cache import stop_refreshing_caches
+
+__all__ = ["RefreshingCacheTestCase"]
+
+
+class MockFetcher(object):
+    def __init__(self, values):
+        self.values = list(values)
+        self.call_count = 0
+
+        self._called = threading.Condition()
+
+    def __call__(self):
+        with self._called:
+            self.call_count += 1
+            value = self.values.pop(0)
+            self._called.notify_all()
+
+        if isinstance(value, Exception):
+            raise value
+
+        return value
+
+    def wait_for_calls(self, count, timeout=2):
+        with self._called:
+            return self._called.wait_for(lambda: self.call_count >= count, timeout=timeout)
+
+
+class RefreshingCacheTestCase(unittest.TestCase):
+    def tearDown(self):
+        super(RefreshingCacheTestCase, self).tearDown()
+        stop_refreshing_caches()
+
+    def _age_entry(self, cache, key, seconds):
+        # NOTE: We move fetch time back instead of sleeping so tests don't depend on timing
+        cache._entries[key].fetched_at -= seconds
+
+    def test_hit_and_miss(self):
+        cache = RefreshingCache(name="test_hit_and_miss", max_len=2, max_age=10)
+        fetcher = MockFetcher(["a", "b", "c"])
+
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        self.assertEqual(fetcher.call_count, 1)
+
+        # Least recently used entries are evicted
+        self.assertEqual(cache.get("key2", fetcher), "b")
+        self.assertEqual(cache.get("key3", fetcher), "c")
+        self.assertFalse("key1" in cache)
+        self.assertEqual(len(cache), 2)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(get_refreshing_caches_stats()["test_hit_and_miss"], stats)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_values_are_not_cached(self):
+        cache = RefreshingCache(
+            name="test_invalid", max_len=2, max_age=10, is_valid=lambda value: value != "invalid"
+        )
+        fetcher = MockFetcher(["invalid", "a"])
+
+        self.assertEqual(cache.get("key1", fetcher), "invalid")
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        self.assertEqual(fetcher.call_count, 2)
+
+    def test_stale_entry_is_served_while_being_refreshed(self):
+        # NOTE: Idle timeout of 0 disables proactive refresh by the background thread
+        cache = RefreshingCache(
+            name="test_stale", max_len=2, max_age=10, max_stale_age=100, refresh_idle_timeout=0
+        )
+        fetcher = MockFetcher(["a", "b"])
+
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        self._age_entry(cache, "key1", 20)
+
+        # Stale copy is returned right away and entry is refreshed in the background
+        self.assertEqual(cache.get("key1", fetcher), "a")
+
+        # Waits for the refresh which is in flight to finish
+        cache.stop()
+        self.assertEqual(cache.get_stats()["refreshes"], 1)
+        self.assertEqual(cache.get("key1", fetcher), "b")
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["stale_hits"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertTrue("avg_refresh_latency_ms" in stats)
+
+    def test_stale_entry_is_served_when_upstream_is_down(self):
+        cache = RefreshingCache(
+            name="test_upstream_down",
+            max_len=2,
+            max_age=10,
+            max_stale_age=20,
+            refresh_idle_timeout=0,
+        )
+        fetcher = MockFetcher(["a", Exception("upstream down"), Exception("upstream down")])
+
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        self._age_entry(cache, "key1", 15)
+
+        # Background refresh fails
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        cache.stop()
+        self.assertEqual(cache.get_stats()["refresh_failures"], 1)
+
+        # Synchronous fetch fails, stale copy is used
+        self._age_entry(cache, "key1", 10)
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        self.assertEqual(fetcher.call_count, 3)
+
+        # Nothing cached, exception is propagated
+        self.assertRaises(ValueError, cache.get, "key2", MockFetcher([ValueError("failure")]))
+
+    def test_recently_used_entries_are_refreshed_before_expiry(self):
+        cache = RefreshingCache(
+            name="test_refresh_ahead", max_len=2, max_age=0.5, refresh_ahead=0.2
+        )
+        fetcher = MockFetcher(["a", "b", "c", "d", "e", "f"])
+
+        self.assertEqual(cache.get("key1", fetcher), "a")
+
+        # Entry is refreshed by the background thread without being accessed
+        self.assertTrue(fetcher.wait_for_calls(2))
+        cache.stop()
+        self.assertEqual(cache.get_stats()["refreshes"], 1)
+        self.assertEqual(cache.get("key1", fetcher), "b")
+        self.assertEqual(cache.get_stats()["misses"], 1)
+
+    def test_stop(self):
+        cache = RefreshingCache(name="test_stop", max_len=2, max_age=10)
+        fetcher = MockFetcher(["a", "b"])
+
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        refresher_thread = cache._refresher_thread
+        self.assertTrue(refresher_thread.is_alive())
+
+        cache.stop()
+        self.assertFalse(refresher_thread.is_alive())
+
+        # Cache can still be used and refresher is started again
+        self.assertEqual(cache.get("key1", fetcher), "a")
+        self.assertEqual(cache.get("key2", fetcher), "b")
+        self.assertTrue(cache._refresher_thread.is_alive())
+        self.assertFalse(cache._refresher_thread is refresher_thread)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Tomaz Muraus
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from radio_bridge.utils.ring_buffer import AudioRingBuffer
+
+__all__ = ["AudioRingBufferTestCase"]
+
+
+class AudioRingBufferTestCase(unittest.TestCase):
+    def test_write_and_get_window(self):
+        buf = AudioRingBuffer(capacity=10)
+
+        # Not enough samples written yet
+        self.assertIsNone(buf.get_window(position=0, size=4))
+
+        buf.write(np.arange(0, 6, dtype=np.int16))
+        self.assertEqual(buf.write_position, 6)
+
+        position, window = buf.get_window(position=0, size=4)
+        self.assertEqual(position, 0)
+        self.assertEqual(window.tolist(), [0, 1, 2, 3])
+
+        # Overlapping window
+        position, window = buf.get_window(position=2, size=4)
+        self.assertEqual(window.tolist(), [2, 3, 4, 5])
+
+        self.assertIsNone(buf.get_window(position=4, size=4))
+
+        # Window which wraps around is still returned as a contiguous view
+        buf.write(np.arange(6, 14, dtype=np.int16))
+        position, window = buf.get_window(position=8, size=6)
+        self.assertEqual(position, 8)
+        self.assertEqual(window.tolist(), [8, 9, 10, 11, 12, 13])
+        self.assertFalse(window.flags.owndata)
+        self.assertFalse(window.flags.writeable)
+
+        self.assertEqual(buf.get_stats(), {"written_samples": 14, "missed_samples": 0})
+
+    def test_get_window_samples_overwritten(self):
+        buf = AudioRingBuffer(capacity=10)
+        buf.write(np.arange(0, 15, dtype=np.int16))
+        self.assertEqual(buf.get_oldest_position(), 5)
+
+        position, window = buf.get_window(position=2, size=4)
+        self.assertEqual(position, 5)
+        self.assertEqual(window.tolist(), [5, 6, 7, 8])
+        self.assertEqual(buf.get_stats()["missed_samples"], 3)
+
+    def test_write_more_than_capacity(self):
+        buf = AudioRingBuffer(capacity=10)
+        buf.write(np.arange(0, 3, dtype=np.int16))
+        buf.write(np.arange(3, 28, dtype=np.int16))
+        self.assertEqual(buf.write_position, 28)
+
+        position, window = buf.get_window(position=18, size=10)
+        self.assertEqual(position, 18)
+        self.assertEqual(window.tolist(), list(range(18, 28)))
+
+    def test_get_window_larger_than_capacity(self):
+        buf = AudioRingBuffer(capacity=10)
+        self.assertRaisesRegex(ValueError, "larger than capacity", buf.get_window, 0, 11)